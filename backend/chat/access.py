@@ -0,0 +1,94 @@
+"""Who may use a chat room, shared by the REST views and the WebSocket consumer.
+
+A room is open to its two users while they are still matched; unlike the
+old views, nothing here recreates a missing ``MutualMatch``, so an unmatched
+or blocked pair loses its room.  The answer is cached per room for
+``CHAT_ACCESS_CACHE_TTL`` seconds, including misses, so the database is read
+at most once per room per TTL.  Signals drop the entry when the room or the
+pair's match changes, which is how blocks and unmatches take effect at once.
+Only a shared ``CACHE_BACKEND`` carries that eviction to every worker, so
+with a per-process cache grants are kept for ``CHAT_ACCESS_LOCAL_TTL``
+seconds only: another worker's revocation lands within that time.  Nothing
+here writes.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, OuterRef
+
+from matches.models import MutualMatch
+
+from .models import ChatRoom
+
+ROOM_FIELDS = ("id", "user_one_id", "user_two_id", "created_at")
+
+
+class RoomAccess(NamedTuple):
+    room: ChatRoom
+    matched: bool
+
+    def allows(self, user_id: int) -> bool:
+        return self.matched and user_id in (self.room.user_one_id, self.room.user_two_id)
+
+
+def _key(room_id: int) -> str:
+    return f"chat:access:{room_id}"
+
+
+def _from_cache(values) -> RoomAccess | None:
+    if not values:
+        return None
+    *fields, matched = values
+    return RoomAccess(ChatRoom.from_db(DEFAULT_DB_ALIAS, ROOM_FIELDS, fields), matched)
+
+
+def _load(room_id: int) -> tuple:
+    matched = MutualMatch.objects.filter(
+        user_one=OuterRef("user_one"), user_two=OuterRef("user_two")
+    )
+    values = (
+        ChatRoom.objects.filter(pk=room_id)
+        .annotate(matched=Exists(matched))
+        .values_list(*ROOM_FIELDS, "matched")
+        .first()
+    )
+    values = values or ()
+    granted = bool(values and values[-1])
+    timeout = settings.CHAT_ACCESS_CACHE_TTL
+    if granted and not settings.CACHE_SHARED:
+        timeout = settings.CHAT_ACCESS_LOCAL_TTL
+    cache.set(_key(room_id), values, timeout)
+    return values
+
+
+def room_access(room_id: int) -> RoomAccess | None:
+    """The room (id, users and ``created_at`` only) and whether its pair is matched.
+
+    ``None`` when the room does not exist.
+    """
+    values = cache.get(_key(room_id))
+    return _from_cache(values if values is not None else _load(room_id))
+
+
+async def aroom_access(room_id: int) -> RoomAccess | None:
+    """``room_access`` for consumers; cache hits stay on the event loop."""
+    values = await cache.aget(_key(room_id))
+    if values is None:
+        values = await database_sync_to_async(_load)(room_id)
+    return _from_cache(values)
+
+
+def forget_rooms(*room_ids: int) -> None:
+    cache.delete_many([_key(room_id) for room_id in room_ids])
+
+
+def pair_room_ids(user_one_id: int, user_two_id: int) -> list[int]:
+    first, second = sorted((user_one_id, user_two_id))
+    return list(
+        ChatRoom.objects.filter(user_one_id=first, user_two_id=second).values_list("id", flat=True)
+    )
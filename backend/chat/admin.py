@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 
-from .models import ChatRoom, Message
+from .models import ChatRoom, Message, RoomState
 
 
 # --------- Custom actions for Message ---------
@@ -124,3 +124,24 @@ class MessageAdmin(admin.ModelAdmin):
         return (text[:60] + "...") if len(text) > 60 else text
 
     short_content.short_description = "Content"
+
+
+# --------- RoomState admin ---------
+
+@admin.register(RoomState)
+class RoomStateAdmin(admin.ModelAdmin):
+    list_display = (
+        "room",
+        "last_activity_at",
+        "last_message",
+        "unread_user_one",
+        "unread_user_two",
+    )
+
+    list_select_related = ("room", "last_message")
+
+    ordering = ("-last_activity_at",)
+
+    readonly_fields = ("room", "user_one", "user_two", "last_message", "last_activity_at")
+
+    list_per_page = 50
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import time
+
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
-from matches.models import MutualMatch
 from notifications.utils import push_notification
 
-from .models import ChatRoom, Message
+from . import access
+from .events import read_receipt, room_group
+from .models import Message, RoomState
+from .writebehind import get_buffer
 
 User = get_user_model()
 
@@ -20,29 +26,48 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             return
 
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
-        room = await self._get_room()
-        if room is None:
+        self.room = await self._get_room()
+        if self.room is None:
             await self.close()
             return
 
-        self.room_group_name = f"chat_{self.room_id}"
+        self.room_group_name = room_group(self.room_id)
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, code):  # pragma: no cover - websocket teardown
         if hasattr(self, "room_group_name"):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if settings.CHAT_WRITE_BEHIND:
+            await get_buffer().flush()
 
     async def receive_json(self, content, **kwargs):
+        if self._access_expired() and await self._get_room() is None:
+            await self.close()
+            return
+        if content.get("type") == "read":
+            await self._receive_read(content.get("message_id"))
+            return
         message = content.get("message")
         if not message:
             return
         user = self.scope["user"]
-        message_obj = await self._create_message(user, message)
+        if settings.CHAT_WRITE_BEHIND:
+            # Broadcast first; the buffer persists the message in the next batch.
+            buffer = get_buffer()
+            message_obj = Message(
+                id=await buffer.next_id(), room=self.room, sender=user, content=message
+            )
+            await self._broadcast(message_obj)
+            await buffer.add(message_obj)
+            return
+        await self._broadcast(await self._create_message(user, message))
+
+    async def _broadcast(self, message_obj: Message) -> None:
         payload = {
             "id": message_obj.id,
             "room": message_obj.room_id,
-            "sender": user.id,
+            "sender": message_obj.sender_id,
             "content": message_obj.content,
             "created_at": message_obj.created_at.isoformat(),
         }
@@ -50,27 +75,72 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             self.room_group_name, {"type": "chat.message", "message": payload}
         )
 
+    async def chat_access(self, event):
+        # Sent after a block, unmatch or room change; the cache was evicted first.
+        if await self._get_room() is None:
+            await self.close()
+
     async def chat_message(self, event):
         await self.send_json(event["message"])
 
-    @database_sync_to_async
-    def _get_room(self):
+    async def _receive_read(self, message_id) -> None:
         try:
-            room = ChatRoom.objects.select_related("user_one", "user_two").get(
-                pk=self.room_id
-            )
-        except ChatRoom.DoesNotExist:
-            return None
+            message_id = None if message_id is None else int(message_id)
+        except (TypeError, ValueError):
+            return
         user = self.scope["user"]
-        if user not in {room.user_one, room.user_two}:
+        watermark = await self._mark_read(user, message_id)
+        if watermark is not None:
+            await self.channel_layer.group_send(
+                self.room_group_name, read_receipt(int(self.room_id), user.id, watermark)
+            )
+
+    async def chat_read(self, event):
+        # Receipts are for the partner; the reader already knows.
+        if event["reader"] == self.scope["user"].id:
+            return
+        await self.send_json(
+            {
+                "type": "read",
+                "room": event["room"],
+                "reader": event["reader"],
+                "message_id": event["message_id"],
+            }
+        )
+
+    async def _get_room(self):
+        """The room while the user may use it; blocks and unmatches revoke access."""
+        room_access = await access.aroom_access(int(self.room_id))
+        self._access_checked_at = time.monotonic()
+        if room_access is None or not room_access.allows(self.scope["user"].id):
             return None
-        MutualMatch.get_or_create_mutual(room.user_one, room.user_two)
-        return room
+        return room_access.room
+
+    def _access_expired(self) -> bool:
+        """Whether a frame must re-check access before it is handled.
+
+        ``chat_access`` events carry revocations to open sockets; a
+        per-process cache and channel layer cannot carry another worker's,
+        so those sockets re-check once ``CHAT_ACCESS_LOCAL_TTL`` has passed.
+        """
+        if settings.CACHE_SHARED:
+            return False
+        return time.monotonic() - self._access_checked_at >= settings.CHAT_ACCESS_LOCAL_TTL
+
+    @database_sync_to_async
+    def _mark_read(self, user, message_id: int | None) -> int | None:
+        """The reader's new watermark, or ``None`` if it did not move."""
+        state, moved = RoomState.mark_read(self.room, user.id, message_id)
+        return state.last_read_by(user.id) if moved else None
 
     @database_sync_to_async
     def _create_message(self, user, content: str):
-        room = ChatRoom.objects.get(pk=self.room_id)
-        message = Message.objects.create(room=room, sender=user, content=content)
-        partner = room.user_one if room.user_two == user else room.user_two
-        push_notification(partner, "message", {"room_id": room.id, "sender_id": user.id})
+        with transaction.atomic():
+            message = Message.objects.create(room=self.room, sender=user, content=content)
+            RoomState.record_message(message)
+            push_notification(
+                self.room.partner_id(user.id),
+                "message",
+                {"room_id": self.room.id, "sender_id": user.id},
+            )
         return message
@@ -0,0 +1,27 @@
+"""Channel-layer events shared by the chat REST views and consumer."""
+from __future__ import annotations
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+
+def room_group(room_id: int) -> str:
+    return f"chat_{room_id}"
+
+
+def read_receipt(room_id: int, reader_id: int, message_id: int) -> dict:
+    return {"type": "chat.read", "room": room_id, "reader": reader_id, "message_id": message_id}
+
+
+def send_read_receipt(room_id: int, reader_id: int, message_id: int) -> None:
+    """Tell the room's sockets that ``reader_id`` has read up to ``message_id``."""
+    async_to_sync(get_channel_layer().group_send)(
+        room_group(room_id), read_receipt(room_id, reader_id, message_id)
+    )
+
+
+def send_access_changed(room_ids) -> None:
+    """Make the rooms' open sockets re-check access, closing those that lost it."""
+    send = async_to_sync(get_channel_layer().group_send)
+    for room_id in room_ids:
+        send(room_group(room_id), {"type": "chat.access"})
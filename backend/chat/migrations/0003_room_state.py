@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+
+
+def build_room_states(apps, schema_editor):
+    ChatRoom = apps.get_model("chat", "ChatRoom")
+    Message = apps.get_model("chat", "Message")
+    RoomState = apps.get_model("chat", "RoomState")
+    newest = Message.objects.filter(room=OuterRef("pk")).order_by("-id")
+    rooms = ChatRoom.objects.annotate(
+        last_message_id=Max("messages__id"),
+        last_message_at=Subquery(newest.values("created_at")[:1]),
+        unread_one=Count(
+            "messages", filter=Q(messages__is_read=False) & ~Q(messages__sender=models.F("user_one"))
+        ),
+        unread_two=Count(
+            "messages", filter=Q(messages__is_read=False) & ~Q(messages__sender=models.F("user_two"))
+        ),
+    )
+    batch = []
+    for room in rooms.iterator():
+        batch.append(
+            RoomState(
+                room_id=room.pk,
+                user_one_id=room.user_one_id,
+                user_two_id=room.user_two_id,
+                last_message_id=room.last_message_id,
+                last_activity_at=room.last_message_at or room.created_at,
+                unread_user_one=room.unread_one,
+                unread_user_two=room.unread_two,
+            )
+        )
+        if len(batch) >= 500:
+            RoomState.objects.bulk_create(batch)
+            batch = []
+    RoomState.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_rename_chat_chat_user_on_d8f117_idx_chat_chatro_user_on_c37c83_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomState',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='chat.chatroom')),
+                ('last_activity_at', models.DateTimeField()),
+                ('unread_user_one', models.PositiveIntegerField(default=0)),
+                ('unread_user_two', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message')),
+                ('user_one', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_two', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_one', '-last_activity_at'], name='chat_state_user_one_recent'), models.Index(fields=['user_two', '-last_activity_at'], name='chat_state_user_two_recent')],
+            },
+        ),
+        migrations.RunPython(build_room_states, migrations.RunPython.noop),
+    ]
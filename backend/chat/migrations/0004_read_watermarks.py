@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def seed_watermarks(apps, schema_editor):
+    """Start each watermark at the newest partner message already flagged read."""
+    Message = apps.get_model("chat", "Message")
+    RoomState = apps.get_model("chat", "RoomState")
+    for side, partner in (("user_one", "user_two"), ("user_two", "user_one")):
+        from_partner = Message.objects.filter(room=OuterRef("room"), sender=OuterRef(partner))
+        newest_read = from_partner.filter(is_read=True).order_by("-id").values("id")[:1]
+        RoomState.objects.update(**{f"last_read_{side}": Coalesce(Subquery(newest_read), 0)})
+        unread = (
+            from_partner.filter(id__gt=OuterRef(f"last_read_{side}"))
+            .order_by()
+            .values("room")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        RoomState.objects.update(**{f"unread_{side}": Coalesce(Subquery(unread), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_room_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomstate',
+            name='last_read_user_one',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='roomstate',
+            name='last_read_user_two',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(seed_watermarks, migrations.RunPython.noop),
+    ]
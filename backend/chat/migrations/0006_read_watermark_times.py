@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def seed_read_times(apps, schema_editor):
+    """Copy each watermark message's send time onto the room state."""
+    Message = apps.get_model("chat", "Message")
+    RoomState = apps.get_model("chat", "RoomState")
+    for side in ("user_one", "user_two"):
+        sent_at = Message.objects.filter(pk=OuterRef(f"last_read_{side}")).values("created_at")[:1]
+        RoomState.objects.filter(**{f"last_read_{side}__gt": 0}).update(
+            **{f"last_read_at_{side}": Subquery(sent_at)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_message_created_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomstate',
+            name='last_read_at_user_one',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='roomstate',
+            name='last_read_at_user_two',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(seed_read_times, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -24,6 +26,9 @@ class ChatRoom(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return f"ChatRoom({self.user_one} & {self.user_two})"
 
+    def partner_id(self, user_id: int) -> int:
+        return self.user_two_id if user_id == self.user_one_id else self.user_one_id
+
     @classmethod
     def get_or_create_room(cls, user_a, user_b):
         if user_a.id > user_b.id:
@@ -36,7 +41,9 @@ class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="messages")
     content = models.TextField()
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so write-behind batches keep the
+    # timestamp they were broadcast with.
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["created_at"]
@@ -44,3 +51,181 @@ class Message(models.Model):
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Message({self.sender} -> {self.room_id})"
+
+
+def _position(message: Message) -> tuple:
+    return message.created_at, message.id
+
+
+class RoomState(models.Model):
+    """Denormalized inbox row for a room: latest message and per-participant read state.
+
+    The participants are copied from the room so an inbox is a single range
+    scan over ``(user, -last_activity_at)``.  Rows are kept current by
+    ``record_message`` in the same transaction as the message insert.
+
+    Messages are ordered by ``(created_at, id)``: the time they were sent,
+    then their id.  Write-behind ids come from per-process blocks, so id
+    order alone does not follow send order across workers.
+
+    Each participant has read every message up to their ``last_read_*``
+    watermark (a message id, with its send time in ``last_read_at_*``);
+    their unread count is the partner's messages after it.
+    """
+
+    room = models.OneToOneField(
+        ChatRoom, primary_key=True, on_delete=models.CASCADE, related_name="state"
+    )
+    user_one = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    user_two = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    last_message = models.ForeignKey(
+        Message, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    last_activity_at = models.DateTimeField()
+    unread_user_one = models.PositiveIntegerField(default=0)
+    unread_user_two = models.PositiveIntegerField(default=0)
+    last_read_user_one = models.PositiveBigIntegerField(default=0)
+    last_read_user_two = models.PositiveBigIntegerField(default=0)
+    last_read_at_user_one = models.DateTimeField(null=True, blank=True)
+    last_read_at_user_two = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user_one", "-last_activity_at"], name="chat_state_user_one_recent"),
+            models.Index(fields=["user_two", "-last_activity_at"], name="chat_state_user_two_recent"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"RoomState({self.room_id})"
+
+    @classmethod
+    def for_room(cls, room: ChatRoom) -> "RoomState":
+        state, _ = cls.objects.get_or_create(
+            room=room,
+            defaults={
+                "user_one_id": room.user_one_id,
+                "user_two_id": room.user_two_id,
+                "last_activity_at": room.created_at,
+            },
+        )
+        return state
+
+    @classmethod
+    def locked(cls, room: ChatRoom) -> "RoomState":
+        """The room's state, locked until the current transaction ends."""
+        state = cls.objects.select_for_update().filter(room_id=room.id).first()
+        if state is None:
+            cls.for_room(room)
+            state = cls.objects.select_for_update().get(room_id=room.id)
+        return state
+
+    @classmethod
+    def record_message(cls, message: Message) -> None:
+        """Advance the room's state past ``message``.
+
+        Call it inside the transaction that created ``message``.  A slower
+        insert of an older message never moves the preview backwards.
+        """
+        cls.record_messages([message])
+
+    @classmethod
+    def record_messages(cls, messages) -> None:
+        """``record_message`` for a batch: one locked read and one UPDATE per room touched.
+
+        Only messages after the reader's watermark count as unread: a
+        write-behind message is persisted after it was broadcast, possibly
+        after its reader has already marked a later message read.
+        """
+        by_room: dict[int, list[Message]] = {}
+        for message in messages:
+            by_room.setdefault(message.room_id, []).append(message)
+        with transaction.atomic():
+            for batch in by_room.values():
+                room = batch[0].room
+                state = cls.locked(room)
+                newest = max(batch, key=_position)
+                changes = {
+                    "last_activity_at": max(
+                        state.last_activity_at, *(message.created_at for message in batch)
+                    ),
+                }
+                latest = (state.last_activity_at, state.last_message_id)
+                if state.last_message_id is None or latest < _position(newest):
+                    changes["last_message_id"] = newest.id
+                for side, reader_id in (
+                    ("user_one", room.user_one_id),
+                    ("user_two", room.user_two_id),
+                ):
+                    unread = sum(
+                        1
+                        for message in batch
+                        if message.sender_id != reader_id
+                        and not state.has_read(reader_id, message)
+                    )
+                    if unread:
+                        changes[f"unread_{side}"] = F(f"unread_{side}") + unread
+                cls.objects.filter(room_id=room.id).update(**changes)
+
+    @classmethod
+    def mark_read(
+        cls, room: ChatRoom, user_id: int, message_id: int | None = None
+    ) -> tuple["RoomState", bool]:
+        """Move ``user_id``'s watermark up to ``message_id`` (default: the latest message).
+
+        The watermark never moves backwards.  An id the room does not hold
+        (yet: write-behind messages are stored after their broadcast) reads up
+        to the latest stored message.  The unread count is recounted as the
+        partner's messages after the new watermark, and both are stored with
+        one UPDATE.  Returns the state and whether the watermark moved.
+        """
+        side = "user_one" if user_id == room.user_one_id else "user_two"
+        with transaction.atomic():
+            # Lock the row so a concurrent record_message increments after our recount.
+            state = cls.locked(room)
+            target = None
+            if message_id is not None:
+                target = (
+                    Message.objects.filter(room_id=room.id, pk=message_id)
+                    .values_list("created_at", "id")
+                    .first()
+                )
+            if target is None:
+                if state.last_message_id is None:
+                    return state, False
+                target = (state.last_activity_at, state.last_message_id)
+            read_at, target_id = target
+            current = getattr(state, f"last_read_at_{side}")
+            if current is not None and target <= (current, getattr(state, f"last_read_{side}")):
+                return state, False
+            unread = (
+                Message.objects.filter(room_id=room.id)
+                .filter(Q(created_at__gt=read_at) | Q(created_at=read_at, id__gt=target_id))
+                .exclude(sender_id=user_id)
+                .count()
+            )
+            changes = {
+                f"last_read_{side}": target_id,
+                f"last_read_at_{side}": read_at,
+                f"unread_{side}": unread,
+            }
+            cls.objects.filter(room_id=room.id).update(**changes)
+        for attr, value in changes.items():
+            setattr(state, attr, value)
+        return state, True
+
+    def unread_for(self, user_id: int) -> int:
+        return self.unread_user_one if user_id == self.user_one_id else self.unread_user_two
+
+    def last_read_by(self, user_id: int) -> int:
+        return self.last_read_user_one if user_id == self.user_one_id else self.last_read_user_two
+
+    def has_read(self, user_id: int, message: Message) -> bool:
+        """Whether ``user_id``'s watermark has reached ``message``."""
+        if user_id == self.user_one_id:
+            read_at, watermark = self.last_read_at_user_one, self.last_read_user_one
+        else:
+            read_at, watermark = self.last_read_at_user_two, self.last_read_user_two
+        return read_at is not None and _position(message) <= (read_at, watermark)
+
+    def partner_id(self, user_id: int) -> int:
+        return self.user_two_id if user_id == self.user_one_id else self.user_one_id
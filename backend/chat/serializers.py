@@ -1,20 +1,35 @@
 from __future__ import annotations
 
+from functools import cached_property
+
 from rest_framework import serializers
 
-from profiles.serializers import ProfileSerializer
+from profiles.serializers import ProfileCardSerializer
+from vivahvows.fastpath import compile_serializer
 
-from .models import ChatRoom, Message
+from .models import ChatRoom, Message, RoomState
 
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = serializers.PrimaryKeyRelatedField(read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
         fields = ["id", "room", "sender", "content", "is_read", "created_at"]
         read_only_fields = ["id", "sender", "is_read", "created_at"]
 
+    def get_is_read(self, obj: Message) -> bool:
+        """Whether the recipient's read watermark has reached ``obj``.
+
+        Reads the room's state from ``context["room_states"]``; without one
+        the message counts as unread.
+        """
+        state = self.context.get("room_states", {}).get(obj.room_id)
+        if state is None:
+            return False
+        return state.has_read(state.partner_id(obj.sender_id), obj)
+
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     partner = serializers.SerializerMethodField()
@@ -25,6 +40,69 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "user_one", "user_two", "created_at", "partner"]
 
     def get_partner(self, obj: ChatRoom):
-        user = self.context["request"].user
-        partner = obj.user_one if obj.user_two == user else obj.user_two
-        return ProfileSerializer(partner.profile, context=self.context).data
+        return partner_card(self, obj)
+
+    @cached_property
+    def partner_serializer(self):
+        return compile_serializer(ProfileCardSerializer, context=self.context)
+
+
+class InboxSerializer(serializers.ModelSerializer):
+    """One inbox row: the room, its partner's card, the latest message and the viewer's unread count."""
+
+    id = serializers.IntegerField(source="room_id", read_only=True)
+    partner = serializers.SerializerMethodField()
+    last_message = MessageSerializer(read_only=True)
+    unread_count = serializers.SerializerMethodField()
+    last_read_message_id = serializers.SerializerMethodField()
+    partner_last_read_message_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RoomState
+        fields = [
+            "id",
+            "partner",
+            "last_message",
+            "last_activity_at",
+            "unread_count",
+            "last_read_message_id",
+            "partner_last_read_message_id",
+        ]
+        read_only_fields = fields
+
+    def get_partner(self, obj: RoomState):
+        return partner_card(self, obj)
+
+    def get_unread_count(self, obj: RoomState) -> int:
+        return obj.unread_for(self.context["request"].user.id)
+
+    def get_last_read_message_id(self, obj: RoomState) -> int:
+        return obj.last_read_by(self.context["request"].user.id)
+
+    def get_partner_last_read_message_id(self, obj: RoomState) -> int:
+        return obj.last_read_by(obj.partner_id(self.context["request"].user.id))
+
+    @cached_property
+    def partner_serializer(self):
+        return compile_serializer(ProfileCardSerializer, context=self.context)
+
+
+class MarkReadSerializer(serializers.Serializer):
+    message_id = serializers.IntegerField(required=False, min_value=1)
+
+
+def partner_card(serializer, obj):
+    """The viewer's partner in ``obj`` (a room or room state) rendered as a profile card.
+
+    Uses the profiles the view bulk-loaded into ``context["partner_profiles"]``
+    when present, else loads the partner's profile directly.
+    """
+    user_id = serializer.context["request"].user.id
+    partner_id = obj.user_two_id if user_id == obj.user_one_id else obj.user_one_id
+    profiles = serializer.context.get("partner_profiles")
+    if profiles is not None:
+        profile = profiles.get(partner_id)
+    else:
+        partner = obj.user_two if partner_id == obj.user_two_id else obj.user_one
+        profile = partner.profile
+    return None if profile is None else serializer.partner_serializer(profile)
@@ -0,0 +1,44 @@
+"""Keep RoomState rows and cached room access in step with rooms and matches."""
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from matches.models import MutualMatch
+
+from . import access
+from .events import send_access_changed
+from .models import ChatRoom, RoomState
+
+
+@receiver(post_save, sender=ChatRoom)
+def create_room_state(sender, instance: ChatRoom, created: bool, raw: bool = False, **kwargs) -> None:
+    if created and not raw:
+        RoomState.for_room(instance)
+
+
+def _evict(room_ids: list[int]) -> None:
+    # Evict now and again after commit, so a read racing the transaction
+    # cannot leave the old answer cached; then tell the rooms' sockets.
+    if room_ids:
+        access.forget_rooms(*room_ids)
+
+        def after_commit():
+            access.forget_rooms(*room_ids)
+            send_access_changed(room_ids)
+
+        transaction.on_commit(after_commit)
+
+
+@receiver(post_save, sender=ChatRoom)
+@receiver(post_delete, sender=ChatRoom)
+def evict_room_access(sender, instance: ChatRoom, **kwargs) -> None:
+    _evict([instance.pk])
+
+
+@receiver(post_save, sender=MutualMatch)
+@receiver(post_delete, sender=MutualMatch)
+def evict_pair_access(sender, instance: MutualMatch, **kwargs) -> None:
+    """Matches, blocks and unmatches change who may use the pair's room."""
+    _evict(access.pair_room_ids(instance.user_one_id, instance.user_two_id))
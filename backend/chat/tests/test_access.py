@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from chat import access
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom
+from matches.models import MutualMatch
+
+
+class RoomAccessTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.partner = User.objects.create_user(username="partner", password="pass-12345")
+        MutualMatch.get_or_create_mutual(self.user, self.partner)
+        self.room, _ = ChatRoom.get_or_create_room(self.user, self.partner)
+        self.client.force_authenticate(self.user)
+        self.url = reverse("chat-messages", args=[self.room.id])
+
+    def _scope(self) -> dict:
+        return {
+            "type": "websocket",
+            "path": f"/ws/chat/{self.room.id}/",
+            "user": self.user,
+            "url_route": {"kwargs": {"room_id": self.room.id}},
+        }
+
+    @override_settings(CACHE_SHARED=True)
+    def test_membership_is_cached_and_reads_never_create_matches(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        # Cached: membership costs no queries the second time round.
+        with self.assertNumQueries(0):
+            self.assertTrue(access.room_access(self.room.id).allows(self.user.id))
+
+        MutualMatch.objects.all().delete()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertFalse(MutualMatch.objects.exists())
+
+    @override_settings(CACHE_SHARED=False, CHAT_ACCESS_LOCAL_TTL=5)
+    def test_grants_are_kept_briefly_when_other_workers_cannot_evict_them(self):
+        self.assertTrue(access.room_access(self.room.id).allows(self.user.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(access.room_access(self.room.id).allows(self.user.id))
+        # This process's signals still evict at once.
+        MutualMatch.objects.all().delete()
+        self.assertFalse(access.room_access(self.room.id).allows(self.user.id))
+        with self.assertNumQueries(0):
+            self.assertFalse(access.room_access(self.room.id).allows(self.user.id))
+
+    @override_settings(CACHE_SHARED=False, CHAT_ACCESS_LOCAL_TTL=0)
+    def test_expired_grants_are_rechecked(self):
+        self.assertTrue(access.room_access(self.room.id).allows(self.user.id))
+        with self.assertNumQueries(1):
+            self.assertTrue(access.room_access(self.room.id).allows(self.user.id))
+
+    def test_unmatched_pair_loses_the_room_and_no_match_is_recreated(self):
+        MutualMatch.objects.all().delete()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        async def connect():
+            communicator = ApplicationCommunicator(ChatConsumer.as_asgi(), self._scope())
+            await communicator.send_input({"type": "websocket.connect"})
+            return (await communicator.receive_output(1))["type"]
+
+        self.assertEqual(async_to_sync(connect)(), "websocket.close")
+        self.assertFalse(MutualMatch.objects.exists())
+
+    def test_unmatch_closes_open_sockets(self):
+        def unmatch():
+            with self.captureOnCommitCallbacks(execute=True):
+                MutualMatch.objects.all().delete()
+
+        async def scenario():
+            communicator = ApplicationCommunicator(ChatConsumer.as_asgi(), self._scope())
+            await communicator.send_input({"type": "websocket.connect"})
+            self.assertEqual((await communicator.receive_output(1))["type"], "websocket.accept")
+            await database_sync_to_async(unmatch)()
+            return (await communicator.receive_output(1))["type"]
+
+        self.assertEqual(async_to_sync(scenario)(), "websocket.close")
+
+    def test_block_revokes_cached_access(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        response = self.client.post(reverse("block-profile", args=[self.partner.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(
+            self.client.post(self.url, {"room": self.room.id, "content": "hi"}).status_code, 403
+        )
+
+    def test_missing_room_and_outsiders(self):
+        self.assertEqual(self.client.get(reverse("chat-messages", args=[999])).status_code, 404)
+        outsider = get_user_model().objects.create_user(username="outsider", password="pass-12345")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -0,0 +1,122 @@
+"""Group delivery between two worker processes through the configured layer.
+
+Runs against ``CHANNEL_REDIS_TEST_URL`` when set, otherwise against a
+throwaway ``redis-server`` on a free port; skipped when neither is
+available or channels_redis is not installed.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from unittest import SkipTest, skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+WORKER = """
+import asyncio, json, sys
+
+import django
+
+django.setup()
+from channels.layers import get_channel_layer
+
+
+async def main(name):
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    await layer.group_add("integration", channel)
+    print("ready", flush=True)
+    await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+    await layer.group_send("integration", {"type": "chat.message", "sender": name})
+    senders = [(await asyncio.wait_for(layer.receive(channel), 10))["sender"] for _ in range(2)]
+    print(json.dumps(sorted(senders)), flush=True)
+
+
+asyncio.run(main(sys.argv[1]))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@skipUnless(importlib.util.find_spec("channels_redis"), "channels_redis is not installed")
+class CrossProcessGroupTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = None
+        cls.url = os.environ.get("CHANNEL_REDIS_TEST_URL")
+        if cls.url:
+            return
+        binary = shutil.which("redis-server")
+        if binary is None:
+            raise SkipTest("No redis-server on PATH and CHANNEL_REDIS_TEST_URL is not set.")
+        port = _free_port()
+        cls.server = subprocess.Popen(
+            [binary, "--port", str(port), "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+        )
+        cls.addClassCleanup(cls.server.terminate)
+        _wait_for_port(port)
+        cls.url = f"redis://127.0.0.1:{port}/0"
+
+    def run_workers(self, backend: str) -> list:
+        env = {
+            **os.environ,
+            "CHANNEL_LAYER_BACKEND": backend,
+            "CHANNEL_REDIS_URLS": self.url,
+            # A fresh prefix keeps runs from seeing each other's groups.
+            "CHANNEL_LAYER_PREFIX": f"test-{uuid.uuid4().hex}",
+        }
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", WORKER, name],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                env=env,
+                cwd=settings.BASE_DIR,
+            )
+            for name in ("a", "b")
+        ]
+        try:
+            for worker in workers:
+                self.assertEqual(worker.stdout.readline().strip(), "ready")
+            # Both are in the group before either sends.
+            for worker in workers:
+                worker.stdin.write("\n")
+                worker.stdin.flush()
+            outputs = [worker.communicate(timeout=30)[0] for worker in workers]
+        finally:
+            for worker in workers:
+                worker.kill()
+        self.assertEqual([worker.returncode for worker in workers], [0, 0])
+        return [json.loads(output.splitlines()[-1]) for output in outputs]
+
+    def test_group_send_reaches_members_in_other_processes(self):
+        for backend in ("redis", "redis-pubsub"):
+            with self.subTest(backend=backend):
+                self.assertEqual(self.run_workers(backend), [["a", "b"], ["a", "b"]])
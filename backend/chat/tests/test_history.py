@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from chat.models import ChatRoom, Message
+from matches.models import MutualMatch
+
+
+class MessageHistoryTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        partner = User.objects.create_user(username="partner", password="pass-12345")
+        MutualMatch.get_or_create_mutual(self.user, partner)
+        room, _ = ChatRoom.get_or_create_room(self.user, partner)
+        self.ids = [
+            Message.objects.create(room=room, sender=self.user, content=str(n)).id for n in range(7)
+        ]
+        self.client.force_authenticate(self.user)
+        self.url = reverse("chat-messages", args=[room.id])
+
+    def test_pages_backwards_newest_first_without_counting(self):
+        seen, url = [], self.url + "?limit=3"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url).data
+                seen.extend(message["id"] for message in data["results"])
+                url = data["next"]
+        self.assertEqual(seen, self.ids[::-1])
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in queries))
+        self.assertFalse(any("OFFSET" in query["sql"].upper() for query in queries))
+
+    def test_after_anchor_returns_the_next_newer_messages(self):
+        data = self.client.get(self.url, {"after": self.ids[1], "limit": 2}).data
+        self.assertEqual([m["id"] for m in data["results"]], [self.ids[3], self.ids[2]])
+        self.assertIn(f"after={self.ids[3]}", data["previous"])
+        self.assertIn(f"before={self.ids[2]}", data["next"])
+
+        data = self.client.get(self.url, {"after": self.ids[-1]}).data
+        self.assertEqual(data["results"], [])
+        self.assertEqual(self.client.get(self.url, {"before": "x"}).status_code, 404)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from chat.events import room_group
+from chat.models import ChatRoom, Message, RoomState
+from matches.models import MutualMatch
+
+
+class InboxTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.partners = []
+        self.rooms = []
+        for index in range(4):
+            partner = User.objects.create_user(username=f"partner{index}", password="pass-12345")
+            partner.profile.name = f"Partner {index}"
+            partner.profile.save()
+            MutualMatch.get_or_create_mutual(self.user, partner)
+            room, _ = ChatRoom.get_or_create_room(self.user, partner)
+            self.partners.append(partner)
+            self.rooms.append(room)
+        self.client.force_authenticate(self.user)
+
+    def _send(self, sender, room, content):
+        self.client.force_authenticate(sender)
+        url = reverse("chat-messages", args=[room.id])
+        response = self.client.post(url, {"room": room.id, "content": content})
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def test_inbox_orders_by_activity_with_preview_and_unread_counts(self):
+        self._send(self.partners[0], self.rooms[0], "first")
+        self._send(self.partners[0], self.rooms[0], "second")
+        latest = self._send(self.user, self.rooms[2], "hello")
+
+        self.client.force_authenticate(self.user)
+        rows = self.client.get(reverse("chat-inbox")).data["results"]
+        self.assertEqual([row["id"] for row in rows[:2]], [self.rooms[2].id, self.rooms[0].id])
+        self.assertEqual(rows[0]["last_message"]["id"], latest)
+        self.assertEqual(rows[0]["unread_count"], 0)
+        self.assertEqual(rows[0]["partner"]["name"], "Partner 2")
+        self.assertEqual(rows[1]["last_message"]["content"], "second")
+        self.assertEqual(rows[1]["unread_count"], 2)
+        self.assertIsNone(rows[2]["last_message"])
+
+        state = RoomState.objects.get(room=self.rooms[2])
+        self.assertEqual(state.unread_for(self.partners[2].id), 1)
+
+    def test_older_message_does_not_rewind_the_preview(self):
+        room = self.rooms[1]
+        Message.objects.create(room=self.rooms[0], sender=self.user, content="elsewhere")
+        newer = Message.objects.create(room=room, sender=self.user, content="newer")
+        RoomState.record_message(newer)
+        # Sent first, but its transaction committed last.
+        sent_at = newer.created_at - timedelta(seconds=1)
+        older = Message(room=room, sender=self.user, content="older", created_at=sent_at)
+        older.save()
+        RoomState.record_message(older)
+        state = RoomState.objects.get(room=room)
+        self.assertEqual(state.last_message_id, newer.id)
+        self.assertEqual(state.unread_for(self.partners[1].id), 2)
+
+    def test_query_count_does_not_depend_on_inbox_size(self):
+        counts = []
+        for size in (1, 4):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("chat-inbox"), {"page_size": size})
+            self.assertEqual(len(response.data["results"]), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class ReadWatermarkTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.partner = User.objects.create_user(username="partner", password="pass-12345")
+        MutualMatch.get_or_create_mutual(self.user, self.partner)
+        self.room, _ = ChatRoom.get_or_create_room(self.user, self.partner)
+        self.messages = []
+        for content in ("one", "two", "three"):
+            message = Message.objects.create(room=self.room, sender=self.partner, content=content)
+            RoomState.record_message(message)
+            self.messages.append(message)
+        self.client.force_authenticate(self.user)
+        self.url = reverse("chat-mark-read", args=[self.room.id])
+
+    def test_mark_read_moves_watermark_and_sends_receipt(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(room_group(self.room.id), channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"message_id": self.messages[0].id})
+        self.assertEqual(response.data["last_read_message_id"], self.messages[0].id)
+        self.assertEqual(response.data["unread_count"], 2)
+        receipt = async_to_sync(layer.receive)(channel)
+        self.assertEqual((receipt["reader"], receipt["message_id"]), (self.user.id, self.messages[0].id))
+
+        # Older ids never move the watermark back.
+        response = self.client.post(self.url, {"message_id": 1})
+        self.assertEqual(response.data["last_read_message_id"], self.messages[0].id)
+
+        response = self.client.post(self.url)
+        self.assertEqual(response.data["last_read_message_id"], self.messages[-1].id)
+        self.assertEqual(response.data["unread_count"], 0)
+
+        self.client.force_authenticate(self.partner)
+        row = self.client.get(reverse("chat-inbox")).data["results"][0]
+        self.assertEqual(row["partner_last_read_message_id"], self.messages[-1].id)
+
+    def test_is_read_follows_the_recipient_watermark(self):
+        self.client.post(self.url, {"message_id": self.messages[1].id})
+        mine = Message.objects.create(room=self.room, sender=self.user, content="reply")
+        RoomState.record_message(mine)
+
+        for reader in (self.user, self.partner):
+            self.client.force_authenticate(reader)
+            history = self.client.get(reverse("chat-messages", args=[self.room.id])).data
+            flags = {row["id"]: row["is_read"] for row in history["results"]}
+            self.assertEqual(
+                flags,
+                {
+                    self.messages[0].id: True,
+                    self.messages[1].id: True,
+                    self.messages[2].id: False,
+                    mine.id: False,
+                },
+            )
+            preview = self.client.get(reverse("chat-inbox")).data["results"][0]["last_message"]
+            self.assertEqual((preview["id"], preview["is_read"]), (mine.id, False))
+
+    def test_outsiders_cannot_mark_read(self):
+        outsider = get_user_model().objects.create_user(username="outsider", password="pass-12345")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.post(self.url).status_code, 403)
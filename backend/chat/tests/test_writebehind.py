@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+
+from chat.consumers import ChatConsumer
+from chat.models import ChatRoom, Message, RoomState
+from chat.writebehind import MessageBuffer, get_buffer, persist, reserve_message_ids
+from matches.models import MutualMatch
+from notifications.models import Notification
+from notifications.outbox import deliver_pending
+
+
+@override_settings(
+    CHAT_WRITE_BEHIND=True,
+    CHAT_WRITE_BEHIND_BATCH=3,
+    CHAT_WRITE_BEHIND_DELAY_MS=60_000,
+    NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT=False,
+)
+class WriteBehindTests(TransactionTestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.partner = User.objects.create_user(username="partner", password="pass-12345")
+        MutualMatch.get_or_create_mutual(self.user, self.partner)
+        self.room, _ = ChatRoom.get_or_create_room(self.user, self.partner)
+
+    def test_broadcasts_first_and_persists_in_batches(self):
+        async def send(communicator, text: str) -> int:
+            await communicator.send_input(
+                {"type": "websocket.receive", "text": json.dumps({"message": text})}
+            )
+            return json.loads((await communicator.receive_output(1))["text"])["id"]
+
+        async def scenario():
+            scope = {
+                "type": "websocket",
+                "path": f"/ws/chat/{self.room.id}/",
+                "user": self.user,
+                "url_route": {"kwargs": {"room_id": self.room.id}},
+            }
+            communicator = ApplicationCommunicator(ChatConsumer.as_asgi(), scope)
+            await communicator.send_input({"type": "websocket.connect"})
+            self.assertEqual((await communicator.receive_output(1))["type"], "websocket.accept")
+
+            ids = [await send(communicator, "one"), await send(communicator, "two")]
+            # Broadcast, but still buffered: the batch holds three.
+            self.assertEqual(await database_sync_to_async(Message.objects.count)(), 0)
+
+            ids.append(await send(communicator, "three"))
+            ids.append(await send(communicator, "four"))
+            persisted = await database_sync_to_async(
+                lambda: list(Message.objects.values_list("id", flat=True))
+            )()
+            self.assertEqual(persisted, ids[:3])
+
+            await get_buffer().flush()
+            await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+            await communicator.wait(1)
+            return ids
+
+        ids = async_to_sync(scenario)()
+        self.assertEqual(list(Message.objects.order_by("id").values_list("id", flat=True)), ids)
+        self.assertEqual(ids, sorted(ids))
+        state = RoomState.objects.get(room=self.room)
+        self.assertEqual(state.last_message_id, ids[-1])
+        self.assertEqual(state.unread_for(self.partner.id), 4)
+        self.assertEqual(deliver_pending(), 4)
+        notification = Notification.objects.get(user=self.partner, event="message")
+        self.assertEqual(notification.count, 4)
+
+        # Ordinary inserts continue above the reserved ids.
+        message = Message.objects.create(room=self.room, sender=self.partner, content="reply")
+        self.assertGreater(message.id, ids[-1])
+        self.assertGreater(reserve_message_ids(2)[0], message.id)
+
+    def test_late_persisted_message_below_the_watermark_is_not_unread(self):
+        Message.objects.create(room=self.room, sender=self.user, content="one")
+        (buffered_id,) = reserve_message_ids(1)
+        buffered = Message(id=buffered_id, room=self.room, sender=self.user, content="two")
+        later = Message.objects.create(room=self.room, sender=self.user, content="over REST")
+        RoomState.record_message(later)
+        self.assertGreater(later.id, buffered_id)
+        state, moved = RoomState.mark_read(self.room, self.partner.id)
+        self.assertTrue(moved)
+
+        # Sent before the REST message, saved after the partner caught up.
+        persist([buffered])
+        state = RoomState.objects.get(room=self.room)
+        self.assertEqual(state.unread_for(self.partner.id), 0)
+        self.assertEqual(state.last_message_id, later.id)
+
+    def test_lower_id_sent_later_is_unread_and_previewed(self):
+        # Another worker's block hands out lower ids than this REST message.
+        (block_id,) = reserve_message_ids(1)
+        rest = Message.objects.create(room=self.room, sender=self.user, content="over REST")
+        RoomState.record_message(rest)
+        RoomState.mark_read(self.room, self.partner.id)
+
+        persist([Message(id=block_id, room=self.room, sender=self.user, content="over WS")])
+        state = RoomState.objects.get(room=self.room)
+        self.assertEqual(state.last_message_id, block_id)
+        self.assertEqual(state.unread_for(self.partner.id), 1)
+        state, moved = RoomState.mark_read(self.room, self.partner.id)
+        self.assertTrue(moved)
+        self.assertEqual(state.last_read_by(self.partner.id), block_id)
+        self.assertEqual(state.unread_for(self.partner.id), 0)
+
+    def test_ids_are_reserved_in_blocks(self):
+        async def scenario():
+            buffer = MessageBuffer(batch_size=10, delay=60, id_block=8)
+            ids = [await buffer.next_id() for _ in range(20)]
+            if buffer._reserving is not None:
+                await buffer._reserving
+            return ids
+
+        with mock.patch(
+            "chat.writebehind.reserve_message_ids", wraps=reserve_message_ids
+        ) as reserve:
+            ids = async_to_sync(scenario)()
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertLessEqual(reserve.call_count, 4)
+        self.assertTrue(all(call.args == (8,) for call in reserve.call_args_list))
+
+    def test_rejected_message_does_not_wedge_the_buffer(self):
+        gone, _ = ChatRoom.get_or_create_room(
+            self.partner, get_user_model().objects.create_user(username="gone", password="x")
+        )
+        first, second, third = reserve_message_ids(3)
+        stale = Message(id=second, room=gone, sender=self.partner, content="lost room")
+        # Deleted elsewhere (e.g. DELETE /profiles/me) while the message is buffered.
+        ChatRoom.objects.filter(pk=gone.pk).delete()
+
+        async def scenario():
+            buffer = MessageBuffer(batch_size=10, delay=60, id_block=10)
+            await buffer.add(Message(id=first, room=self.room, sender=self.user, content="a"))
+            await buffer.add(stale)
+            await buffer.add(Message(id=third, room=self.room, sender=self.user, content="b"))
+            with self.assertLogs("chat.writebehind", "ERROR"):
+                await buffer.flush()
+            return buffer.pending
+
+        self.assertEqual(async_to_sync(scenario)(), [])
+        self.assertEqual(
+            list(Message.objects.order_by("id").values_list("id", flat=True)), [first, third]
+        )
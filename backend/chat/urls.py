@@ -1,8 +1,10 @@
 from django.urls import path
 
-from .views import ChatRoomListView, MessageListCreateView
+from .views import ChatRoomListView, InboxView, MarkReadView, MessageListCreateView
 
 urlpatterns = [
+    path("inbox/", InboxView.as_view(), name="chat-inbox"),
     path("rooms/", ChatRoomListView.as_view(), name="chat-rooms"),
     path("rooms/<int:room_id>/messages/", MessageListCreateView.as_view(), name="chat-messages"),
+    path("rooms/<int:room_id>/read/", MarkReadView.as_view(), name="chat-mark-read"),
 ]
@@ -1,18 +1,49 @@
 from __future__ import annotations
 
+from django.db import transaction
 from django.db.models import Q
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework import generics, permissions
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from matches.models import MutualMatch
 from notifications.utils import push_notification
+from profiles.serializers import profiles_by_user
+from vivahvows.fastpath import FastListMixin, compile_serializer
+from vivahvows.pagination import AnchorPagination, KeysetPagination
 
-from .models import ChatRoom, Message
-from .serializers import ChatRoomSerializer, MessageSerializer
+from . import access
+from .events import send_read_receipt
+from .models import ChatRoom, Message, RoomState
+from .serializers import ChatRoomSerializer, InboxSerializer, MarkReadSerializer, MessageSerializer
 
 
-class ChatRoomListView(generics.ListAPIView):
+class PartnerListMixin:
+    """List rows naming two participants, loading every partner's profile card in bulk."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        user_id = request.user.id
+        partner_ids = [
+            row.user_two_id if row.user_one_id == user_id else row.user_one_id for row in rows
+        ]
+        context = {
+            **self.get_serializer_context(),
+            **self.get_rows_context(rows),
+            "partner_profiles": profiles_by_user(partner_ids, ["interests"]),
+        }
+        data = compile_serializer(self.get_serializer_class(), context=context).many(rows)
+        return Response(data) if page is None else self.get_paginated_response(data)
+
+    def get_rows_context(self, rows) -> dict:
+        """Extra serializer context derived from the rows being listed."""
+        return {}
+
+
+class ChatRoomListView(PartnerListMixin, generics.ListAPIView):
     serializer_class = ChatRoomSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -21,25 +52,92 @@ class ChatRoomListView(generics.ListAPIView):
         return ChatRoom.objects.filter(Q(user_one=user) | Q(user_two=user)).order_by("-created_at")
 
 
-class MessageListCreateView(generics.ListCreateAPIView):
+class InboxPagination(KeysetPagination):
+    time_field = "last_activity_at"
+    id_field = "pk"
+
+
+class InboxView(PartnerListMixin, generics.ListAPIView):
+    """Conversations by latest activity, with a preview and the viewer's unread count."""
+
+    serializer_class = InboxSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InboxPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        return RoomState.objects.filter(Q(user_one=user) | Q(user_two=user)).select_related(
+            "last_message"
+        )
+
+    def get_rows_context(self, rows) -> dict:
+        # Each row is its own room's state, so previews need no extra query.
+        return {"room_states": {row.room_id: row for row in rows}}
+
+
+class MessageListCreateView(FastListMixin, generics.ListCreateAPIView):
+    """Room history newest first, paged with ``before``/``after`` message ids."""
+
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AnchorPagination
 
     def get_queryset(self):
+        return self._get_room().messages.all()
+
+    def get_compiled_serializer(self):
         room = self._get_room()
-        return room.messages.select_related("sender")
+        context = {
+            **self.get_serializer_context(),
+            "room_states": {state.room_id: state for state in RoomState.objects.filter(room=room)},
+        }
+        return compile_serializer(self.get_serializer_class(), context=context)
 
     def perform_create(self, serializer):
         room = self._get_room()
         sender = self.request.user
-        serializer.save(room=room, sender=sender)
-        partner = room.user_one if room.user_two == sender else room.user_two
-        push_notification(partner, "message", {"room_id": room.id, "sender_id": sender.id})
+        with transaction.atomic():
+            message = serializer.save(room=room, sender=sender)
+            RoomState.record_message(message)
+            push_notification(
+                room.partner_id(sender.id), "message", {"room_id": room.id, "sender_id": sender.id}
+            )
 
     def _get_room(self):
-        room = get_object_or_404(ChatRoom, pk=self.kwargs["room_id"])
-        user = self.request.user
-        if user not in {room.user_one, room.user_two}:
-            raise PermissionDenied("You are not allowed to access this chat room.")
-        MutualMatch.get_or_create_mutual(room.user_one, room.user_two)
-        return room
+        if not hasattr(self, "_room"):
+            self._room = member_room(self.request.user, self.kwargs["room_id"])
+        return self._room
+
+
+class MarkReadView(APIView):
+    """Move the viewer's read watermark with one write and send the partner a receipt."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, room_id, *args, **kwargs):
+        room = member_room(request.user, room_id)
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        state, moved = RoomState.mark_read(
+            room, request.user.id, serializer.validated_data.get("message_id")
+        )
+        watermark = state.last_read_by(request.user.id)
+        if moved:
+            transaction.on_commit(lambda: send_read_receipt(room.id, request.user.id, watermark))
+        return Response(
+            {
+                "room": room.id,
+                "last_read_message_id": watermark,
+                "unread_count": state.unread_for(request.user.id),
+            }
+        )
+
+
+def member_room(user, room_id: int) -> ChatRoom:
+    """The room, if ``user`` is in it and still matched with their partner."""
+    room_access = access.room_access(room_id)
+    if room_access is None:
+        raise Http404("No ChatRoom matches the given query.")
+    if not room_access.allows(user.id):
+        raise PermissionDenied("You are not allowed to access this chat room.")
+    return room_access.room
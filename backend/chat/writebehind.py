@@ -0,0 +1,185 @@
+"""Write-behind persistence for chat messages sent over WebSockets.
+
+With ``CHAT_WRITE_BEHIND`` on, ``ChatConsumer`` gives each message an id from
+the event loop's ``MessageBuffer`` as it arrives, broadcasts it straight away
+and hands it to the buffer.  The buffer writes messages, room state and
+queued notifications in one transaction with ``bulk_create`` once it holds
+``CHAT_WRITE_BEHIND_BATCH`` messages or ``CHAT_WRITE_BEHIND_DELAY_MS`` after
+the first one arrives.  A message is durable once the ``flush`` that took it
+returns.  A flush that fails, say because the database is unreachable, puts
+its batch back and retries, so broadcast messages are not lost while the
+process lives.  Only a message the database rejects outright (its room was
+deleted meanwhile) is logged and dropped, so it cannot hold up the others.
+
+Ids are reserved from the table's sequence ``CHAT_WRITE_BEHIND_ID_BLOCK`` at a
+time, and the next block is reserved in the background once a quarter of
+the current one is left, so sending a message does not wait on the
+database.  Ids therefore follow send order only within a process; the inbox
+preview and read watermarks order messages by send time instead (see
+``RoomState``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from collections import deque
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, transaction
+
+from notifications.utils import push_notifications
+
+from .models import Message, RoomState
+
+logger = logging.getLogger(__name__)
+
+
+def reserve_message_ids(count: int) -> list[int]:
+    """Take ``count`` ids from the message table's sequence."""
+    table = Message._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [table, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s RETURNING seq",
+                [count, table],
+            )
+            row = cursor.fetchone()
+            if row is None:
+                # No row is inserted until the table's first AUTOINCREMENT insert.
+                cursor.execute(f'SELECT COALESCE(MAX("id"), 0) + %s FROM "{table}"', [count])
+                row = cursor.fetchone()
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, row[0]]
+                )
+            return list(range(row[0] - count + 1, row[0] + 1))
+    raise ImproperlyConfigured(
+        f"CHAT_WRITE_BEHIND needs PostgreSQL or SQLite, not {connection.vendor}."
+    )
+
+
+def persist(messages: list[Message]) -> None:
+    """Write a batch of messages and their room state, and queue partner notifications."""
+    with transaction.atomic():
+        Message.objects.bulk_create(messages)
+        RoomState.record_messages(messages)
+        push_notifications(
+            (
+                message.room.partner_id(message.sender_id),
+                "message",
+                {"room_id": message.room_id, "sender_id": message.sender_id},
+            )
+            for message in messages
+        )
+
+
+def persist_each(messages: list[Message]) -> list[Message]:
+    """Persist messages one by one, dropping those the database rejects.
+
+    Returns the messages left unsaved by any other error, to be retried.
+    """
+    for index, message in enumerate(messages):
+        try:
+            persist([message])
+        except IntegrityError:
+            logger.exception(
+                "Dropping chat message %s for room %s", message.id, message.room_id
+            )
+        except Exception:
+            logger.exception("Could not persist chat message %s", message.id)
+            return messages[index:]
+    return []
+
+
+class MessageBuffer:
+    def __init__(self, batch_size: int, delay: float, id_block: int) -> None:
+        self.batch_size = batch_size
+        self.delay = delay
+        self.id_block = id_block
+        self.pending: list[Message] = []
+        self._ids: deque[int] = deque()
+        self._reserving: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def next_id(self) -> int:
+        """An unused message id; only waits on the database when the block ran out."""
+        while True:
+            if len(self._ids) <= self.id_block // 4 and self._reserving is None:
+                self._reserving = asyncio.get_running_loop().create_task(self._reserve())
+                self._reserving.add_done_callback(self._reserved)
+            if self._ids:
+                return self._ids.popleft()
+            await asyncio.shield(self._reserving)
+
+    async def _reserve(self) -> None:
+        self._ids.extend(await database_sync_to_async(reserve_message_ids)(self.id_block))
+
+    def _reserved(self, task: asyncio.Task) -> None:
+        self._reserving = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Could not reserve chat message ids", exc_info=task.exception())
+
+    async def add(self, message: Message) -> None:
+        self.pending.append(message)
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.delay, self._flush_later)
+
+    def _flush_later(self) -> None:
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Persist everything buffered so far; durable once this returns."""
+        async with self._flush_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            try:
+                await database_sync_to_async(persist)(batch)
+                return
+            except IntegrityError:
+                # One rejected row fails the whole batch; save the rest without it.
+                batch = await database_sync_to_async(persist_each)(batch)
+            except Exception:
+                logger.exception("Could not persist %d chat messages; retrying", len(batch))
+            if batch:
+                self.pending[:0] = batch
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(
+                        max(self.delay, 1.0), self._flush_later
+                    )
+
+
+_buffers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MessageBuffer] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_buffer() -> MessageBuffer:
+    """The running event loop's buffer, shared by all of its consumers."""
+    loop = asyncio.get_running_loop()
+    buffer = _buffers.get(loop)
+    if buffer is None:
+        buffer = _buffers[loop] = MessageBuffer(
+            batch_size=settings.CHAT_WRITE_BEHIND_BATCH,
+            delay=settings.CHAT_WRITE_BEHIND_DELAY_MS / 1000,
+            id_block=settings.CHAT_WRITE_BEHIND_ID_BLOCK,
+        )
+    return buffer
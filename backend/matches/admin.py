@@ -2,24 +2,35 @@
 
 from django.contrib import admin
 
+from . import exclusions
+from .generations import bump_user
 from .models import MatchAction, MutualMatch
 
 
+def _update_status(queryset, status):
+    # Bulk updates skip post_save, so invalidate cached suggestion state by hand.
+    pairs = list(queryset.values_list("initiator_id", "target_id"))
+    queryset.update(status=status)
+    user_ids = {user_id for pair in pairs for user_id in pair}
+    exclusions.forget(*user_ids)
+    bump_user(*user_ids)
+
+
 # ---------- Custom actions for MatchAction ----------
 
 @admin.action(description="Mark selected actions as LIKED")
 def mark_as_liked(modeladmin, request, queryset):
-    queryset.update(status="liked")
+    _update_status(queryset, "liked")
 
 
 @admin.action(description="Mark selected actions as REJECTED")
 def mark_as_rejected(modeladmin, request, queryset):
-    queryset.update(status="rejected")
+    _update_status(queryset, "rejected")
 
 
 @admin.action(description="Mark selected actions as BLOCKED")
 def mark_as_blocked(modeladmin, request, queryset):
-    queryset.update(status="blocked")
+    _update_status(queryset, "blocked")
 
 
 @admin.register(MatchAction)
@@ -0,0 +1,176 @@
+"""Per-user suggestion decks.
+
+A deck is a ranked snapshot of candidate user ids, taken from the nightly
+batch when one applies and from ``rank_candidates`` otherwise, stored in the
+cache as packed ``int64`` arrays.  Pages are served from it with an opaque
+cursor, candidates the user acts on are popped, and the deck is re-ranked live
+only when it runs low or when profiles have changed and the snapshot is older
+than ``SUGGESTION_DECK_MAX_STALENESS``.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import secrets
+import time
+from array import array
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import force_bytes
+from rest_framework.exceptions import NotFound
+
+from .generations import global_generation
+from .suggestions import PRESENTATION_PARAMS, suggested_user_ids
+
+DECK_KEY = "suggestion_deck:{}"
+
+
+def _setting(name: str, default: int) -> int:
+    return getattr(settings, name, default)
+
+
+def filters_key(user, params) -> str:
+    """Fingerprint of what shapes the ranking: the viewer's profile and query params.
+
+    Presentation params (cursor, fields) are excluded, and so are match
+    actions; those pop from the deck.
+    """
+    raw = f"{user.profile.updated_at.isoformat()}:" + str(
+        sorted((key, params.getlist(key)) for key in params if key not in PRESENTATION_PARAMS)
+    )
+    return md5(force_bytes(raw)).hexdigest()
+
+
+def _pack(ids) -> bytes:
+    return array("q", ids).tobytes()
+
+
+def _unpack(raw: bytes) -> array:
+    ids = array("q")
+    ids.frombytes(raw)
+    return ids
+
+
+class SuggestionDeck:
+    def __init__(
+        self,
+        token: str,
+        filters: str,
+        ids,
+        popped=(),
+        truncated: bool = False,
+        generation: int = 0,
+        built_at: float = 0.0,
+    ):
+        self.token = token
+        self.filters = filters
+        self.ids = array("q", ids)
+        self.popped = set(popped)
+        self.truncated = truncated
+        self.generation = generation
+        self.built_at = built_at
+
+    @classmethod
+    def build(
+        cls, user, params, skip: set[int] | None = None, use_batch: bool = True
+    ) -> "SuggestionDeck":
+        skip = skip or set()
+        generation = global_generation()
+        ranked = [
+            uid for uid in suggested_user_ids(user, params, use_batch) if uid not in skip
+        ]
+        size = _setting("SUGGESTION_DECK_SIZE", 500)
+        return cls(
+            secrets.token_hex(4),
+            filters_key(user, params),
+            ranked[:size],
+            truncated=len(ranked) > size,
+            generation=generation,
+            built_at=time.time(),
+        )
+
+    @classmethod
+    def load(cls, user_id: int) -> "SuggestionDeck | None":
+        state = cache.get(DECK_KEY.format(user_id))
+        if state is None:
+            return None
+        return cls(
+            state["token"],
+            state["filters"],
+            _unpack(state["ids"]),
+            _unpack(state["popped"]),
+            state["truncated"],
+            state["generation"],
+            state["built_at"],
+        )
+
+    def save(self, user_id: int) -> None:
+        cache.set(
+            DECK_KEY.format(user_id),
+            {
+                "token": self.token,
+                "filters": self.filters,
+                "ids": _pack(self.ids),
+                "popped": _pack(sorted(self.popped)),
+                "truncated": self.truncated,
+                "generation": self.generation,
+                "built_at": self.built_at,
+            },
+            _setting("SUGGESTION_DECK_TTL", 3600),
+        )
+
+    def encode_cursor(self, position: int) -> str:
+        return base64.urlsafe_b64encode(f"{self.token}:{position}".encode()).decode()
+
+    def decode_cursor(self, cursor: str | None) -> int:
+        """Return the deck position for ``cursor``; cursors from an older deck restart at 0."""
+        if not cursor:
+            return 0
+        try:
+            token, position = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+            position = int(position)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound("Invalid cursor.")
+        if token != self.token or position < 0:
+            return 0
+        return position
+
+    def page(self, position: int, size: int) -> tuple[list[int], int]:
+        """Return up to ``size`` unpopped ids from ``position`` and the next position."""
+        ids: list[int] = []
+        while position < len(self.ids) and len(ids) < size:
+            candidate = self.ids[position]
+            position += 1
+            if candidate not in self.popped:
+                ids.append(candidate)
+        return ids, position
+
+    def remaining(self, position: int) -> int:
+        return sum(1 for candidate in self.ids[position:] if candidate not in self.popped)
+
+    def needs_refill(self, position: int) -> bool:
+        return self.truncated and self.remaining(position) < _setting(
+            "SUGGESTION_DECK_REFILL_AT", 40
+        )
+
+    def is_outdated(self) -> bool:
+        age = time.time() - self.built_at
+        return self.generation != global_generation() and age >= _setting(
+            "SUGGESTION_DECK_MAX_STALENESS", 60
+        )
+
+    def refill(self, user, params, position: int) -> "SuggestionDeck":
+        """Re-rank live, keeping everything not yet served or popped; the new deck starts at 0."""
+        served = set(self.ids[:position]) | self.popped
+        return SuggestionDeck.build(user, params, skip=served, use_batch=False)
+
+
+def pop_candidate(user_id: int, candidate_id: int) -> None:
+    """Drop ``candidate_id`` from ``user_id``'s deck after the user acted on it."""
+    deck = SuggestionDeck.load(user_id)
+    if deck is None or candidate_id in deck.popped or candidate_id not in deck.ids:
+        return
+    deck.popped.add(candidate_id)
+    deck.save(user_id)
@@ -0,0 +1,75 @@
+"""Cached per-user exclusion sets for suggestions.
+
+Each user's excluded candidates (everyone they rejected or blocked and everyone
+who blocked them) are kept in the cache as a sorted, packed ``array('q')``, so
+building suggestions never re-reads the user's action history or ships it to
+the database as a ``NOT IN``.
+
+Arrays are keyed by a per-user version.  ``MatchAction`` writes bump the
+version instead of patching the array, which is a single atomic ``incr`` on
+a shared cache: two concurrent actions cannot lose each other's update, and
+an array loaded from the database just before a write lands under the old
+version, where nothing reads it again.  Every worker sees the bump only with
+a shared ``CACHE_BACKEND``; otherwise ``EXCLUSION_CACHE_TTL`` stays short.
+"""
+from __future__ import annotations
+
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .generations import bump
+from .models import MatchAction
+
+VERSION_KEY = "exclusions:version:{}"
+EXCLUSION_KEY = "exclusions:{}:{}"
+NEGATIVE_STATUSES = ("rejected", "blocked")
+
+
+def _load_from_db(user_id: int) -> array:
+    excluded = set(
+        MatchAction.objects.filter(
+            initiator_id=user_id, status__in=NEGATIVE_STATUSES
+        ).values_list("target_id", flat=True)
+    )
+    excluded.update(
+        MatchAction.objects.filter(target_id=user_id, status="blocked").values_list(
+            "initiator_id", flat=True
+        )
+    )
+    return array("q", sorted(excluded))
+
+
+def excluded_ids(user_id: int) -> np.ndarray:
+    """Sorted ``int64`` array of user ids never to suggest to ``user_id``."""
+    # Read the version before the database, so a write in between bumps past it.
+    key = EXCLUSION_KEY.format(user_id, cache.get(VERSION_KEY.format(user_id), 0))
+    raw = cache.get(key)
+    if raw is None:
+        raw = _load_from_db(user_id).tobytes()
+        cache.set(key, raw, getattr(settings, "EXCLUSION_CACHE_TTL", 86400))
+    return np.frombuffer(raw, dtype=np.int64)
+
+
+def forget(*user_ids: int) -> None:
+    for user_id in user_ids:
+        bump(VERSION_KEY.format(user_id))
+
+
+def record_action(initiator_id: int, target_id: int, status: str, created: bool) -> None:
+    """Invalidate the cached sets a saved ``MatchAction`` can change."""
+    if status == "rejected":
+        forget(initiator_id)
+    elif status == "blocked" or not created:
+        # A block excludes both ways; an updated action may have lifted one.
+        forget(initiator_id, target_id)
+
+
+def exclude(user_id: int, candidate_ids: np.ndarray) -> np.ndarray:
+    """Boolean mask over ``candidate_ids`` that keeps allowed candidates."""
+    mask = ~np.isin(candidate_ids, excluded_ids(user_id))
+    mask &= candidate_ids != user_id
+    return mask
+
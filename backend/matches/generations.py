@@ -0,0 +1,54 @@
+"""Generation counters that version the suggestion cache.
+
+Cached suggestion pages embed the global and per-user generation in their key,
+so bumping a counter makes every dependent entry unreachable at once and the
+entries themselves can live for a long TTL.  The global generation moves when
+any profile changes; a user's generation moves when their own actions or
+preferences change.
+
+The counters are only authoritative when every worker reads the same cache;
+with the per-process default, ``SUGGESTION_CACHE_TTL`` stays short instead.
+"""
+from __future__ import annotations
+
+from hashlib import md5
+
+from django.core.cache import cache
+from django.utils.encoding import force_bytes
+
+GLOBAL_KEY = "suggestions:generation"
+USER_KEY = "suggestions:generation:{}"
+
+
+def bump(key: str) -> None:
+    """Move the counter at ``key`` on by one, starting it at 1 if it is missing."""
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:  # pragma: no cover - evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def bump_global() -> None:
+    bump(GLOBAL_KEY)
+
+
+def bump_user(*user_ids: int) -> None:
+    for user_id in user_ids:
+        bump(USER_KEY.format(user_id))
+
+
+def global_generation() -> int:
+    return cache.get(GLOBAL_KEY, 0)
+
+
+def suggestion_cache_key(user_id: int, params, paged: bool = False) -> str:
+    user_key = USER_KEY.format(user_id)
+    generations = cache.get_many([GLOBAL_KEY, user_key])
+    raw = (
+        f"suggestions:{user_id}:{int(paged)}:{generations.get(GLOBAL_KEY, 0)}:"
+        f"{generations.get(user_key, 0)}:"
+        + str(sorted((key, params.getlist(key)) for key in params))
+    )
+    return md5(force_bytes(raw)).hexdigest()
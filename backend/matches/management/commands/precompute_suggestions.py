@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from array import array
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.http import QueryDict
+from django.utils import timezone
+
+from matches.models import SuggestionBatch
+from matches.suggestions import rank_candidates
+from profiles.candidate_pools import get_candidate_pools
+from profiles.interest_index import get_interest_index
+
+User = get_user_model()
+
+
+def _rank_shard(task: tuple[list[int], int]) -> list[tuple[int, bytes, int]]:
+    user_ids, top_n = task
+    params = QueryDict()
+    results = []
+    for user in User.objects.filter(id__in=user_ids).select_related("profile"):
+        ranked = rank_candidates(user, params)[:top_n]
+        results.append((user.id, array("q", ranked).tobytes(), len(ranked)))
+    return results
+
+
+class Command(BaseCommand):
+    help = "Precompute the top-N suggestions for every active user (run off-peak)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top", type=int, default=getattr(settings, "SUGGESTION_DECK_SIZE", 500)
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--shard-size", type=int, default=200)
+        parser.add_argument(
+            "--active-days",
+            type=int,
+            default=0,
+            help="Only users who logged in within this many days (default 0: everyone).",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, profile__isnull=False)
+        if options["active_days"]:
+            users = users.filter(
+                last_login__gte=timezone.now() - timedelta(days=options["active_days"])
+            )
+        user_ids = list(users.order_by("id").values_list("id", flat=True))
+        shard_size = options["shard_size"]
+        tasks = [
+            (user_ids[start : start + shard_size], options["top"])
+            for start in range(0, len(user_ids), shard_size)
+        ]
+        computed_at = timezone.now()
+
+        # Build the in-memory indexes once so forked workers share them, and
+        # drop DB connections so every worker opens its own.
+        get_candidate_pools()
+        get_interest_index()
+        connections.close_all()
+
+        written = 0
+        if options["workers"] > 1 and len(tasks) > 1:
+            context = multiprocessing.get_context(
+                "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+            )
+            with context.Pool(processes=options["workers"], initializer=django.setup) as pool:
+                for results in pool.imap_unordered(_rank_shard, tasks):
+                    written += self._store(results, computed_at)
+        else:
+            for task in tasks:
+                written += self._store(_rank_shard(task), computed_at)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored suggestion batches for {written} users.")
+        )
+
+    def _store(self, results, computed_at) -> int:
+        SuggestionBatch.objects.bulk_create(
+            [
+                SuggestionBatch(
+                    user_id=user_id, candidate_ids=packed, size=size, computed_at=computed_at
+                )
+                for user_id, packed, size in results
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["candidate_ids", "size", "computed_at"],
+        )
+        return len(results)
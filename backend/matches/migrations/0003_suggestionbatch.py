@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0002_rename_matches_ma_initia_0a03b9_idx_matches_mat_initiat_10a6e0_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='mutualmatch',
+            options={'ordering': ('-created_at', 'id')},
+        ),
+        migrations.CreateModel(
+            name='SuggestionBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidate_ids', models.BinaryField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='suggestion_batch', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['computed_at'], name='matches_sug_compute_b142ff_idx')],
+            },
+        ),
+    ]
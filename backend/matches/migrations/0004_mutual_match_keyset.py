@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0003_suggestionbatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='mutualmatch',
+            options={'ordering': ('-created_at', '-id')},
+        ),
+        migrations.AddIndex(
+            model_name='mutualmatch',
+            index=models.Index(fields=['user_one', '-created_at', '-id'], name='match_user_one_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='mutualmatch',
+            index=models.Index(fields=['user_two', '-created_at', '-id'], name='match_user_two_recent'),
+        ),
+    ]
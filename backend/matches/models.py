@@ -37,7 +37,7 @@ class MutualMatchQuerySet(models.QuerySet):
     def involving(self, user: User):
         return (
             self.filter(models.Q(user_one=user) | models.Q(user_two=user))
-            .order_by("-created_at", "id")
+            .order_by("-created_at", "-id")
         )
 
 
@@ -53,7 +53,7 @@ class MutualMatch(models.Model):
     objects = MutualMatchQuerySet.as_manager()
 
     class Meta:
-        ordering = ("-created_at", "id")
+        ordering = ("-created_at", "-id")
         constraints = [
             models.UniqueConstraint(
                 fields=["user_one", "user_two"], name="unique_user_pair"
@@ -61,6 +61,9 @@ class MutualMatch(models.Model):
         ]
         indexes = [
             models.Index(fields=["user_one", "user_two"]),
+            # Keyset pages of ``involving(user)``: one range scan per side of the OR.
+            models.Index(fields=["user_one", "-created_at", "-id"], name="match_user_one_recent"),
+            models.Index(fields=["user_two", "-created_at", "-id"], name="match_user_two_recent"),
         ]
 
     def __str__(self) -> str:  # pragma: no cover
@@ -72,3 +75,21 @@ class MutualMatch(models.Model):
             user_a, user_b = user_b, user_a
         match, created = cls.objects.get_or_create(user_one=user_a, user_two=user_b)
         return match, created
+
+
+class SuggestionBatch(models.Model):
+    """Top suggestions precomputed offline by ``precompute_suggestions``."""
+
+    user = models.OneToOneField(
+        User, related_name="suggestion_batch", on_delete=models.CASCADE
+    )
+    # Ranked candidate user ids packed as native int64 (array("q").tobytes()).
+    candidate_ids = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["computed_at"])]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"SuggestionBatch({self.user}, {self.size})"
@@ -0,0 +1,138 @@
+"""Weighted, vectorized scoring of suggestion candidates.
+
+Each signal is a function that receives a ``ScoringContext`` and returns one
+float per candidate, normalized to ``[0, 1]``.  The score is the weighted sum
+of the signals named in ``SUGGESTION_SCORE_WEIGHTS``; signals with a zero
+weight are not computed.  Everything works on the column arrays produced by
+the candidate pools, so scoring is a handful of NumPy passes whatever the
+candidate count, and adding a signal means registering one more function:
+
+    @signal("verified")
+    def verified(context):
+        return context.columns.is_verified.astype(float)
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from profiles.candidate_pools import Candidate
+from profiles.interest_index import get_interest_index
+from profiles.models import normalize_name
+
+DEFAULT_WEIGHTS = {
+    "shared_interests": 1.0,
+    "age_fit": 0.3,
+    "education": 0.2,
+    "profession": 0.1,
+    "recency": 0.2,
+    "photos": 0.1,
+}
+DAYS_PER_YEAR = 365.25
+# Photos beyond this count add nothing more to the score.
+PHOTO_TARGET = 3
+
+
+@dataclass
+class ScoringContext:
+    profile: object
+    interest_ids: list[int]
+    columns: Candidate
+
+    @property
+    def size(self) -> int:
+        return len(self.columns.profile_id)
+
+
+Signal = Callable[[ScoringContext], np.ndarray]
+SIGNALS: dict[str, Signal] = {}
+
+
+def signal(name: str) -> Callable[[Signal], Signal]:
+    def register(func: Signal) -> Signal:
+        SIGNALS[name] = func
+        return func
+
+    return register
+
+
+@signal("shared_interests")
+def shared_interests(context: ScoringContext) -> np.ndarray:
+    """Fraction of the viewer's interests the candidate shares."""
+    if not context.interest_ids:
+        return np.zeros(context.size)
+    shared = get_interest_index().shared_counts(context.interest_ids, context.columns.profile_id)
+    return shared / len(context.interest_ids)
+
+
+@signal("age_fit")
+def age_fit(context: ScoringContext) -> np.ndarray:
+    """1 at the midpoint of the viewer's preferred age range, 0 at its edges and beyond."""
+    profile = context.profile
+    low, high = profile.preferred_age_min, profile.preferred_age_max
+    midpoint = (low + high) / 2
+    half_width = max((high - low) / 2, 1.0)
+    dobs = context.columns.dob
+    ages = (date.today().toordinal() - dobs) / DAYS_PER_YEAR
+    fit = np.clip(1 - np.abs(ages - midpoint) / half_width, 0.0, 1.0)
+    return np.where(dobs > 0, fit, 0.0)
+
+
+def _same_text(values: np.ndarray, viewer_value: str) -> np.ndarray:
+    viewer_value = normalize_name(viewer_value)
+    if not viewer_value:
+        return np.zeros(len(values))
+    return (values == viewer_value).astype(float)
+
+
+@signal("education")
+def education(context: ScoringContext) -> np.ndarray:
+    return _same_text(context.columns.education, context.profile.education)
+
+
+@signal("profession")
+def profession(context: ScoringContext) -> np.ndarray:
+    return _same_text(context.columns.profession, context.profile.profession)
+
+
+@signal("recency")
+def recency(context: ScoringContext) -> np.ndarray:
+    """Halves every ``SUGGESTION_RECENCY_HALF_LIFE_DAYS`` since the profile was updated."""
+    half_life = getattr(settings, "SUGGESTION_RECENCY_HALF_LIFE_DAYS", 30) * 86400
+    idle = np.maximum(time.time() - context.columns.updated_at, 0.0)
+    return np.exp2(-idle / half_life)
+
+
+@signal("photos")
+def photos(context: ScoringContext) -> np.ndarray:
+    return np.minimum(context.columns.photo_count, PHOTO_TARGET) / PHOTO_TARGET
+
+
+def weights() -> dict[str, float]:
+    configured = getattr(settings, "SUGGESTION_SCORE_WEIGHTS", None) or DEFAULT_WEIGHTS
+    unknown = set(configured) - set(SIGNALS)
+    if unknown:
+        raise ImproperlyConfigured(
+            f"SUGGESTION_SCORE_WEIGHTS names unknown signals: {', '.join(sorted(unknown))}"
+        )
+    return {name: float(weight) for name, weight in configured.items() if weight}
+
+
+def score(profile, interest_ids: list[int], columns: Candidate) -> np.ndarray:
+    """Weighted score for every candidate in ``columns`` (one array per field)."""
+    context = ScoringContext(profile, interest_ids, columns)
+    total = np.zeros(context.size)
+    for name, weight in weights().items():
+        total += weight * SIGNALS[name](context)
+    return total
+
+
+def rank(profile, interest_ids: list[int], columns: Candidate) -> np.ndarray:
+    """Candidate positions ordered best first; recently updated profiles win ties."""
+    return np.lexsort((-columns.updated_at, -score(profile, interest_ids, columns)))
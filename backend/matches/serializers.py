@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from functools import cached_property
+
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from profiles.serializers import ProfileSerializer
+from profiles.serializers import profile_serializer_class
+from vivahvows.fastpath import compile_serializer
 
 from .models import MatchAction, MutualMatch
 
@@ -31,5 +34,17 @@ class MutualMatchSerializer(serializers.ModelSerializer):
 
     def get_partner_profile(self, obj: MutualMatch):
         request_user = self.context["request"].user
-        partner = obj.user_one if obj.user_two == request_user else obj.user_two
-        return ProfileSerializer(partner.profile, context=self.context).data
+        partner_id = obj.user_one_id if obj.user_two_id == request_user.id else obj.user_two_id
+        # The list view bulk-loads a page's partner profiles into the context.
+        profiles = self.context.get("partner_profiles")
+        if profiles is not None:
+            profile = profiles.get(partner_id)
+        else:
+            partner = obj.user_one if partner_id == obj.user_one_id else obj.user_two
+            profile = partner.profile
+        return None if profile is None else self.partner_serializer(profile)
+
+    @cached_property
+    def partner_serializer(self):
+        serializer_class = profile_serializer_class(self.context.get("request"))
+        return compile_serializer(serializer_class, context=self.context)
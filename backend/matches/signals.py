@@ -1 +1,37 @@
 """Signals for match related notifications."""
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from profiles.models import Profile, ProfilePhoto
+
+from . import exclusions
+from .generations import bump_global
+from .models import MatchAction
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(m2m_changed, sender=Profile.interests.through)
+@receiver(post_save, sender=ProfilePhoto)
+@receiver(post_delete, sender=ProfilePhoto)
+def invalidate_suggestion_cache(sender, **kwargs) -> None:
+    if kwargs.get("action", "post_").startswith("pre_"):
+        return
+    transaction.on_commit(bump_global)
+
+
+@receiver(post_save, sender=MatchAction)
+def record_exclusion(sender, instance: MatchAction, created: bool, **kwargs) -> None:
+    initiator_id, target_id, status = instance.initiator_id, instance.target_id, instance.status
+    transaction.on_commit(
+        lambda: exclusions.record_action(initiator_id, target_id, status, created)
+    )
+
+
+@receiver(post_delete, sender=MatchAction)
+def forget_exclusion(sender, instance: MatchAction, **kwargs) -> None:
+    initiator_id, target_id = instance.initiator_id, instance.target_id
+    transaction.on_commit(lambda: exclusions.forget(initiator_id, target_id))
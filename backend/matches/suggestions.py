@@ -0,0 +1,141 @@
+"""Candidate selection and ranking for match suggestions."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from profiles.candidate_pools import (
+    Candidate,
+    birthdate_bounds,
+    get_candidate_pools,
+    reference_filter,
+)
+from profiles.geo import nearby_city_ids, parse_radius
+from profiles.models import City, Profile, Religion
+
+from . import scoring
+from .exclusions import exclude
+from .models import SuggestionBatch
+
+_CONFLICT = object()
+# Query params that shape the response but not the ranking.
+PRESENTATION_PARAMS = frozenset({"cursor", "fields"})
+
+
+def _combine_filters(*values):
+    """Collapse stacked equality filters into one value.
+
+    Returns ``None`` when nothing filters, and ``_CONFLICT`` when two filters
+    can never both match (e.g. preferred city Pune but ``?city=Delhi``).
+    """
+    wanted = {value for value in values if value}
+    if not wanted:
+        return None
+    if len(wanted) > 1:
+        return _CONFLICT
+    return wanted.pop()
+
+
+def _reciprocal(params) -> bool:
+    value = params.get("reciprocal")
+    if value is None:
+        return getattr(settings, "SUGGESTION_RECIPROCAL_DEFAULT", False)
+    return value.lower() in {"1", "true", "yes", "on"}
+
+
+def accepts_viewer(profile, columns: Candidate) -> np.ndarray:
+    """Mask of candidates whose own preferences admit ``profile``.
+
+    ``columns`` holds one array per ``Candidate`` field, so every constraint is
+    a single vectorized comparison.  A blank preference admits anyone; a set
+    preference never admits a viewer who left that attribute blank.  The age
+    range is skipped when the viewer has no date of birth.
+    """
+    accept = np.ones(len(columns.profile_id), dtype=bool)
+    for preferred, value, blank in (
+        (columns.preferred_gender, profile.gender, ""),
+        (columns.preferred_city, profile.city_ref_id, 0),
+        (columns.preferred_religion, profile.religion_ref_id, 0),
+    ):
+        accept &= (preferred == blank) | ((preferred == value) if value else False)
+    age = profile.age
+    if age is not None:
+        accept &= (columns.preferred_age_min <= age) & (age <= columns.preferred_age_max)
+    return accept
+
+
+def rank_candidates(user, params) -> list[int]:
+    """Return the user ids of every suggestion for ``user``, best first."""
+    profile = user.profile
+    interest_ids = list(profile.interests.values_list("id", flat=True))
+
+    gender = _combine_filters(profile.preferred_gender, params.get("gender"))
+    requested_city = reference_filter(City, params.get("city"))
+    radius_km = parse_radius(params.get("radius_km"))
+    if radius_km is None:
+        city = _combine_filters(profile.preferred_city_ref_id, requested_city)
+    else:
+        # A radius replaces exact city matching: it is centred on the requested
+        # city, else the preferred one, else the viewer's own.
+        center = requested_city or profile.preferred_city_ref_id or profile.city_ref_id
+        city = nearby_city_ids(center, radius_km) if center else None
+    religion = _combine_filters(
+        profile.preferred_religion_ref_id, reference_filter(Religion, params.get("religion"))
+    )
+    if _CONFLICT in (gender, city, religion):
+        return []
+    min_dob, max_dob = birthdate_bounds(
+        params.get("age_min", profile.preferred_age_min),
+        params.get("age_max", profile.preferred_age_max),
+    )
+    candidates = get_candidate_pools().select(
+        gender=gender, city=city, religion=religion, min_dob=min_dob, max_dob=max_dob
+    )
+    if not candidates:
+        return []
+    columns = Candidate(*(np.asarray(column) for column in zip(*candidates)))
+
+    keep = exclude(user.id, columns.user_id)
+    if _reciprocal(params):
+        keep &= accepts_viewer(profile, columns)
+    query_interests = params.getlist("interests")
+    if query_interests:
+        tagged = np.fromiter(
+            Profile.interests.through.objects.filter(interest_id__in=query_interests)
+            .values_list("profile_id", flat=True)
+            .distinct(),
+            dtype=np.int64,
+        )
+        keep &= np.isin(columns.profile_id, tagged)
+    columns = Candidate(*(column[keep] for column in columns))
+    return columns.user_id[scoring.rank(profile, interest_ids, columns)].tolist()
+
+
+def batched_user_ids(user, params) -> list[int] | None:
+    """Serve the nightly precomputed ranking, or ``None`` when it does not apply.
+
+    Batches rank against the user's saved preferences only, so any ranking
+    query param, a profile edited after the run or an expired batch falls back
+    to the live ranking.  Fresh match actions are applied on top.
+    """
+    if any(key not in PRESENTATION_PARAMS for key in params):
+        return None
+    batch = SuggestionBatch.objects.filter(user=user).first()
+    if batch is None:
+        return None
+    max_age = timedelta(seconds=getattr(settings, "SUGGESTION_BATCH_MAX_AGE", 36 * 3600))
+    if batch.computed_at < user.profile.updated_at or batch.computed_at < timezone.now() - max_age:
+        return None
+    user_ids = np.frombuffer(bytes(batch.candidate_ids), dtype=np.int64)
+    return user_ids[exclude(user.id, user_ids)].tolist()
+
+
+def suggested_user_ids(user, params, use_batch: bool = True) -> list[int]:
+    if use_batch:
+        batched = batched_user_ids(user, params)
+        if batched is not None:
+            return batched
+    return rank_candidates(user, params)
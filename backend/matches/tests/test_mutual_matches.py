@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from matches.models import MutualMatch
+from profiles.models import Interest
+
+
+class MutualMatchListTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("mutual-matches")
+        music = Interest.objects.create(name="Music")
+        now = timezone.now()
+        self.matches = []
+        for index in range(6):
+            partner = User.objects.create_user(username=f"partner{index}", password="pass-12345")
+            partner.profile.name = f"Partner {index}"
+            partner.profile.save()
+            partner.profile.interests.set([music])
+            match, _ = MutualMatch.get_or_create_mutual(self.user, partner)
+            # Pairs share a timestamp so the id tie-break is exercised.
+            match.created_at = now - timedelta(minutes=index // 2)
+            match.save(update_fields=["created_at"])
+            self.matches.append(match)
+
+    def test_keyset_pages_are_newest_first_and_complete(self):
+        seen, url = [], self.url + "?page_size=4"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(match["id"] for match in response.data["results"])
+            url = response.data["next"]
+        expected = sorted(self.matches, key=lambda m: (m.created_at, m.id), reverse=True)
+        self.assertEqual(seen, [match.id for match in expected])
+        self.assertNotIn("count", response.data)
+
+        first = self.client.get(self.url).data["results"][0]
+        self.assertEqual(first["partner_profile"]["name"], "Partner 1")
+        self.assertEqual(len(first["partner_profile"]["interests"]), 1)
+        self.assertEqual(self.client.get(self.url, {"cursor": "bogus"}).status_code, 404)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        counts = []
+        for size in (1, 6):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, {"page_size": size})
+            self.assertEqual(len(response.data["results"]), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
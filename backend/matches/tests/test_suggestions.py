@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+import time
+from array import array
+from datetime import date
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from matches import scoring
+from matches.deck import SuggestionDeck
+from matches.exclusions import excluded_ids
+from matches.models import MatchAction, SuggestionBatch
+from profiles.candidate_pools import (
+    Candidate,
+    CandidatePools,
+    get_candidate_pools,
+    invalidate_candidate_pools,
+)
+from profiles.geo import invalidate_city_grid
+from profiles.interest_index import (
+    InterestIndex,
+    get_interest_index,
+    invalidate_interest_index,
+)
+from profiles.models import Interest, Profile, forget_canonical_ids
+
+
+class SuggestionTestMixin:
+    def setUp(self):
+        cache.clear()
+        invalidate_interest_index()
+        invalidate_candidate_pools()
+        self.addCleanup(invalidate_interest_index)
+        self.addCleanup(invalidate_candidate_pools)
+        self.addCleanup(forget_canonical_ids)
+        self.addCleanup(invalidate_city_grid)
+        self.user = self._make_user("viewer", gender="male", preferred_gender="female")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("match-suggestions")
+
+    def _make_user(self, username: str, **profile_fields):
+        user = get_user_model().objects.create_user(
+            username=username, email=f"{username}@example.com", password="pass-12345"
+        )
+        profile = user.profile
+        profile.name = username.title()
+        profile.dob = date(1995, 6, 15)
+        for attr, value in profile_fields.items():
+            setattr(profile, attr, value)
+        profile.save()
+        return user
+
+
+class MatchSuggestionViewTests(SuggestionTestMixin, APITestCase):
+    def test_ranks_candidates_by_shared_interests(self):
+        music, travel, books = (
+            Interest.objects.create(name=name) for name in ("Music", "Travel", "Books")
+        )
+        self.user.profile.interests.set([music, travel, books])
+        one = self._make_user("one", gender="female")
+        one.profile.interests.set([music])
+        three = self._make_user("three", gender="female")
+        three.profile.interests.set([music, travel, books])
+        self._make_user("none", gender="female")
+        self._make_user("other", gender="male")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        names = [item["name"] for item in response.data]
+        self.assertEqual(names, ["Three", "One", "None"])
+
+    def test_fields_param_serves_profile_cards(self):
+        music, travel = (Interest.objects.create(name=name) for name in ("Music", "Travel"))
+        self.user.profile.interests.set([music, travel])
+        candidate = self._make_user("card", gender="female", city="Pune", bio="Long bio")
+        candidate.profile.interests.set([travel])
+
+        cards = self.client.get(self.url, {"fields": "id,user,name,city,shared_interests"})
+        sparse = self.client.get(self.url, {"fields": "name,bio"})
+
+        self.assertEqual(
+            cards.data,
+            [
+                {
+                    "id": candidate.profile.id,
+                    "user": candidate.id,
+                    "name": "Card",
+                    "city": "Pune",
+                    "shared_interests": [travel.id],
+                }
+            ],
+        )
+        self.assertEqual(sparse.data, [{"name": "Card", "bio": "Long bio"}])
+
+    def test_excludes_rejected_and_blocked_candidates(self):
+        rejected = self._make_user("rejected", gender="female")
+        blocker = self._make_user("blocker", gender="female")
+        self._make_user("visible", gender="female")
+        MatchAction.objects.create(initiator=self.user, target=rejected, status="rejected")
+        MatchAction.objects.create(initiator=blocker, target=self.user, status="blocked")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual([item["name"] for item in response.data], ["Visible"])
+
+    def test_exclusion_set_is_invalidated_when_actions_are_written(self):
+        target = self._make_user("target", gender="female")
+        blocker = self._make_user("blocker", gender="female")
+        self.assertEqual(excluded_ids(self.user.id).tolist(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("reject-profile", args=[target.id]))
+            MatchAction.objects.create(initiator=blocker, target=self.user, status="blocked")
+
+        # Reloaded once after the writes, then served from the cache.
+        self.assertEqual(excluded_ids(self.user.id).tolist(), sorted([target.id, blocker.id]))
+        with self.assertNumQueries(0):
+            excluded = excluded_ids(self.user.id).tolist()
+        self.assertEqual(excluded, sorted([target.id, blocker.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("like-profile", args=[target.id]))
+        self.assertEqual(excluded_ids(self.user.id).tolist(), [blocker.id])
+
+    def test_cached_page_is_invalidated_by_match_actions(self):
+        target = self._make_user("target", gender="female")
+        self._make_user("keeper", gender="female")
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+        self.client.post(reverse("reject-profile", args=[target.id]))
+        response = self.client.get(self.url)
+
+        self.assertEqual([item["name"] for item in response.data], ["Keeper"])
+
+    @override_settings(SUGGESTION_DECK_MAX_STALENESS=0)
+    def test_cached_page_is_invalidated_by_profile_changes(self):
+        self.assertEqual(self.client.get(self.url).data, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._make_user("newcomer", gender="female")
+        response = self.client.get(self.url)
+
+        self.assertEqual([item["name"] for item in response.data], ["Newcomer"])
+
+    def test_reciprocal_mode_drops_candidates_whose_preferences_exclude_viewer(self):
+        self.user.profile.city = "Pune"
+        self.user.profile.save()
+        self._make_user("open", gender="female")
+        self._make_user("wants_male", gender="female", preferred_gender="male")
+        self._make_user("wants_female", gender="female", preferred_gender="female")
+        self._make_user("wants_delhi", gender="female", preferred_city="Delhi")
+        self._make_user("too_young", gender="female", preferred_age_max=25)
+
+        one_sided = self.client.get(self.url)
+        two_sided = self.client.get(self.url, {"reciprocal": "true"})
+
+        self.assertEqual(len(one_sided.data), 5)
+        self.assertEqual(
+            sorted(item["name"] for item in two_sided.data), ["Open", "Wants_Male"]
+        )
+
+    def test_filters_by_segment_and_age_window(self):
+        self.user.profile.preferred_city = "pune"
+        self.user.profile.preferred_age_min = 25
+        self.user.profile.preferred_age_max = 30
+        self.user.profile.save()
+        today = date.today()
+        self._make_user("match", gender="female", city=" Pune ", dob=date(today.year - 27, 1, 1))
+        self._make_user("old", gender="female", city="Pune", dob=date(today.year - 40, 1, 1))
+        self._make_user("far", gender="female", city="Delhi", dob=date(today.year - 27, 1, 1))
+
+        response = self.client.get(self.url)
+        conflicting = self.client.get(self.url, {"city": "Delhi"})
+
+        self.assertEqual([item["name"] for item in response.data], ["Match"])
+        self.assertEqual(conflicting.data, [])
+
+    def test_radius_filter_widens_preferred_city_to_nearby_cities(self):
+        self.user.profile.preferred_city = "Bombay"
+        self.user.profile.save()
+        self._make_user("local", gender="female", city="Mumbai")
+        self._make_user("thane", gender="female", city="Thane")
+        self._make_user("pune", gender="female", city="Pune")
+        self._make_user("delhi", gender="female", city="Delhi")
+        self._make_user("unlocated", gender="female", city="Atlantis")
+
+        exact = self.client.get(self.url)
+        nearby = self.client.get(self.url, {"radius_km": 50})
+        wider = self.client.get(self.url, {"radius_km": 200, "city": "Poona"})
+        invalid = self.client.get(self.url, {"radius_km": "far"})
+
+        self.assertEqual([item["name"] for item in exact.data], ["Local"])
+        self.assertEqual(sorted(item["name"] for item in nearby.data), ["Local", "Thane"])
+        self.assertEqual(sorted(item["name"] for item in wider.data), ["Local", "Pune", "Thane"])
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_profile_saves_are_replayed_into_pools(self):
+        mover = self._make_user("mover", gender="female", city="Delhi")
+        self.assertEqual(len(self.client.get(self.url, {"city": "Pune"}).data), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mover.profile.city = "Pune"
+            mover.profile.save()
+
+        response = self.client.get(self.url, {"city": "pune", "age_min": 18})
+        self.assertEqual([item["name"] for item in response.data], ["Mover"])
+
+
+@override_settings(SUGGESTION_DECK_SIZE=30, SUGGESTION_DECK_REFILL_AT=5)
+class SuggestionDeckTests(SuggestionTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.candidates = [
+            self._make_user(f"cand{index:02d}", gender="female") for index in range(45)
+        ]
+        self.deck_url = reverse("match-suggestion-deck")
+
+    def test_cursor_pages_through_deck_and_refills(self):
+        seen = []
+        cursor = ""
+        for _ in range(3):
+            response = self.client.get(self.deck_url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item["user"] for item in response.data["results"])
+            cursor = response.data["cursor"]
+
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+        final = self.client.get(self.deck_url, {"cursor": cursor})
+        self.assertEqual(final.data["results"], [])
+
+    def test_acted_on_candidates_are_popped(self):
+        first_page = self.client.get(self.deck_url).data["results"]
+        liked = first_page[0]["user"]
+
+        self.client.post(reverse("like-profile", args=[liked]))
+
+        deck = SuggestionDeck.load(self.user.id)
+        self.assertIn(liked, deck.popped)
+        self.assertNotIn(liked, deck.page(0, 20)[0])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.deck_url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_plain_route_is_always_a_list(self):
+        plain = self.client.get(self.url, {"cursor": ""})
+        deck = self.client.get(self.deck_url)
+
+        self.assertIsInstance(plain.data, list)
+        self.assertEqual(
+            [item["user"] for item in plain.data], [item["user"] for item in deck.data["results"]]
+        )
+
+
+class SuggestionBatchTests(SuggestionTestMixin, APITestCase):
+    def test_precomputed_batch_is_served_and_filtered_by_fresh_actions(self):
+        first = self._make_user("first", gender="female")
+        second = self._make_user("second", gender="female")
+        rejected = self._make_user("rejected", gender="female")
+        call_command("precompute_suggestions", workers=1, active_days=0, stdout=StringIO())
+        batch = SuggestionBatch.objects.get(user=self.user)
+        self.assertEqual(batch.size, 3)
+
+        # Reorder the stored ranking so serving from the batch is observable.
+        batch.candidate_ids = array("q", [second.id, rejected.id, first.id]).tobytes()
+        batch.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            MatchAction.objects.create(initiator=self.user, target=rejected, status="rejected")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual([item["name"] for item in response.data], ["Second", "First"])
+
+    def test_default_run_covers_users_who_never_logged_in(self):
+        self._make_user("first", gender="female")
+        self.assertIsNone(self.user.last_login)
+
+        call_command("precompute_suggestions", stdout=StringIO())
+
+        self.assertEqual(SuggestionBatch.objects.get(user=self.user).size, 1)
+
+    def test_ranking_params_bypass_the_batch(self):
+        self._make_user("live", gender="female")
+        SuggestionBatch.objects.create(user=self.user, candidate_ids=b"", size=0)
+
+        self.assertEqual(self.client.get(self.url).data, [])
+        live = self.client.get(self.url, {"age_min": 18})
+        self.assertEqual([item["name"] for item in live.data], ["Live"])
+
+
+class InterestIndexTests(APITestCase):
+    def test_shared_counts_with_incremental_updates(self):
+        index = InterestIndex.from_pairs([1, 2, 3], [(1, 5), (1, 70), (2, 5)], max_interest_id=70)
+
+        self.assertEqual(index.shared_counts([5, 70], [1, 2, 3, 4]).tolist(), [2, 1, 0, 0])
+
+        index.set_interests(4, [70])
+        index.discard(1)
+        self.assertEqual(index.shared_counts([5, 70], [1, 2, 3, 4]).tolist(), [0, 1, 0, 1])
+
+        index.compact()
+        self.assertEqual(index.shared_counts([5, 70], [4, 2, 1]).tolist(), [1, 1, 0])
+
+    def test_file_backed_index_picks_up_edits_made_since_the_build(self):
+        music, chess = Interest.objects.create(name="Music"), Interest.objects.create(name="Chess")
+        profile = get_user_model().objects.create_user(username="reader", password="x").profile
+        profile.interests.set([music])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        call_command("build_interest_index", "--output", directory, stdout=StringIO())
+        self.addCleanup(invalidate_interest_index)
+
+        with override_settings(INTEREST_INDEX_DIR=directory, INTEREST_INDEX_REFRESH_SECONDS=0):
+            profile.interests.set([chess])
+            # A refresh in another process: no local overlay, only the files and the DB.
+            invalidate_interest_index()
+            index = get_interest_index()
+            self.assertEqual(
+                index.shared_counts([music.id, chess.id], [profile.id]).tolist(), [1]
+            )
+            self.assertEqual(index.shared_counts([chess.id], [profile.id]).tolist(), [1])
+
+
+class CandidatePoolsTests(APITestCase):
+    def test_select_uses_dob_window_and_detects_drift(self):
+        rows = [
+            {
+                "id": pid,
+                "user_id": pid + 100,
+                "gender": "female",
+                "city_ref_id": 7,
+                "religion_ref_id": None,
+                "dob": date(1990 + pid, 1, 1),
+                "updated_at": None,
+                "preferred_gender": "",
+                "preferred_city_ref_id": None,
+                "preferred_religion_ref_id": None,
+                "preferred_age_min": 21,
+                "preferred_age_max": 40,
+                "education": "",
+                "profession": "",
+            }
+            for pid in range(1, 6)
+        ]
+        pools = CandidatePools.build(rows)
+
+        selected = pools.select(
+            gender="female", city=7, min_dob=date(1992, 1, 1), max_dob=date(1994, 1, 1)
+        )
+        self.assertEqual([c.profile_id for c in selected], [2, 3, 4])
+        self.assertEqual(pools.verify(rows), [])
+
+        pools.remove(3)
+        self.assertEqual(len(pools.verify(rows)), 1)
+
+    def test_pools_rebuild_once_stale_without_a_shared_change_log(self):
+        invalidate_candidate_pools()
+        self.addCleanup(invalidate_candidate_pools)
+        user = get_user_model().objects.create_user(username="elsewhere", password="pass-12345")
+        get_candidate_pools()
+        # As if another worker saved it: nothing reaches this process's change log.
+        Profile.objects.filter(user=user).update(gender="female")
+        with override_settings(CANDIDATE_POOL_REFRESH_SECONDS=3600):
+            self.assertEqual(get_candidate_pools().select(gender="female"), [])
+        with override_settings(CANDIDATE_POOL_REFRESH_SECONDS=0):
+            selected = get_candidate_pools().select(gender="female")
+        self.assertEqual([c.user_id for c in selected], [user.id])
+
+
+class ScoringTests(APITestCase):
+    def _columns(self, size: int, **overrides) -> Candidate:
+        today = date.today().toordinal()
+        columns = {
+            "profile_id": np.arange(1, size + 1),
+            "user_id": np.arange(101, size + 101),
+            "dob": np.full(size, today - int(30 * 365.25)),
+            "updated_at": np.full(size, time.time()),
+            "preferred_gender": np.full(size, ""),
+            "preferred_city": np.zeros(size, dtype=np.int64),
+            "preferred_religion": np.zeros(size, dtype=np.int64),
+            "preferred_age_min": np.full(size, 21),
+            "preferred_age_max": np.full(size, 40),
+            "education": np.full(size, ""),
+            "profession": np.full(size, ""),
+            "photo_count": np.zeros(size, dtype=np.int64),
+        }
+        columns.update(overrides)
+        return Candidate(**columns)
+
+    def test_weighted_signals_order_candidates(self):
+        viewer = Profile(education="MBA", preferred_age_min=26, preferred_age_max=34)
+        today = date.today().toordinal()
+        columns = self._columns(
+            4,
+            dob=np.array([0, today - int(30 * 365.25), today - int(45 * 365.25), 0]),
+            education=np.array(["", "", "", "mba"]),
+            photo_count=np.array([5, 0, 0, 0]),
+        )
+        weights = {"age_fit": 1.0, "education": 2.0, "photos": 0.5}
+
+        with override_settings(SUGGESTION_SCORE_WEIGHTS=weights):
+            ranked = scoring.rank(viewer, [], columns)
+
+        self.assertEqual(columns.profile_id[ranked].tolist(), [4, 2, 1, 3])
+
+    def test_scores_large_candidate_sets_and_rejects_unknown_signals(self):
+        viewer = Profile(education="MBA", profession="Engineer")
+        columns = self._columns(10_000, photo_count=np.arange(10_000) % 5)
+
+        with override_settings(SUGGESTION_SCORE_WEIGHTS={"missing": 1.0}):
+            with self.assertRaises(ImproperlyConfigured):
+                scoring.score(viewer, [], columns)
+        scores = scoring.score(viewer, [], columns)
+
+        self.assertEqual(scores.shape, (10_000,))
+        self.assertTrue(np.all(np.isfinite(scores)))
@@ -3,6 +3,7 @@ from django.urls import path
 from .views import (
     BlockProfileView,
     LikeProfileView,
+    MatchSuggestionDeckView,
     MatchSuggestionView,
     MutualMatchListView,
     RejectProfileView,
@@ -10,6 +11,7 @@ from .views import (
 
 urlpatterns = [
     path("suggestions/", MatchSuggestionView.as_view(), name="match-suggestions"),
+    path("suggestions/deck/", MatchSuggestionDeckView.as_view(), name="match-suggestion-deck"),
     path("like/<int:user_id>/", LikeProfileView.as_view(), name="like-profile"),
     path("reject/<int:user_id>/", RejectProfileView.as_view(), name="reject-profile"),
     path("block/<int:user_id>/", BlockProfileView.as_view(), name="block-profile"),
@@ -1,21 +1,23 @@
 from __future__ import annotations
 
-from hashlib import md5
-
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.db.models import Count, Q
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from django.utils.encoding import force_bytes
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from chat.models import ChatRoom
-from notifications.utils import push_notification
+from notifications.utils import push_notification, push_notifications
 from profiles.models import Profile
-from profiles.serializers import ProfileSerializer
+from profiles.serializers import profile_prefetches, profile_serializer_class, profiles_by_user
+from vivahvows.fastpath import compile_serializer
+from vivahvows.pagination import KeysetPagination
 
+from .deck import SuggestionDeck, filters_key, pop_candidate
+from .generations import bump_user, suggestion_cache_key
 from .models import MatchAction, MutualMatch
 from .serializers import MutualMatchSerializer
 
@@ -23,95 +25,59 @@ User = get_user_model()
 
 
 class MatchSuggestionView(APIView):
+    """The first page of the viewer's suggestions, as a plain list."""
+
     permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    paged = False
 
     def get(self, request, *args, **kwargs):
-        profile = request.user.profile
         params = request.query_params
-        cache_key_raw = (
-            f"suggestions:{request.user.id}:"
-            + str(sorted((key, params.getlist(key)) for key in params))
-        )
-        cache_key = md5(force_bytes(cache_key_raw)).hexdigest()
+        cache_key = suggestion_cache_key(request.user.id, params, paged=self.paged)
 
         cached = cache.get(cache_key)
-        if cached:
+        if cached is not None:
             return Response(cached)
 
-        interest_ids = list(profile.interests.values_list("id", flat=True))
-
-        queryset = (
+        deck = SuggestionDeck.load(request.user.id)
+        if deck is None or deck.filters != filters_key(request.user, params):
+            deck = SuggestionDeck.build(request.user, params)
+            deck.save(request.user.id)
+        position = deck.decode_cursor(params.get("cursor") if self.paged else None)
+        if deck.is_outdated():
+            deck = deck.refill(request.user, params, position)
+            deck.save(request.user.id)
+            position = 0
+        user_ids, position = deck.page(position, self.page_size)
+        if deck.needs_refill(position):
+            deck = deck.refill(request.user, params, position)
+            deck.save(request.user.id)
+            position = 0
+
+        profiles = (
             Profile.objects.select_related("user")
-            .prefetch_related("interests")
-            .exclude(user=request.user)
+            .prefetch_related(*profile_prefetches(request))
+            .in_bulk(user_ids, field_name="user_id")
         )
-
-        blocked_users = MatchAction.objects.filter(
-            Q(initiator=request.user, status="blocked")
-            | Q(target=request.user, status="blocked")
-        ).values_list("initiator", "target")
-        blocked_ids = {uid for pair in blocked_users for uid in pair if uid != request.user.id}
-        if blocked_ids:
-            queryset = queryset.exclude(user__id__in=blocked_ids)
-
-        negative_targets = MatchAction.objects.filter(
-            initiator=request.user, status__in=["rejected", "blocked"]
-        ).values_list("target", flat=True)
-        if negative_targets:
-            queryset = queryset.exclude(user__id__in=list(negative_targets))
-
-        if profile.preferred_gender:
-            queryset = queryset.filter(gender=profile.preferred_gender)
-        if profile.preferred_city:
-            queryset = queryset.filter(city__iexact=profile.preferred_city)
-        if profile.preferred_religion:
-            queryset = queryset.filter(religion__iexact=profile.preferred_religion)
-        age_min = params.get("age_min", profile.preferred_age_min)
-        age_max = params.get("age_max", profile.preferred_age_max)
-        gender = params.get("gender")
-        city = params.get("city")
-        religion = params.get("religion")
-
-        if gender:
-            queryset = queryset.filter(gender=gender)
-        if city:
-            queryset = queryset.filter(city__iexact=city)
-        if religion:
-            queryset = queryset.filter(religion__iexact=religion)
-
-        if age_min or age_max:
-            from datetime import date
-
-            today = date.today()
-
-            def _subtract_years(years: int):
-                try:
-                    return today.replace(year=today.year - years)
-                except ValueError:
-                    return today.replace(month=2, day=28, year=today.year - years)
-
-            if age_min:
-                queryset = queryset.filter(dob__lte=_subtract_years(int(age_min)))
-            if age_max:
-                queryset = queryset.filter(dob__gte=_subtract_years(int(age_max)))
-
-        query_interests = params.getlist("interests")
-        if query_interests:
-            queryset = queryset.filter(interests__id__in=query_interests)
-
-        queryset = queryset.annotate(
-            shared_interests=Count(
-                "interests", filter=Q(interests__id__in=interest_ids)
-            )
-        ).order_by(
-            "-shared_interests", "-updated_at"
+        serializer = compile_serializer(
+            profile_serializer_class(request), context={"request": request}
         )
-
-        data = ProfileSerializer(queryset[:20], many=True, context={"request": request}).data
-        cache.set(cache_key, data, 60)
+        data = serializer.many(profiles[uid] for uid in user_ids if uid in profiles)
+        if self.paged:
+            data = {"cursor": deck.encode_cursor(position), "results": data}
+        cache.set(cache_key, data, getattr(settings, "SUGGESTION_CACHE_TTL", 3600))
         return Response(data)
 
 
+class MatchSuggestionDeckView(MatchSuggestionView):
+    """Suggestions paged through the viewer's deck: ``{"cursor", "results"}``.
+
+    Pass the returned ``cursor`` back for the next page; omit it to start over.
+    """
+
+    paged = True
+
+
 class BaseMatchActionView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     action = None
@@ -128,6 +94,9 @@ class BaseMatchActionView(APIView):
             target=target,
             defaults={"status": self.action},
         )
+        pop_candidate(request.user.id, target.id)
+        # Blocks hide the initiator from the target too, so both views go stale.
+        bump_user(request.user.id, target.id)
         response = {"detail": f"{self.action.title()} action recorded."}
 
         if self.action == "liked":
@@ -137,8 +106,12 @@ class BaseMatchActionView(APIView):
             if reciprocal:
                 mutual, _ = MutualMatch.get_or_create_mutual(request.user, target)
                 ChatRoom.get_or_create_room(request.user, target)
-                push_notification(target, "match", {"user_id": request.user.id})
-                push_notification(request.user, "match", {"user_id": target.id})
+                push_notifications(
+                    [
+                        (target, "match", {"user_id": request.user.id}),
+                        (request.user, "match", {"user_id": target.id}),
+                    ]
+                )
                 response["match"] = True
             else:
                 push_notification(target, "like", {"user_id": request.user.id})
@@ -163,9 +136,28 @@ class BlockProfileView(BaseMatchActionView):
 
 
 class MutualMatchListView(generics.ListAPIView):
+    """Newest matches first, paged by ``(created_at, id)`` keyset cursors.
+
+    A page costs the same fixed handful of queries whatever its size: the
+    matches, then the partners' profiles with their interests and photos in
+    bulk.
+    """
+
     serializer_class = MutualMatchSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
-        return MutualMatch.objects.involving(user)
+        return MutualMatch.objects.involving(user).only("id", "user_one", "user_two", "created_at")
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        partner_ids = [
+            match.user_one_id if match.user_two_id == request.user.id else match.user_two_id
+            for match in page
+        ]
+        profiles = profiles_by_user(partner_ids, profile_prefetches(request))
+        context = {**self.get_serializer_context(), "partner_profiles": profiles}
+        serializer = compile_serializer(self.get_serializer_class(), context=context)
+        return self.get_paginated_response(serializer.many(page))
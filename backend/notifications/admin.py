@@ -2,16 +2,19 @@
 
 from django.contrib import admin
 
-from .models import Notification
+from .counters import forget_unread
+from .models import ArchivedNotification, Notification, OutboxEntry
 
 
 @admin.action(description="Mark selected notifications as READ")
 def mark_as_read(modeladmin, request, queryset):
+    forget_unread(*queryset.values_list("user_id", flat=True).distinct())
     queryset.update(is_read=True)
 
 
 @admin.action(description="Mark selected notifications as UNREAD")
 def mark_as_unread(modeladmin, request, queryset):
+    forget_unread(*queryset.values_list("user_id", flat=True).distinct())
     queryset.update(is_read=False)
 
 
@@ -65,3 +68,26 @@ class NotificationAdmin(admin.ModelAdmin):
         return (text[:75] + "...") if len(text) > 75 else text
 
     short_payload.short_description = "Payload"
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "is_read" in form.changed_data:
+            forget_unread(obj.user_id)
+
+
+@admin.register(OutboxEntry)
+class OutboxEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "event", "attempts", "available_at", "created_at")
+    list_filter = ("event",)
+    readonly_fields = ("notification", "created_at")
+    ordering = ("available_at", "id")
+    list_per_page = 50
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "event", "count", "created_at", "archived_at")
+    list_filter = ("event",)
+    search_fields = ("user__username",)
+    ordering = ("-archived_at",)
+    list_per_page = 50
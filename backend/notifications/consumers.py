@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from .utils import notification_group
+
 
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
@@ -9,7 +11,7 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
         if user.is_anonymous:
             await self.close()
             return
-        self.group_name = f"notifications_{user.id}"
+        self.group_name = notification_group(user.id)
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
@@ -18,4 +20,10 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def notification_send(self, event):
-        await self.send_json({"event": event["event"], "payload": event.get("payload", {})})
+        await self.send_json(
+            {
+                "event": event["event"],
+                "payload": event.get("payload", {}),
+                "count": event.get("count", 1),
+            }
+        )
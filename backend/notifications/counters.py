@@ -0,0 +1,51 @@
+"""Cached per-user unread notification counters.
+
+Clients poll the unread count constantly, so it is served from the cache
+and kept current by the code paths that create and read notifications.
+The table is only counted (via the ``(user, is_read)`` index) when a
+counter is missing: on a cold cache, or after a bulk change that could not
+be tracked, such as an admin action.
+
+Adjustments only reach other processes through a shared cache; on the
+per-process default ``NOTIFICATION_UNREAD_CACHE_TTL`` stays short.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+
+def _key(user_id: int) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user_id: int) -> int:
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        # add() so a counter written concurrently by adjust_unread wins.
+        cache.add(_key(user_id), count, settings.NOTIFICATION_UNREAD_CACHE_TTL)
+    return count
+
+
+def adjust_unread(user_id: int, delta: int) -> None:
+    """Shift a user's counter once the surrounding transaction commits."""
+    if delta:
+        transaction.on_commit(lambda: _apply(user_id, delta))
+
+
+def _apply(user_id: int, delta: int) -> None:
+    try:
+        count = cache.incr(_key(user_id), delta)
+    except ValueError:
+        return  # Not cached; the next read counts afresh.
+    if count < 0:
+        cache.delete(_key(user_id))
+
+
+def forget_unread(*user_ids: int) -> None:
+    keys = [_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver queued notifications from the outbox, polling until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls.")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = deliver_pending(options["batch_size"])
+            if delivered:
+                self.stdout.write(f"Delivered {delivered} notifications.")
+            if options["once"]:
+                break
+            if not delivered:
+                time.sleep(options["interval"])
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from notifications import partitions
+
+
+def _month(value: str) -> date:
+    try:
+        year, month = value.split("-")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise CommandError(f"Expected a month as YYYY-MM, got {value!r}.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly range partitions of the notifications table (PostgreSQL only): "
+        "convert it once with --convert, then run regularly to create partitions ahead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert", action="store_true", help="Partition the table if it is not already."
+        )
+        parser.add_argument("--months-ahead", type=int, default=3)
+        parser.add_argument(
+            "--detach-before",
+            metavar="YYYY-MM",
+            help="Detach monthly partitions that end on or before this month.",
+        )
+        parser.add_argument(
+            "--drop", action="store_true", help="Drop detached partitions instead of keeping them."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Notification partitioning needs PostgreSQL.")
+        if not partitions.is_partitioned():
+            if not options["convert"]:
+                raise CommandError("The notifications table is not partitioned; pass --convert.")
+            boundary = partitions.convert(months_ahead=options["months_ahead"])
+            self.stdout.write(f"Partitioned notifications; older rows kept before {boundary:%Y-%m}.")
+        for name in partitions.ensure_partitions(options["months_ahead"]):
+            self.stdout.write(f"Created {name}.")
+        if options["detach_before"]:
+            before = _month(options["detach_before"])
+            for name in partitions.detach_partitions(before, drop=options["drop"]):
+                self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}.")
+        self.stdout.write(self.style.SUCCESS("Notification partitions are up to date."))
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notifications.retention import prune
+
+
+class Command(BaseCommand):
+    help = "Archive (or delete) read notifications older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+        parser.add_argument(
+            "--mode",
+            choices=("archive", "delete"),
+            default=None,
+            help="Move rows to the archive table, or drop them.",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds between batches.")
+
+    def handle(self, *args, **options):
+        days = options["days"] or settings.NOTIFICATION_RETENTION_DAYS
+        mode = options["mode"] or settings.NOTIFICATION_RETENTION_MODE
+        if mode not in ("archive", "delete"):
+            raise CommandError(f"Unknown retention mode {mode!r}.")
+        batch_size = options["batch_size"] or settings.NOTIFICATION_RETENTION_BATCH
+        cutoff = timezone.now() - timedelta(days=days)
+        verb = "Archived" if mode == "archive" else "Deleted"
+        total = 0
+        for moved in prune(cutoff, mode == "archive", batch_size, options["pause"]):
+            total += moved
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{verb} {moved} notifications.")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} notifications older than {days} days."))
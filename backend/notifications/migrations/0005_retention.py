@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('event', models.CharField(choices=[('like', 'Like'), ('match', 'Match'), ('message', 'Message')], max_length=20)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='outboxentry',
+            name='notification',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notifications.notification'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_read', 'created_at', 'id'], name='notification_read_age'),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivednotification',
+            index=models.Index(fields=['user', '-created_at'], name='archived_notification_user'),
+        ),
+    ]
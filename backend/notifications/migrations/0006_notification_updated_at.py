@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:40
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    Notification.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -17,10 +18,79 @@ class Notification(models.Model):
     event = models.CharField(max_length=20, choices=EVENT_CHOICES)
     payload = models.JSONField(default=dict, blank=True)
     is_read = models.BooleanField(default=False)
+    # Coalesced notifications (notifications.outbox.group_key) share a key and
+    # count the events folded into them; updated_at tracks the latest one.
+    # created_at never moves, so keyset pages and partitions stay put.
+    group_key = models.CharField(max_length=64, blank=True, default="")
+    count = models.PositiveIntegerField(default=1)
+    pushed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # The feed: one user's notifications newest first, keyset paged.
+            models.Index(fields=["user", "-created_at", "-id"], name="notification_user_recent"),
+            # Unread counts and mark-all-read.
+            models.Index(fields=["user", "is_read", "id"], name="notification_user_unread"),
+            # Retention sweeps: read rows oldest first.
+            models.Index(fields=["is_read", "created_at", "id"], name="notification_read_age"),
+            models.Index(
+                fields=["user", "group_key"],
+                condition=models.Q(is_read=False) & ~models.Q(group_key=""),
+                name="notification_unread_group",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Notification({self.user}, {self.event})"
+
+
+class OutboxEntry(models.Model):
+    """A notification waiting to be stored and pushed (see ``notifications.outbox``).
+
+    ``notification`` is set once the entry has been stored (possibly folded
+    into an existing row), so a retried delivery only repeats the push.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    event = models.CharField(max_length=20, choices=Notification.EVENT_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # No database constraint: a partitioned notifications table (see
+    # notifications.partitions) has no unique key on id alone to reference.
+    notification = models.ForeignKey(
+        Notification,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_constraint=False,
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["available_at", "id"])]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"OutboxEntry({self.user_id}, {self.event})"
+
+
+class ArchivedNotification(models.Model):
+    """A read notification moved out of the live table by ``prune_notifications``."""
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    event = models.CharField(max_length=20, choices=Notification.EVENT_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_at"], name="archived_notification_user")]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"ArchivedNotification({self.user_id}, {self.event})"
@@ -0,0 +1,257 @@
+"""Transactional outbox for notifications.
+
+Callers ``enqueue`` notification intents: one INSERT into the outbox, in
+the caller's transaction, and no channel-layer round trip.  Delivery turns
+pending entries into ``Notification`` rows with ``bulk_create`` and then
+pushes them to the users' WebSocket groups.  It runs in two places:
+
+* a background thread kicked after each enqueueing transaction commits
+  (``NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT``), and
+* the ``deliver_notifications`` worker, which also collects whatever a
+  crashed process left behind.
+
+Delivery is at-least-once.  An entry is leased for
+``NOTIFICATION_OUTBOX_LEASE_SECONDS`` while it is delivered, and deleted
+only after its push went out.  If the process dies in between, the entry
+becomes available again and the push is repeated.  The stored
+notification is never duplicated.
+
+Bursts are coalesced.  Events listed in ``NOTIFICATION_COALESCE_EVENTS``
+fold into the user's unread notification for the same room (or sender),
+which keeps a running ``count``.  Its push is sent at most once per
+``NOTIFICATION_PUSH_DEBOUNCE_SECONDS``: entries arriving inside that period
+wait it out, then push the latest count once.  After each pass the
+background thread sets a timer for the earliest deferred entry, so the
+final push of a burst goes out even if nothing else commits.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .counters import adjust_unread
+from .models import Notification, OutboxEntry
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notification-outbox")
+_scheduled = threading.Event()
+_wakeup_lock = threading.Lock()
+_wakeup: tuple[datetime, threading.Timer] | None = None
+
+
+def notification_group(user_id: int) -> str:
+    return f"notifications_{user_id}"
+
+
+def notification_event(event: str, payload: dict, count: int = 1) -> dict:
+    return {"type": "notification.send", "event": event, "payload": payload, "count": count}
+
+
+def enqueue(user, event: str, payload: dict | None = None) -> None:
+    """Queue one notification; ``user`` may be a User or a user id."""
+    enqueue_many([(user, event, payload)])
+
+
+def enqueue_many(intents: Iterable[tuple]) -> None:
+    """Queue ``(user, event, payload)`` intents with a single INSERT."""
+    entries = [
+        OutboxEntry(user_id=getattr(user, "pk", user), event=event, payload=payload or {})
+        for user, event, payload in intents
+    ]
+    if not entries:
+        return
+    OutboxEntry.objects.bulk_create(entries)
+    if settings.NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT:
+        transaction.on_commit(kick)
+
+
+def kick() -> None:
+    """Drain the outbox on the background thread; kicks before it starts coalesce."""
+    if not _scheduled.is_set():
+        _scheduled.set()
+        _executor.submit(_drain_in_background)
+
+
+def _drain_in_background() -> None:
+    # Cleared first, so entries enqueued during this pass schedule another.
+    _scheduled.clear()
+    try:
+        deliver_pending()
+        schedule_wakeup()
+    except Exception:
+        logger.exception("Notification outbox delivery failed; the worker will retry")
+    finally:
+        connections.close_all()
+
+
+def schedule_wakeup() -> None:
+    """Kick the drain again when the earliest entry still queued becomes available.
+
+    Covers entries deferred by the push debounce or left leased by a failed
+    push.  One timer is kept; it is only replaced by an earlier one.
+    """
+    global _wakeup
+    due = OutboxEntry.objects.order_by("available_at").values_list("available_at", flat=True)
+    due = due.first()
+    if due is None:
+        return
+    with _wakeup_lock:
+        if _wakeup is not None and _wakeup[0] <= due and _wakeup[1].is_alive():
+            return
+        if _wakeup is not None:
+            _wakeup[1].cancel()
+        timer = threading.Timer(max(0.0, (due - timezone.now()).total_seconds()), kick)
+        timer.daemon = True
+        _wakeup = (due, timer)
+        timer.start()
+
+
+def group_key(event: str, payload: dict) -> str:
+    """What notifications of ``event`` coalesce on, or ``""`` if they never do."""
+    if event not in settings.NOTIFICATION_COALESCE_EVENTS:
+        return ""
+    if payload.get("room_id") is not None:
+        return f"{event}:room:{payload['room_id']}"
+    if payload.get("sender_id") is not None:
+        return f"{event}:sender:{payload['sender_id']}"
+    return ""
+
+
+def _store(fresh: list[OutboxEntry], now) -> None:
+    """Create or update the notifications for ``fresh`` entries and link them.
+
+    Entries sharing a group key fold into the user's unread notification of
+    that key updated in the last ``NOTIFICATION_COALESCE_WINDOW_SECONDS``,
+    whose count, payload and ``updated_at`` are brought up to date, instead
+    of adding a row each.  ``created_at`` is left alone: the feed is keyset
+    paged on it.
+    """
+    groups: dict[tuple[int, str], list[OutboxEntry]] = {}
+    for entry in fresh:
+        key = group_key(entry.event, entry.payload)
+        groups.setdefault((entry.user_id, key or f"#{entry.pk}"), []).append(entry)
+
+    window_start = now - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)
+    keyed = {key for _, key in groups if not key.startswith("#")}
+    existing: dict[tuple[int, str], Notification] = {}
+    if keyed:
+        rows = (
+            Notification.objects.select_for_update()
+            .filter(
+                user_id__in={user_id for user_id, _ in groups},
+                group_key__in=keyed,
+                is_read=False,
+                updated_at__gte=window_start,
+            )
+            .order_by("updated_at")
+        )
+        existing = {(row.user_id, row.group_key): row for row in rows}
+
+    created, updated, links = [], [], []
+    for (user_id, key), group in groups.items():
+        latest = group[-1]
+        row = existing.get((user_id, key))
+        if row is None:
+            row = Notification(
+                user_id=user_id,
+                event=latest.event,
+                payload=latest.payload,
+                group_key="" if key.startswith("#") else key,
+                count=len(group),
+                updated_at=now,
+            )
+            created.append(row)
+        else:
+            row.count += len(group)
+            row.payload, row.updated_at = latest.payload, now
+            updated.append(row)
+        links.append((group, row))
+    Notification.objects.bulk_create(created)
+    Notification.objects.bulk_update(updated, ["count", "payload", "updated_at"])
+    new_per_user: dict[int, int] = {}
+    for row in created:
+        new_per_user[row.user_id] = new_per_user.get(row.user_id, 0) + 1
+    for user_id, new in new_per_user.items():
+        adjust_unread(user_id, new)
+    for group, row in links:
+        for entry in group:
+            entry.notification = row
+
+
+def _claim(batch_size: int) -> tuple[int, list[Notification], list[OutboxEntry]]:
+    """Lease the next available entries and store their notifications.
+
+    Returns how many entries were claimed, the notifications due a push and
+    the entries those pushes settle.
+    Entries whose notification was pushed less than
+    ``NOTIFICATION_PUSH_DEBOUNCE_SECONDS`` ago are deferred until the
+    debounce ends, so a burst is pushed once with its final count.
+    """
+    now = timezone.now()
+    debounce = timedelta(seconds=settings.NOTIFICATION_PUSH_DEBOUNCE_SECONDS)
+    with transaction.atomic():
+        entries = list(
+            OutboxEntry.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("notification")
+            .filter(available_at__lte=now)
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not entries:
+            return 0, [], []
+        _store([entry for entry in entries if entry.notification_id is None], now)
+
+        due: dict[int, Notification] = {}
+        settled = []
+        lease = now + timedelta(seconds=settings.NOTIFICATION_OUTBOX_LEASE_SECONDS)
+        for entry in entries:
+            notification = entry.notification
+            pushed_at = notification.pushed_at
+            if pushed_at is not None and now - pushed_at < debounce:
+                entry.available_at = pushed_at + debounce
+            else:
+                entry.available_at = lease
+                due[notification.pk] = notification
+                settled.append(entry)
+            entry.attempts += 1
+        OutboxEntry.objects.bulk_update(entries, ["notification", "available_at", "attempts"])
+    return len(entries), list(due.values()), settled
+
+
+async def _push(notifications: list[Notification]) -> None:
+    channel_layer = get_channel_layer()
+    for notification in notifications:
+        await channel_layer.group_send(
+            notification_group(notification.user_id),
+            notification_event(notification.event, notification.payload, notification.count),
+        )
+
+
+def deliver_batch(batch_size: int | None = None) -> int:
+    """Store and push one batch; returns how many entries it handled."""
+    claimed, notifications, settled = _claim(batch_size or settings.NOTIFICATION_OUTBOX_BATCH)
+    if notifications:
+        async_to_sync(_push)(notifications)
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            pushed_at=timezone.now()
+        )
+    if settled:
+        OutboxEntry.objects.filter(pk__in=[entry.pk for entry in settled]).delete()
+    return claimed
+
+
+def deliver_pending(batch_size: int | None = None) -> int:
+    """Deliver batches until nothing is available; returns the entries handled."""
+    total = 0
+    while delivered := deliver_batch(batch_size):
+        total += delivered
+    return total
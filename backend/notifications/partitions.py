@@ -0,0 +1,212 @@
+"""Optional monthly range partitioning of the notifications table (PostgreSQL).
+
+``convert`` turns ``notifications_notification`` into a table partitioned by
+``created_at``.  The existing table is kept, renamed to ``..._legacy``, and
+attached as the partition for everything before ``boundary``, so no rows are
+copied.  The slow steps (a unique ``(id, created_at)`` index for the new
+primary key and a validated range CHECK) run before the exclusive lock is
+taken, which then only covers catalog changes.  A partitioned table cannot
+have a primary key on ``id`` alone, so it becomes ``(id, created_at)``;
+``OutboxEntry.notification`` therefore carries no database constraint.
+
+After conversion ``ensure_partitions`` must run regularly (the
+``partition_notifications`` command, e.g. daily from cron) to create the
+coming months ahead of time; a DEFAULT partition catches any row that falls
+outside them.  ``detach_partitions`` detaches whole months, which only
+touches the catalog, and keeps (or drops) them as standalone tables.
+Detaching removes unread notifications too, so pick a horizon well past
+``NOTIFICATION_RETENTION_DAYS``.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timezone
+
+from django.db import connection, transaction
+from django.utils import timezone as dj_timezone
+
+from .models import Notification
+
+TABLE = Notification._meta.db_table
+LEGACY = f"{TABLE}_legacy"
+DEFAULT = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_pk_seq"
+PK_INDEX = f"{TABLE}_id_created"
+RANGE_CHECK = f"{LEGACY}_range"
+_MONTHLY = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _this_month() -> date:
+    return dj_timezone.now().date().replace(day=1)
+
+
+def _bound(month: date) -> str:
+    """A quoted timestamp literal; DDL statements cannot take parameters."""
+    return f"'{datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()}'"
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _check_vendor() -> None:
+    if connection.vendor != "postgresql":
+        raise RuntimeError("Notification partitioning needs PostgreSQL.")
+
+
+def is_partitioned() -> bool:
+    _check_vendor()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [TABLE])
+        return cursor.fetchone()[0] == "p"
+
+
+def convert(boundary: date | None = None, months_ahead: int = 3) -> date:
+    """Partition the live table; rows before ``boundary`` stay where they are.
+
+    ``boundary`` defaults to the month after next, so the range CHECK added
+    up front cannot reject a row inserted before the switch.  Returns it.
+    """
+    _check_vendor()
+    if is_partitioned():
+        raise RuntimeError(f"{TABLE} is already partitioned.")
+    boundary = boundary or _add_months(_this_month(), 2)
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        # Outside any transaction: these scan the table but do not block writers.
+        cursor.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {qn(PK_INDEX)} "
+            f"ON {qn(TABLE)} (id, created_at)"
+        )
+        cursor.execute(
+            "SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND conname = %s",
+            [TABLE, RANGE_CHECK],
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(RANGE_CHECK)} "
+                f"CHECK (created_at < {_bound(boundary)}) NOT VALID"
+            )
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} VALIDATE CONSTRAINT {qn(RANGE_CHECK)}")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(TABLE)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(LEGACY)}")
+        # Index names are schema-wide: the parent takes over the originals.
+        cursor.execute(
+            "SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisprimary "
+            "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = %s::regclass",
+            [LEGACY],
+        )
+        definitions = []
+        for name, definition, primary in cursor.fetchall():
+            if name == PK_INDEX:
+                continue
+            renamed = f"{name[:56]}_legacy"
+            if primary:
+                cursor.execute(
+                    f"ALTER TABLE {qn(LEGACY)} RENAME CONSTRAINT {qn(name)} TO {qn(renamed)}"
+                )
+                continue
+            cursor.execute(f"ALTER INDEX {qn(name)} RENAME TO {qn(renamed)}")
+            definitions.append(re.sub(rf" ON (\S+\.)?{LEGACY} ", f" ON {TABLE} ", definition))
+
+        cursor.execute(f"CREATE SEQUENCE {qn(SEQUENCE)} AS bigint")
+        cursor.execute(
+            f"SELECT setval(%s, (SELECT COALESCE(MAX(id), 0) + 1 FROM {qn(LEGACY)}), false)",
+            [SEQUENCE],
+        )
+        cursor.execute(f"ALTER TABLE {qn(LEGACY)} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {qn(LEGACY)} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(LEGACY)} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')"
+        )
+        cursor.execute(f"ALTER SEQUENCE {qn(SEQUENCE)} OWNED BY {qn(TABLE)}.id")
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ADD PRIMARY KEY (id, created_at)")
+        user_table = Notification._meta.get_field("user").related_model._meta.db_table
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_user_fk')} "
+            f"FOREIGN KEY (user_id) REFERENCES {qn(user_table)} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+        # On a partitioned table these adopt the matching legacy indexes.
+        for definition in definitions:
+            cursor.execute(definition)
+        # The validated CHECK lets the attach skip its scan of the rows.
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(LEGACY)} "
+            f"FOR VALUES FROM (MINVALUE) TO ({_bound(boundary)})"
+        )
+        cursor.execute(f"CREATE TABLE {qn(DEFAULT)} PARTITION OF {qn(TABLE)} DEFAULT")
+        ensure_partitions(months_ahead, start=boundary)
+    return boundary
+
+
+def ensure_partitions(months_ahead: int = 3, start: date | None = None) -> list[str]:
+    """Create the monthly partitions up to ``months_ahead`` months from now.
+
+    New partitions continue from the newest existing one (or ``start``), so
+    they never overlap the legacy partition.
+    """
+    _check_vendor()
+    qn = connection.ops.quote_name
+    existing = partitions()
+    if start is None:
+        start = _add_months(max(existing.values()), 1) if existing else _this_month()
+    month = start
+    last = max(start, _add_months(_this_month(), months_ahead))
+    created = []
+    with connection.cursor() as cursor:
+        while month <= last:
+            name = partition_name(month)
+            if name not in existing:
+                cursor.execute(
+                    f"CREATE TABLE {qn(name)} PARTITION OF {qn(TABLE)} "
+                    f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(_add_months(month, 1))})"
+                )
+                created.append(name)
+            month = _add_months(month, 1)
+    return created
+
+
+def partitions() -> dict[str, date]:
+    """The attached monthly partitions, by name, with the month each holds."""
+    _check_vendor()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = {}
+    for name in names:
+        match = _MONTHLY.match(name)
+        if match:
+            months[name] = date(int(match[1]), int(match[2]), 1)
+    return months
+
+
+def detach_partitions(before: date, drop: bool = False) -> list[str]:
+    """Detach every monthly partition that ends on or before ``before``."""
+    qn = connection.ops.quote_name
+    detached = []
+    for name, month in sorted(partitions().items(), key=lambda item: item[1]):
+        if _add_months(month, 1) > before:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+            if drop:
+                cursor.execute(f"DROP TABLE {qn(name)}")
+        detached.append(name)
+    return detached
@@ -0,0 +1,52 @@
+"""Retention for read notifications.
+
+``prune`` moves read notifications older than a cutoff into
+``ArchivedNotification`` (or deletes them outright) a small batch at a time.
+Each batch is its own short transaction over rows found through the
+``(is_read, created_at, id)`` index, so locks are held briefly and only on
+the rows being moved.  Unread notifications are never touched, so unread
+counters stay correct.
+
+On PostgreSQL the table can additionally be range-partitioned by month (see
+``notifications.partitions``), which lets whole months be detached at once.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+
+from django.db import transaction
+
+from .models import ArchivedNotification, Notification
+
+ARCHIVED_FIELDS = ("id", "user_id", "event", "payload", "count", "created_at")
+
+
+def prune(
+    cutoff: datetime, archive: bool = True, batch_size: int = 1000, pause: float = 0.0
+):
+    """Archive or delete read notifications created before ``cutoff``.
+
+    Yields the size of each batch as it is committed; ``pause`` seconds are
+    slept between batches to leave room for other writers.
+    """
+    stale = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by(
+        "created_at", "id"
+    )
+    while True:
+        with transaction.atomic():
+            # Rows are gone once their batch commits, so each batch is simply
+            # the oldest remaining ones; no cursor is needed.
+            rows = list(stale.values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                return
+            if archive:
+                ArchivedNotification.objects.bulk_create(
+                    [ArchivedNotification(**row) for row in rows], ignore_conflicts=True
+                )
+            Notification.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        yield len(rows)
+        if len(rows) < batch_size:
+            return
+        if pause:
+            time.sleep(pause)
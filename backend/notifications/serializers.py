@@ -8,5 +8,5 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ["id", "event", "payload", "is_read", "created_at"]
-        read_only_fields = ["id", "event", "payload", "created_at"]
+        fields = ["id", "event", "payload", "count", "is_read", "created_at", "updated_at"]
+        read_only_fields = ["id", "event", "payload", "count", "created_at", "updated_at"]
@@ -0,0 +1,23 @@
+"""Keep cached unread counters in step with single-row writes.
+
+Bulk paths (outbox delivery, mark-all-read) adjust the counters themselves.
+"""
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import adjust_unread
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def count_created(sender, instance: Notification, created: bool, **kwargs) -> None:
+    if created and not instance.is_read:
+        adjust_unread(instance.user_id, 1)
+
+
+@receiver(post_delete, sender=Notification)
+def count_deleted(sender, instance: Notification, **kwargs) -> None:
+    if not instance.is_read:
+        adjust_unread(instance.user_id, -1)
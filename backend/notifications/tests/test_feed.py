@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from notifications.models import Notification
+from notifications.outbox import deliver_pending
+from notifications.utils import push_notification
+from notifications.views import NotificationViewSet
+
+
+@override_settings(NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT=False)
+class NotificationFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="viewer", password="pass-12345")
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ids = [
+                Notification.objects.create(user=self.user, event="like", payload={"n": n}).id
+                for n in range(5)
+            ]
+        self.count_url = reverse("notification-unread-count")
+
+    def test_feed_is_keyset_paged_newest_first(self):
+        seen, url = [], reverse("notification-list") + "?page_size=2"
+        while url:
+            data = self.client.get(url).data
+            self.assertNotIn("count", data)
+            seen.extend(row["id"] for row in data["results"])
+            url = data["next"]
+        self.assertEqual(seen, self.ids[::-1])
+
+    def test_unread_counter_follows_writes_without_touching_the_table(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.count_url).data["unread_count"], 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.count_url).data["unread_count"], 5)
+
+        url = reverse("notification-mark-all-read")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"up_to_id": self.ids[2]})
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(
+            set(Notification.objects.filter(is_read=False).values_list("id", flat=True)),
+            set(self.ids[3:]),
+        )
+
+        detail = reverse("notification-detail", args=[self.ids[0]])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail, {"is_read": False})
+            push_notification(self.user, "match", {"user_id": 2})
+            push_notification(self.user, "message", {"room_id": 1, "sender_id": 2})
+            push_notification(self.user, "message", {"room_id": 1, "sender_id": 2})
+            deliver_pending()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.count_url).data["unread_count"], 5)
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.count_url).data["unread_count"], 0)
+
+    def test_concurrent_mark_read_decrements_the_counter_once(self):
+        self.assertEqual(self.client.get(self.count_url).data["unread_count"], 5)
+        stale = Notification.objects.get(pk=self.ids[0])
+        detail = reverse("notification-detail", args=[stale.pk])
+        # Both requests loaded the notification while it was still unread.
+        with mock.patch.object(NotificationViewSet, "get_object", return_value=stale):
+            for _ in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.patch(detail, {"is_read": True})
+                self.assertTrue(response.data["is_read"])
+                stale.is_read = False
+        self.assertEqual(self.client.get(self.count_url).data["unread_count"], 4)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from matches.models import MatchAction
+from notifications.models import Notification, OutboxEntry
+from notifications.outbox import deliver_pending, kick, notification_group, schedule_wakeup
+from notifications.utils import push_notification
+
+
+class OutboxTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.target = User.objects.create_user(username="target", password="pass-12345")
+        MatchAction.objects.create(initiator=self.target, target=self.user, status="liked")
+        self.client.force_authenticate(self.user)
+
+    def test_mutual_like_enqueues_and_worker_delivers(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(notification_group(self.target.id), channel)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("like-profile", args=[self.target.id]))
+        self.assertTrue(response.data["match"])
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "notifications_')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(OutboxEntry.objects.count(), 2)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(deliver_pending(), 2)
+        self.assertFalse(OutboxEntry.objects.exists())
+        self.assertEqual(
+            sorted(Notification.objects.values_list("user_id", "event")),
+            sorted([(self.user.id, "match"), (self.target.id, "match")]),
+        )
+        pushed = async_to_sync(layer.receive)(channel)
+        self.assertEqual((pushed["event"], pushed["payload"]), ("match", {"user_id": self.user.id}))
+
+    def test_failed_push_is_retried_without_duplicating_rows(self):
+        self.client.post(reverse("like-profile", args=[self.target.id]))
+        with mock.patch("notifications.outbox._push", side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                deliver_pending()
+        self.assertEqual(Notification.objects.count(), 2)
+        # Leased: nothing is available until the lease runs out.
+        self.assertEqual(deliver_pending(), 0)
+
+        OutboxEntry.objects.update(available_at=timezone.now())
+        self.assertEqual(deliver_pending(), 2)
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertFalse(OutboxEntry.objects.exists())
+
+
+class CoalescingTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="viewer", password="pass-12345")
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(notification_group(self.user.id), self.channel)
+
+    def _message(self, room_id: int = 7) -> None:
+        push_notification(self.user, "message", {"room_id": room_id, "sender_id": 99})
+
+    def _pushes(self) -> list[dict]:
+        async def drain():
+            pushes = []
+            while True:
+                try:
+                    pushes.append(await asyncio.wait_for(self.layer.receive(self.channel), 0.05))
+                except asyncio.TimeoutError:
+                    return pushes
+
+        return async_to_sync(drain)()
+
+    def test_burst_folds_into_one_row_and_one_push(self):
+        for _ in range(5):
+            self._message()
+        self._message(room_id=8)
+        push_notification(self.user, "like", {"user_id": 99})
+        self.assertEqual(deliver_pending(), 7)
+
+        rows = {row.group_key: row for row in Notification.objects.all()}
+        self.assertEqual(rows["message:room:7"].count, 5)
+        self.assertEqual(rows["message:room:8"].count, 1)
+        self.assertEqual(rows[""].event, "like")
+        self.assertEqual(sorted(push["count"] for push in self._pushes()), [1, 1, 5])
+
+    def test_push_is_debounced_until_the_burst_settles(self):
+        self._message()
+        deliver_pending()
+        self.assertEqual(len(self._pushes()), 1)
+
+        self._message()
+        self._message()
+        deliver_pending()
+        # Stored at once, but pushed only when the debounce period ends.
+        self.assertEqual(Notification.objects.get().count, 3)
+        self.assertEqual(self._pushes(), [])
+        self.assertEqual(OutboxEntry.objects.count(), 2)
+
+        Notification.objects.update(pushed_at=timezone.now() - timedelta(minutes=1))
+        OutboxEntry.objects.update(available_at=timezone.now())
+        deliver_pending()
+        self.assertEqual([push["count"] for push in self._pushes()], [3])
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    def test_deferred_push_schedules_a_wakeup(self):
+        self._message()
+        deliver_pending()
+        self._message()
+        deliver_pending()
+        deferred = OutboxEntry.objects.get().available_at
+
+        with mock.patch("notifications.outbox.threading.Timer") as timer, mock.patch(
+            "notifications.outbox._wakeup", None
+        ):
+            schedule_wakeup()
+        delay, callback = timer.call_args.args
+        self.assertEqual(callback, kick)
+        self.assertAlmostEqual(delay, (deferred - timezone.now()).total_seconds(), delta=1)
+        timer.return_value.start.assert_called_once_with()
+
+    def test_coalescing_keeps_created_at_for_the_feed_cursor(self):
+        self._message()
+        deliver_pending()
+        first = Notification.objects.get()
+        self._message()
+        deliver_pending()
+        row = Notification.objects.get()
+        self.assertEqual((row.count, row.created_at), (2, first.created_at))
+        self.assertGreater(row.updated_at, first.updated_at)
+
+    def test_read_notifications_start_a_new_row(self):
+        self._message()
+        deliver_pending()
+        Notification.objects.update(is_read=True)
+        self._message()
+        deliver_pending()
+        self.assertEqual(list(Notification.objects.values_list("count", flat=True)), [1, 1])
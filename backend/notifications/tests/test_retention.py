@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from notifications.models import ArchivedNotification, Notification
+
+
+class PruneNotificationsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="viewer", password="pass-12345")
+        old = timezone.now() - timedelta(days=120)
+        rows = [
+            Notification(user=self.user, event="like", payload={"n": n}, is_read=n % 2 == 0)
+            for n in range(7)
+        ]
+        Notification.objects.bulk_create(rows)
+        # auto_now_add ignores assigned values, so age the rows afterwards.
+        Notification.objects.update(created_at=old)
+        self.fresh = Notification.objects.create(user=self.user, event="match", is_read=True)
+        self.stale_read = sorted(n.id for n in rows if n.is_read)
+
+    def prune(self, *args):
+        call_command(
+            "prune_notifications", "--days", "90", "--batch-size", "2", *args, stdout=StringIO()
+        )
+
+    def test_archive_moves_only_old_read_rows(self):
+        self.prune()
+        self.assertEqual(
+            sorted(ArchivedNotification.objects.values_list("id", flat=True)), self.stale_read
+        )
+        archived = ArchivedNotification.objects.get(pk=self.stale_read[0])
+        self.assertEqual((archived.user_id, archived.payload), (self.user.id, {"n": 0}))
+        remaining = Notification.objects.all()
+        self.assertEqual(remaining.filter(is_read=False).count(), 3)
+        self.assertEqual(list(remaining.filter(is_read=True)), [self.fresh])
+
+    def test_delete_mode_skips_the_archive(self):
+        self.prune("--mode", "delete")
+        self.assertFalse(ArchivedNotification.objects.exists())
+        self.assertEqual(Notification.objects.count(), 4)
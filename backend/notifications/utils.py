@@ -1,22 +1,15 @@
 from __future__ import annotations
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .outbox import enqueue, enqueue_many, notification_event, notification_group
 
-from .models import Notification
+__all__ = ["notification_event", "notification_group", "push_notification", "push_notifications"]
 
 
-def push_notification(user, event: str, payload: dict | None = None) -> Notification:
-    payload = payload or {}
-    notification = Notification.objects.create(user=user, event=event, payload=payload)
+def push_notification(user, event: str, payload: dict | None = None) -> None:
+    """Queue a notification for delivery; ``user`` may be a User or a user id."""
+    enqueue(user, event, payload)
 
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"notifications_{user.id}",
-        {
-            "type": "notification.send",
-            "event": event,
-            "payload": payload,
-        },
-    )
-    return notification
+
+def push_notifications(intents) -> None:
+    """Queue several ``(user, event, payload)`` notifications with one INSERT."""
+    enqueue_many(intents)
@@ -1,14 +1,61 @@
 from __future__ import annotations
 
-from rest_framework import mixins, permissions, viewsets
+from django.db import transaction
+from rest_framework import mixins, permissions, serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
+from vivahvows.fastpath import FastListMixin
+from vivahvows.pagination import KeysetPagination
+
+from .counters import adjust_unread, unread_count
 from .models import Notification
 from .serializers import NotificationSerializer
 
 
-class NotificationViewSet(mixins.ListModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
+class MarkAllReadSerializer(serializers.Serializer):
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
+
+
+class NotificationViewSet(
+    FastListMixin, mixins.ListModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet
+):
+    """The viewer's notifications newest first, keyset paged on ``(created_at, id)``."""
+
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
+
+    def perform_update(self, serializer):
+        # Only ``is_read`` is writable.  A conditional UPDATE makes the flip
+        # happen once, so concurrent requests cannot adjust the counter twice.
+        notification = serializer.instance
+        is_read = serializer.validated_data.get("is_read", notification.is_read)
+        with transaction.atomic():
+            flipped = Notification.objects.filter(
+                pk=notification.pk, is_read=not is_read
+            ).update(is_read=is_read)
+            if flipped:
+                adjust_unread(notification.user_id, -1 if is_read else 1)
+        notification.is_read = is_read
+
+    @action(detail=False, methods=["post"], url_path="mark-all-read")
+    def mark_all_read(self, request):
+        """Mark every unread notification read, or only those up to ``up_to_id``."""
+        serializer = MarkAllReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unread = self.get_queryset().filter(is_read=False)
+        up_to_id = serializer.validated_data.get("up_to_id")
+        if up_to_id is not None:
+            unread = unread.filter(id__lte=up_to_id)
+        with transaction.atomic():
+            updated = unread.update(is_read=True)
+            adjust_unread(request.user.id, -updated)
+        return Response({"updated": updated, "unread_count": unread_count(request.user.id)})
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread_count": unread_count(request.user.id)})
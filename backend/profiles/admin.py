@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.contrib.auth import get_user_model
 
-from .models import Interest, Profile, ProfilePhoto
+from .models import City, CityAlias, Interest, Profile, ProfilePhoto, Religion, ReligionAlias
 
 User = get_user_model()
 
@@ -17,6 +17,36 @@ class InterestAdmin(admin.ModelAdmin):
     ordering = ("name",)
 
 
+# --------------------------- #
+#  City / Religion reference tables
+# --------------------------- #
+class CityAliasInline(admin.TabularInline):
+    model = CityAlias
+    extra = 1
+
+
+class ReligionAliasInline(admin.TabularInline):
+    model = ReligionAlias
+    extra = 1
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ("name", "state", "latitude", "longitude")
+    list_filter = ("state",)
+    search_fields = ("name", "aliases__alias")
+    ordering = ("name",)
+    inlines = [CityAliasInline]
+
+
+@admin.register(Religion)
+class ReligionAdmin(admin.ModelAdmin):
+    list_display = ("name",)
+    search_fields = ("name", "aliases__alias")
+    ordering = ("name",)
+    inlines = [ReligionAliasInline]
+
+
 # --------------------------- #
 #  ProfilePhoto Inline (for Profile)
 # --------------------------- #
@@ -49,7 +79,7 @@ class ProfileAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
-    list_filter = ("gender", "city", "religion", "is_email_verified")
+    list_filter = ("gender", "city_ref", "religion_ref", "is_email_verified")
     search_fields = (
         "user__username",
         "name",
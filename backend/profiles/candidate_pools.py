@@ -0,0 +1,339 @@
+"""Per-segment candidate pools kept sorted by date of birth.
+
+A segment is a ``(gender, city, religion)`` combination, with city and
+religion given by their canonical ``City``/``Religion`` ids (0 when blank).
+Each segment keeps its members ordered by ``dob`` so an age window is two
+``bisect`` calls instead of a table scan.
+
+Pools live in process memory.  ``Profile`` signals record the changed profile
+id in the cache under a generation counter; every process compares its own
+generation with the shared one on access and reloads just the changed rows (or
+rebuilds from scratch when the change log has been evicted).  The change log
+only reaches other processes through a shared cache, so pools are also rebuilt
+once they are ``CANDIDATE_POOL_REFRESH_SECONDS`` old.
+
+Readers and ``apply_changes`` hold the pools' own lock, so a request thread
+never walks a segment while another thread is patching it.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Iterable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Profile, normalize_name
+
+GENERATION_KEY = "candidate_pools:generation"
+CHANGE_KEY = "candidate_pools:change:{}"
+REBUILD = "*"
+# Filter value for text that matches no canonical name: selects nothing.
+UNKNOWN = -1
+
+
+def reference_filter(model, value: str | None) -> int | None:
+    """Canonical id to filter ``model`` by, ``None`` for no filter, ``UNKNOWN`` if unmatched."""
+    if not normalize_name(value):
+        return None
+    resolved = model.resolve_id(value)
+    return UNKNOWN if resolved is None else resolved
+
+
+def subtract_years(today: date, years: int) -> date:
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(month=2, day=28, year=today.year - years)
+
+
+def birthdate_bounds(age_min=None, age_max=None) -> tuple[date | None, date | None]:
+    """Translate an age range into ``(min_dob, max_dob)`` inclusive bounds."""
+    today = date.today()
+    min_dob = subtract_years(today, int(age_max)) if age_max else None
+    max_dob = subtract_years(today, int(age_min)) if age_min else None
+    return min_dob, max_dob
+
+
+def _accepts(part, actual) -> bool:
+    if part is None:
+        return True
+    if isinstance(part, frozenset):
+        return actual in part
+    return part == actual
+
+
+class Candidate(NamedTuple):
+    profile_id: int
+    user_id: int
+    dob: int  # date ordinal, 0 when unknown
+    updated_at: float
+    # The candidate's own preferences; canonical ids, 0 when blank.
+    preferred_gender: str
+    preferred_city: int
+    preferred_religion: int
+    preferred_age_min: int
+    preferred_age_max: int
+    # Scoring features (see matches.scoring); text is normalized.
+    education: str
+    profession: str
+    photo_count: int
+
+
+class Segment:
+    __slots__ = ("dobs", "members", "undated")
+
+    def __init__(self) -> None:
+        # ``dobs`` is sorted (dob ordinal, profile_id); the dicts map profile_id -> user_id.
+        self.dobs: list[tuple[int, int]] = []
+        self.members: dict[int, int] = {}
+        self.undated: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.dobs) + len(self.undated)
+
+
+class CandidatePools:
+    FIELDS = (
+        "id",
+        "user_id",
+        "gender",
+        "city_ref_id",
+        "religion_ref_id",
+        "dob",
+        "updated_at",
+        "preferred_gender",
+        "preferred_city_ref_id",
+        "preferred_religion_ref_id",
+        "preferred_age_min",
+        "preferred_age_max",
+        "education",
+        "profession",
+    )
+
+    def __init__(self) -> None:
+        self.segments: dict[tuple[str, int, int], Segment] = {}
+        # profile_id -> (segment key, dob ordinal or None)
+        self.locations: dict[int, tuple[tuple[str, int, int], int | None]] = {}
+        # profile_id -> Candidate fields after (profile_id, user_id, dob)
+        self.details: dict[int, tuple] = {}
+        self.generation = 0
+        self.built_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls, rows: Iterable[dict] | None = None) -> "CandidatePools":
+        pools = cls()
+        if rows is None:
+            rows = cls.rows(Profile.objects.all()).iterator()
+        for row in rows:
+            pools.add_row(row)
+        return pools
+
+    @classmethod
+    def rows(cls, queryset):
+        return queryset.annotate(photo_count=Count("photos")).values(*cls.FIELDS, "photo_count")
+
+    @staticmethod
+    def segment_key(gender: str | None, city_id: int | None, religion_id: int | None):
+        return (gender or "", city_id or 0, religion_id or 0)
+
+    @classmethod
+    def row_key(cls, row: dict):
+        return cls.segment_key(row["gender"], row["city_ref_id"], row["religion_ref_id"])
+
+    def add_row(self, row: dict) -> None:
+        self.add(
+            row["id"],
+            row["user_id"],
+            self.row_key(row),
+            row["dob"],
+            (
+                row["updated_at"].timestamp() if row["updated_at"] else 0.0,
+                row["preferred_gender"] or "",
+                row["preferred_city_ref_id"] or 0,
+                row["preferred_religion_ref_id"] or 0,
+                row["preferred_age_min"],
+                row["preferred_age_max"],
+                normalize_name(row["education"]),
+                normalize_name(row["profession"]),
+                row.get("photo_count", 0),
+            ),
+        )
+
+    def add(self, profile_id: int, user_id: int, key, dob: date | None, details: tuple) -> None:
+        self.remove(profile_id)
+        segment = self.segments.setdefault(key, Segment())
+        if dob is None:
+            segment.undated[profile_id] = user_id
+            ordinal = None
+        else:
+            ordinal = dob.toordinal()
+            insort(segment.dobs, (ordinal, profile_id))
+            segment.members[profile_id] = user_id
+        self.locations[profile_id] = (key, ordinal)
+        self.details[profile_id] = details
+
+    def remove(self, profile_id: int) -> None:
+        location = self.locations.pop(profile_id, None)
+        self.details.pop(profile_id, None)
+        if location is None:
+            return
+        key, ordinal = location
+        segment = self.segments[key]
+        if ordinal is None:
+            segment.undated.pop(profile_id, None)
+        else:
+            position = bisect_left(segment.dobs, (ordinal, profile_id))
+            del segment.dobs[position]
+            segment.members.pop(profile_id, None)
+        if not len(segment):
+            del self.segments[key]
+
+    def matching_segments(self, gender=None, city=None, religion=None) -> list[Segment]:
+        wanted = (gender or None, city or None, religion or None)
+        if all(part is None for part in wanted):
+            return list(self.segments.values())
+        return [
+            segment
+            for key, segment in self.segments.items()
+            if all(_accepts(part, actual) for part, actual in zip(wanted, key))
+        ]
+
+    def select(
+        self,
+        gender: str | None = None,
+        city: int | frozenset[int] | None = None,
+        religion: int | None = None,
+        min_dob: date | None = None,
+        max_dob: date | None = None,
+    ) -> list[Candidate]:
+        """Return candidates in matching segments whose dob lies in the window.
+
+        ``city`` and ``religion`` are canonical ids (see ``reference_filter``);
+        ``city`` may also be a set of ids, as produced by ``geo.nearby_city_ids``.
+        """
+        results: list[Candidate] = []
+        dated_only = min_dob is not None or max_dob is not None
+        low = (min_dob.toordinal(), 0) if min_dob else None
+        high = (max_dob.toordinal() + 1, 0) if max_dob else None
+        with self.lock:
+            for segment in self.matching_segments(gender, city, religion):
+                start = bisect_left(segment.dobs, low) if low else 0
+                stop = bisect_left(segment.dobs, high) if high else len(segment.dobs)
+                for ordinal, profile_id in segment.dobs[start:stop]:
+                    results.append(
+                        Candidate(
+                            profile_id,
+                            segment.members[profile_id],
+                            ordinal,
+                            *self.details[profile_id],
+                        )
+                    )
+                if not dated_only:
+                    for profile_id, user_id in segment.undated.items():
+                        results.append(
+                            Candidate(profile_id, user_id, 0, *self.details[profile_id])
+                        )
+        return results
+
+    def verify(self, rows: Iterable[dict]) -> list[str]:
+        """Compare the pools against ``rows`` from the database; return the problems found."""
+        problems: list[str] = []
+        seen: set[int] = set()
+        for row in rows:
+            profile_id = row["id"]
+            seen.add(profile_id)
+            expected_key = self.row_key(row)
+            expected_ordinal = row["dob"].toordinal() if row["dob"] else None
+            location = self.locations.get(profile_id)
+            if location is None:
+                problems.append(f"profile {profile_id} is missing from the pools")
+            elif location != (expected_key, expected_ordinal):
+                problems.append(
+                    f"profile {profile_id} is pooled as {location}, expected "
+                    f"{(expected_key, expected_ordinal)}"
+                )
+        for profile_id in self.locations.keys() - seen:
+            problems.append(f"profile {profile_id} no longer exists but is still pooled")
+        for key, segment in self.segments.items():
+            if segment.dobs != sorted(segment.dobs):
+                problems.append(f"segment {key} is not sorted by dob")
+            if len(segment.dobs) != len(segment.members):
+                problems.append(f"segment {key} has inconsistent member bookkeeping")
+        return problems
+
+    def apply_changes(self, profile_ids: set[int]) -> None:
+        rows = {
+            row["id"]: row for row in self.rows(Profile.objects.filter(id__in=profile_ids))
+        }
+        with self.lock:
+            for profile_id in profile_ids:
+                if profile_id in rows:
+                    self.add_row(rows[profile_id])
+                else:
+                    self.remove(profile_id)
+
+
+_lock = threading.Lock()
+_pools: CandidatePools | None = None
+
+
+def _shared_generation() -> int:
+    return cache.get(GENERATION_KEY, 0)
+
+
+def _sync(pools: CandidatePools | None) -> CandidatePools:
+    generation = _shared_generation()
+    max_age = getattr(settings, "CANDIDATE_POOL_REFRESH_SECONDS", 60)
+    if pools is not None and time.monotonic() - pools.built_at > max_age:
+        pools = None
+    if pools is not None and pools.generation == generation:
+        return pools
+    log_size = getattr(settings, "CANDIDATE_POOL_CHANGE_LOG_SIZE", 1000)
+    if pools is not None and 0 < generation - pools.generation <= log_size:
+        keys = [CHANGE_KEY.format(gen) for gen in range(pools.generation + 1, generation + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) == len(keys) and REBUILD not in changes.values():
+            pools.apply_changes(set(changes.values()))
+            pools.generation = generation
+            return pools
+    pools = CandidatePools.build()
+    pools.generation = generation
+    return pools
+
+
+def get_candidate_pools() -> CandidatePools:
+    global _pools
+    with _lock:
+        _pools = _sync(_pools)
+        return _pools
+
+
+def invalidate_candidate_pools() -> None:
+    global _pools
+    with _lock:
+        _pools = None
+
+
+def record_change(profile_id: int | str) -> None:
+    """Publish a changed (or deleted) profile id to every process's pools."""
+    cache.add(GENERATION_KEY, 0, None)
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:  # pragma: no cover - key evicted between add and incr
+        cache.set(GENERATION_KEY, 1, None)
+        generation = 1
+    cache.set(
+        CHANGE_KEY.format(generation),
+        profile_id,
+        getattr(settings, "CANDIDATE_POOL_CHANGE_TTL", 3600),
+    )
+
+
+def request_rebuild() -> None:
+    record_change(REBUILD)
@@ -0,0 +1,58 @@
+"""Offline gazetteer of Indian cities shipped with the app.
+
+``data/indian_cities.csv`` lists each city once under its canonical spelling
+with its state, coordinates and the other spellings people type for it
+(``bombay`` for Mumbai, ``gurgaon`` for Gurugram).  It seeds ``City``
+coordinates, so distance filters never call out to a geocoding service.
+"""
+from __future__ import annotations
+
+import csv
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from .models import normalize_name
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "indian_cities.csv"
+
+
+class Place(NamedTuple):
+    name: str
+    state: str
+    latitude: float
+    longitude: float
+    aliases: tuple[str, ...]
+
+    @property
+    def spellings(self) -> tuple[str, ...]:
+        return (normalize_name(self.name), *self.aliases)
+
+
+@lru_cache(maxsize=None)
+def load_places(path: Path | str = GAZETTEER_PATH) -> tuple[Place, ...]:
+    with open(path, newline="", encoding="utf-8") as handle:
+        return tuple(
+            Place(
+                row["name"].strip(),
+                row["state"].strip(),
+                float(row["latitude"]),
+                float(row["longitude"]),
+                tuple(
+                    normalize_name(alias)
+                    for alias in row["aliases"].split(";")
+                    if normalize_name(alias)
+                ),
+            )
+            for row in csv.DictReader(handle)
+        )
+
+
+@lru_cache(maxsize=None)
+def _places_by_spelling() -> dict[str, Place]:
+    return {spelling: place for place in load_places() for spelling in place.spellings}
+
+
+def lookup(value: str | None) -> Place | None:
+    """Return the gazetteer entry for any known spelling of a city, or ``None``."""
+    return _places_by_spelling().get(normalize_name(value))
@@ -0,0 +1,153 @@
+"""Grid index over geocoded cities for ``radius_km`` filters.
+
+Profiles are located through their canonical city, so a radius query never
+touches profiles: the cities around a point are found by reading the grid
+cells that overlap the query's bounding box and running one vectorized
+haversine pass over the cities in them.  The resulting city ids then select
+candidate pool segments like any other city filter.
+
+The grid lives in process memory.  ``City`` signals drop it in the process
+that made the change; other processes rebuild it after
+``GEO_GRID_REFRESH_SECONDS``.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .candidate_pools import UNKNOWN
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+CELL_DEGREES = 1.0
+MAX_RADIUS_KM = 3000.0
+
+
+def haversine_km(latitude: float, longitude: float, latitudes, longitudes) -> np.ndarray:
+    """Great-circle distance from one point to arrays of points, in kilometres."""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _cell(latitude: float, longitude: float) -> tuple[int, int]:
+    return math.floor(latitude / CELL_DEGREES), math.floor(longitude / CELL_DEGREES)
+
+
+class CityGrid:
+    """City coordinates bucketed into ``CELL_DEGREES`` square cells."""
+
+    def __init__(self, rows: Iterable[tuple[int, float, float]]) -> None:
+        rows = sorted(rows)
+        self.city_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.latitudes = np.array([row[1] for row in rows], dtype=np.float64)
+        self.longitudes = np.array([row[2] for row in rows], dtype=np.float64)
+        buckets: dict[tuple[int, int], list[int]] = {}
+        for position, (_, latitude, longitude) in enumerate(rows):
+            buckets.setdefault(_cell(latitude, longitude), []).append(position)
+        # cell -> positions into the arrays above
+        self.cells = {key: np.array(value, dtype=np.int64) for key, value in buckets.items()}
+
+    @classmethod
+    def build(cls) -> "CityGrid":
+        from .models import City
+
+        return cls(
+            City.objects.filter(latitude__isnull=False, longitude__isnull=False)
+            .values_list("id", "latitude", "longitude")
+            .iterator()
+        )
+
+    def __len__(self) -> int:
+        return len(self.city_ids)
+
+    def location(self, city_id: int | None) -> tuple[float, float] | None:
+        if not city_id or not len(self.city_ids):
+            return None
+        position = int(np.searchsorted(self.city_ids, city_id))
+        if position == len(self.city_ids) or self.city_ids[position] != city_id:
+            return None
+        return float(self.latitudes[position]), float(self.longitudes[position])
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> set[int]:
+        """Ids of the cities within ``radius_km`` of the given point."""
+        lat_span = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles; clamp so the span stays finite.
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        low_row, low_col = _cell(latitude - lat_span, longitude - lon_span)
+        high_row, high_col = _cell(latitude + lat_span, longitude + lon_span)
+        found = [
+            self.cells[key]
+            for key in (
+                (row, col)
+                for row in range(low_row, high_row + 1)
+                for col in range(low_col, high_col + 1)
+            )
+            if key in self.cells
+        ]
+        if not found:
+            return set()
+        positions = np.concatenate(found)
+        distances = haversine_km(
+            latitude, longitude, self.latitudes[positions], self.longitudes[positions]
+        )
+        return set(self.city_ids[positions[distances <= radius_km]].tolist())
+
+
+_lock = threading.Lock()
+_grid: CityGrid | None = None
+_built_at = 0.0
+
+
+def get_city_grid() -> CityGrid:
+    global _grid, _built_at
+    refresh_seconds = getattr(settings, "GEO_GRID_REFRESH_SECONDS", 3600)
+    with _lock:
+        if _grid is None or time.monotonic() - _built_at > refresh_seconds:
+            _grid = CityGrid.build()
+            _built_at = time.monotonic()
+        return _grid
+
+
+def invalidate_city_grid() -> None:
+    global _grid
+    with _lock:
+        _grid = None
+
+
+def parse_radius(value: str | None) -> float | None:
+    """Validate a ``radius_km`` query param; ``None`` when it is absent."""
+    if value in (None, ""):
+        return None
+    try:
+        radius_km = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError({"radius_km": "Must be a number of kilometres."})
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValidationError({"radius_km": f"Must be between 0 and {MAX_RADIUS_KM:g} km."})
+    return radius_km
+
+
+def nearby_city_ids(city_id: int, radius_km: float) -> frozenset[int] | int:
+    """City filter for everything within ``radius_km`` of ``city_id``.
+
+    Falls back to the city itself when it has no coordinates, and passes
+    ``UNKNOWN`` through so an unmatched city still selects nothing.
+    """
+    if city_id == UNKNOWN:
+        return UNKNOWN
+    grid = get_city_grid()
+    location = grid.location(city_id)
+    if location is None:
+        return frozenset({city_id})
+    return frozenset(grid.within(*location, radius_km) | {city_id})
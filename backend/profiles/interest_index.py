@@ -0,0 +1,278 @@
+"""In-memory interest bitset index used to rank match suggestions.
+
+Every profile gets one row of ``uint64`` words where bit ``n`` is set when the
+profile has the interest with primary key ``n``.  Shared-interest scores for a
+whole candidate set are then a single ``AND`` + popcount over the rows instead
+of a ``GROUP BY`` over ``profiles_profile_interests``.
+
+When ``INTEREST_INDEX_DIR`` is configured the arrays are loaded from ``.npy``
+files with copy-on-write memory mapping, so every worker on the host shares the
+same pages (see the ``build_interest_index`` management command).  Otherwise
+the index is built from the database on first use.  Changes to
+``Profile.interests`` are applied incrementally in the process that made them
+and bump ``Profile.updated_at``; every ``INTEREST_INDEX_REFRESH_SECONDS`` each
+process rebuilds the index, or reloads the files and re-applies the profiles
+updated since they were built, so other processes' edits are picked up too.
+
+Overlay rows are replaced copy-on-write, so readers never iterate a dict that
+a signal handler on another thread is changing.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from django.conf import settings
+
+WORD_BITS = 64
+PROFILE_IDS_FILE = "profile_ids.npy"
+BITS_FILE = "bits.npy"
+BUILT_AT_FILE = "built_at.npy"
+
+if hasattr(np, "bitwise_count"):
+
+    def _row_popcount(rows: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(rows).sum(axis=1, dtype=np.int64)
+
+else:  # pragma: no cover - numpy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _row_popcount(rows: np.ndarray) -> np.ndarray:
+        as_bytes = np.ascontiguousarray(rows).view(np.uint8)
+        return _BYTE_COUNTS[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+class InterestIndex:
+    """Bitset rows keyed by profile id, sorted for ``searchsorted`` lookups."""
+
+    def __init__(
+        self, profile_ids: np.ndarray, bits: np.ndarray, built_at: float | None = None
+    ) -> None:
+        self.profile_ids = profile_ids
+        self.bits = bits
+        self.words = bits.shape[1]
+        # Wall-clock time the rows were read from the database.
+        self.built_at = time.time() if built_at is None else built_at
+        # Rows changed since the arrays were built; merged by ``compact``.
+        # Never mutated in place: writers swap in a new dict under the lock.
+        self._overlay: dict[int, np.ndarray] = {}
+        self._overlay_lock = threading.Lock()
+
+    @classmethod
+    def from_pairs(
+        cls,
+        profile_ids: Iterable[int],
+        pairs: Iterable[tuple[int, int]],
+        max_interest_id: int = 0,
+    ) -> "InterestIndex":
+        ids = np.unique(np.fromiter(profile_ids, dtype=np.int64))
+        pair_array = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+        if len(pair_array):
+            max_interest_id = max(max_interest_id, int(pair_array[:, 1].max()))
+        words = max_interest_id // WORD_BITS + 1
+        bits = np.zeros((len(ids), words), dtype=np.uint64)
+        if len(pair_array) and len(ids):
+            rows = np.searchsorted(ids, pair_array[:, 0])
+            valid = (rows < len(ids)) & (ids[np.minimum(rows, len(ids) - 1)] == pair_array[:, 0])
+            rows = rows[valid]
+            interests = pair_array[valid, 1]
+            masks = np.left_shift(np.uint64(1), (interests % WORD_BITS).astype(np.uint64))
+            np.bitwise_or.at(bits, (rows, interests // WORD_BITS), masks)
+        return cls(ids, bits)
+
+    @classmethod
+    def build(cls) -> "InterestIndex":
+        from django.db.models import Max
+
+        from .models import Interest, Profile
+
+        through = Profile.interests.through
+        built_at = time.time()
+        max_interest_id = Interest.objects.aggregate(value=Max("id"))["value"] or 0
+        index = cls.from_pairs(
+            Profile.objects.values_list("id", flat=True).iterator(),
+            through.objects.values_list("profile_id", "interest_id").iterator(),
+            max_interest_id=max_interest_id,
+        )
+        index.built_at = built_at
+        return index
+
+    @classmethod
+    def load(cls, directory: Path | str, mmap_mode: str | None = "c") -> "InterestIndex":
+        directory = Path(directory)
+        profile_ids = np.load(directory / PROFILE_IDS_FILE, mmap_mode=mmap_mode)
+        bits = np.load(directory / BITS_FILE, mmap_mode=mmap_mode)
+        built_at_path = directory / BUILT_AT_FILE
+        if built_at_path.exists():
+            built_at = float(np.load(built_at_path)[0])
+        else:
+            built_at = (directory / BITS_FILE).stat().st_mtime
+        return cls(profile_ids, bits, built_at)
+
+    def save(self, directory: Path | str) -> None:
+        self.compact()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        # Write next to the live files and swap, so readers never see a torn file.
+        arrays = (
+            (PROFILE_IDS_FILE, self.profile_ids),
+            (BITS_FILE, self.bits),
+            (BUILT_AT_FILE, np.array([self.built_at])),
+        )
+        for name, array in arrays:
+            tmp_path = directory / f".{name}.tmp"
+            with open(tmp_path, "wb") as handle:
+                np.save(handle, np.ascontiguousarray(array))
+            tmp_path.replace(directory / name)
+
+    def __len__(self) -> int:
+        return len(self.profile_ids) + sum(
+            1 for pid in self._overlay.copy() if not self._in_base(pid)
+        )
+
+    def encode(self, interest_ids: Iterable[int]) -> np.ndarray:
+        row = np.zeros(self.words, dtype=np.uint64)
+        ids = np.fromiter((int(i) for i in interest_ids), dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < self.words * WORD_BITS)]
+        if len(ids):
+            masks = np.left_shift(np.uint64(1), (ids % WORD_BITS).astype(np.uint64))
+            np.bitwise_or.at(row, ids // WORD_BITS, masks)
+        return row
+
+    def fits(self, interest_ids: Iterable[int]) -> bool:
+        return all(0 <= int(i) < self.words * WORD_BITS for i in interest_ids)
+
+    def set_interests(self, profile_id: int, interest_ids: Iterable[int]) -> None:
+        self._set_rows({int(profile_id): self.encode(interest_ids)})
+
+    def discard(self, profile_id: int) -> None:
+        self._set_rows({int(profile_id): np.zeros(self.words, dtype=np.uint64)})
+
+    def _set_rows(self, rows: dict[int, np.ndarray]) -> None:
+        with self._overlay_lock:
+            self._overlay = {**self._overlay, **rows}
+
+    def apply_updates_since(self, since: float) -> bool:
+        """Re-read the interests of profiles updated since ``since`` (a timestamp).
+
+        Returns ``False`` when one of them no longer fits the row width.
+        """
+        from .models import Profile
+
+        changed_since = datetime.fromtimestamp(since, tz=timezone.utc)
+        changed = Profile.objects.filter(updated_at__gte=changed_since)
+        interests: dict[int, list[int]] = {
+            profile_id: [] for profile_id in changed.values_list("id", flat=True).iterator()
+        }
+        through = Profile.interests.through.objects.filter(profile__updated_at__gte=changed_since)
+        for profile_id, interest_id in through.values_list("profile_id", "interest_id").iterator():
+            interests.setdefault(profile_id, []).append(interest_id)
+        if not all(self.fits(ids) for ids in interests.values()):
+            return False
+        if interests:
+            self._set_rows({pid: self.encode(ids) for pid, ids in interests.items()})
+        return True
+
+    def rows(self, profile_ids: Iterable[int] | np.ndarray) -> np.ndarray:
+        candidates = np.asarray(profile_ids, dtype=np.int64)
+        rows = np.zeros((len(candidates), self.words), dtype=np.uint64)
+        if len(self.profile_ids) and len(candidates):
+            positions = np.searchsorted(self.profile_ids, candidates)
+            positions = np.minimum(positions, len(self.profile_ids) - 1)
+            found = self.profile_ids[positions] == candidates
+            rows[found] = self.bits[positions[found]]
+        overlay = self._overlay
+        if overlay and len(candidates):
+            overlay_ids = np.fromiter(overlay, dtype=np.int64)
+            for position in np.flatnonzero(np.isin(candidates, overlay_ids)):
+                rows[position] = overlay[int(candidates[position])]
+        return rows
+
+    def shared_counts(
+        self, interest_ids: Iterable[int], profile_ids: Iterable[int] | np.ndarray
+    ) -> np.ndarray:
+        """Return the number of ``interest_ids`` each profile in ``profile_ids`` has."""
+        query = self.encode(interest_ids)
+        if not query.any():
+            return np.zeros(len(np.asarray(profile_ids)), dtype=np.int64)
+        return _row_popcount(self.rows(profile_ids) & query)
+
+    def compact(self) -> None:
+        """Fold overlay rows back into the sorted base arrays (before sharing the index)."""
+        with self._overlay_lock:
+            overlay = self._overlay
+            if not overlay:
+                return
+            overlay_ids = np.fromiter(sorted(overlay), dtype=np.int64)
+            merged_ids = np.union1d(np.asarray(self.profile_ids), overlay_ids)
+            merged_bits = np.zeros((len(merged_ids), self.words), dtype=np.uint64)
+            if len(self.profile_ids):
+                merged_bits[np.searchsorted(merged_ids, self.profile_ids)] = self.bits
+            merged_bits[np.searchsorted(merged_ids, overlay_ids)] = np.stack(
+                [overlay[int(pid)] for pid in overlay_ids]
+            )
+            self.profile_ids = merged_ids
+            self.bits = merged_bits
+            self._overlay = {}
+
+    def _in_base(self, profile_id: int) -> bool:
+        if not len(self.profile_ids):
+            return False
+        position = int(np.searchsorted(self.profile_ids, profile_id))
+        return position < len(self.profile_ids) and int(self.profile_ids[position]) == profile_id
+
+
+_lock = threading.Lock()
+_index: InterestIndex | None = None
+_loaded_at = 0.0
+
+
+def _load() -> InterestIndex:
+    directory = getattr(settings, "INTEREST_INDEX_DIR", "")
+    if directory and (Path(directory) / BITS_FILE).exists():
+        index = InterestIndex.load(directory)
+        # The files only change when build_interest_index reruns; edits made
+        # since, in any process, are re-read from the database.
+        if index.apply_updates_since(index.built_at):
+            return index
+    return InterestIndex.build()
+
+
+def get_interest_index() -> InterestIndex:
+    global _index, _loaded_at
+    refresh_seconds = getattr(settings, "INTEREST_INDEX_REFRESH_SECONDS", 300)
+    with _lock:
+        if _index is None or time.monotonic() - _loaded_at > refresh_seconds:
+            _index = _load()
+            _loaded_at = time.monotonic()
+        return _index
+
+
+def invalidate_interest_index() -> None:
+    global _index
+    with _lock:
+        _index = None
+
+
+def update_profile_interests(profile_id: int, interest_ids: Iterable[int]) -> None:
+    interest_ids = list(interest_ids)
+    with _lock:
+        index = _index
+    if index is None:
+        return
+    if not index.fits(interest_ids):
+        # A new interest outgrew the row width; rebuild lazily on next use.
+        invalidate_interest_index()
+        return
+    index.set_interests(profile_id, interest_ids)
+
+
+def discard_profile(profile_id: int) -> None:
+    with _lock:
+        index = _index
+    if index is not None:
+        index.discard(profile_id)
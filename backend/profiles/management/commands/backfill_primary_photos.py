@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from profiles.models import Profile, ProfilePhoto
+
+
+class Command(BaseCommand):
+    help = "Point every profile's primary_photo at its newest photo and cache the URL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        newest = ProfilePhoto.objects.filter(profile=OuterRef("pk")).values("pk")[:1]
+        updated = last_id = 0
+        while True:
+            profiles = list(
+                Profile.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .annotate(newest_photo_id=Subquery(newest))
+                .only("pk", "primary_photo_id", "primary_photo_url")[:batch_size]
+            )
+            if not profiles:
+                break
+            last_id = profiles[-1].pk
+            photos = ProfilePhoto.objects.in_bulk(
+                [p.newest_photo_id for p in profiles if p.newest_photo_id]
+            )
+            changed = []
+            for profile in profiles:
+                photo = photos.get(profile.newest_photo_id)
+                url = photo.image.url if photo is not None and photo.image else ""
+                if (profile.primary_photo_id, profile.primary_photo_url) != (
+                    profile.newest_photo_id,
+                    url,
+                ):
+                    profile.primary_photo_id, profile.primary_photo_url = profile.newest_photo_id, url
+                    changed.append(profile)
+            # bulk_update skips save() and signals, so updated_at is left alone.
+            Profile.objects.bulk_update(changed, ["primary_photo", "primary_photo_url"])
+            updated += len(changed)
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} profiles."))
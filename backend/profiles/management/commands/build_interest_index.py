@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from profiles.interest_index import InterestIndex
+
+
+class Command(BaseCommand):
+    help = "Build the interest bitset index and write it for memory-mapped loading."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=getattr(settings, "INTEREST_INDEX_DIR", ""),
+            help="Directory to write the index to (defaults to INTEREST_INDEX_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if not output:
+            raise CommandError("Set INTEREST_INDEX_DIR or pass --output.")
+        index = InterestIndex.build()
+        index.save(output)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {len(index)} profiles over {index.words * 64} interest bits in {output}."
+            )
+        )
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from profiles.gazetteer import GAZETTEER_PATH, load_places
+from profiles.models import City, CityAlias
+
+
+class Command(BaseCommand):
+    help = "Load city coordinates and alternate spellings from the bundled gazetteer."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=str(GAZETTEER_PATH),
+            help="CSV with name,state,latitude,longitude,aliases columns.",
+        )
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Replace coordinates that were already set (e.g. edited in the admin).",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        created = located = 0
+        for place in load_places(options["path"]):
+            # Reuse whichever city a spelling is already registered under, so
+            # existing profile references keep pointing at the same row.
+            canonical_id = (
+                CityAlias.objects.filter(alias__in=place.spellings)
+                .values_list("canonical_id", flat=True)
+                .first()
+            )
+            city = City.objects.filter(pk=canonical_id).first() if canonical_id else None
+            if city is None:
+                city = City.objects.filter(name__iexact=place.name).first()
+            if city is None:
+                city = City.objects.create(
+                    name=place.name,
+                    state=place.state,
+                    latitude=place.latitude,
+                    longitude=place.longitude,
+                )
+                created += 1
+            elif options["overwrite"] or city.latitude is None or city.longitude is None:
+                city.state = place.state
+                city.latitude, city.longitude = place.latitude, place.longitude
+                city.save(update_fields=["state", "latitude", "longitude"])
+                located += 1
+
+            for spelling in place.spellings:
+                alias, _ = CityAlias.objects.get_or_create(
+                    alias=spelling, defaults={"canonical": city}
+                )
+                if alias.canonical_id != city.pk:
+                    self.stderr.write(
+                        f"'{spelling}' already points at city {alias.canonical_id}, "
+                        f"not {city.name} ({city.pk}); merge them in the admin."
+                    )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} cities and located {located} existing ones.")
+        )
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from profiles.candidate_pools import CandidatePools, request_rebuild
+from profiles.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Rebuild the segmented candidate pools from scratch and verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check-only",
+            action="store_true",
+            help="Verify a fresh build without asking running workers to rebuild.",
+        )
+
+    def handle(self, *args, **options):
+        pools = CandidatePools.build()
+        problems = pools.verify(Profile.objects.values(*CandidatePools.FIELDS).iterator())
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError(f"Candidate pools failed verification ({len(problems)} problems).")
+
+        total = sum(len(segment) for segment in pools.segments.values())
+        self.stdout.write(f"Built {len(pools.segments)} segments with {total} profiles.")
+        if not options["check_only"]:
+            request_rebuild()
+            self.stdout.write(self.style.SUCCESS("Workers will rebuild their pools on next use."))
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_remove_profile_photos_profilephoto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'cities',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Religion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='profilephoto',
+            options={'ordering': ['-uploaded_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='profiles.city'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='preferred_city_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='profiles.city'),
+        ),
+        migrations.CreateModel(
+            name='CityAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('canonical', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='profiles.city')),
+            ],
+            options={
+                'verbose_name_plural': 'city aliases',
+            },
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='preferred_religion_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='profiles.religion'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='religion_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='profiles.religion'),
+        ),
+        migrations.CreateModel(
+            name='ReligionAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('canonical', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='profiles.religion')),
+            ],
+            options={
+                'verbose_name_plural': 'religion aliases',
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+REFERENCE_FIELDS = (
+    ("city", "city_ref", "City", "CityAlias"),
+    ("religion", "religion_ref", "Religion", "ReligionAlias"),
+    ("preferred_city", "preferred_city_ref", "City", "CityAlias"),
+    ("preferred_religion", "preferred_religion_ref", "Religion", "ReligionAlias"),
+)
+
+
+def _normalize(value):
+    return " ".join((value or "").split()).casefold()
+
+
+def backfill_references(apps, schema_editor):
+    Profile = apps.get_model("profiles", "Profile")
+    resolved = {}
+
+    def resolve(model_name, alias_name, value):
+        key = _normalize(value)
+        if not key:
+            return None
+        if (model_name, key) not in resolved:
+            Canonical = apps.get_model("profiles", model_name)
+            Alias = apps.get_model("profiles", alias_name)
+            alias = Alias.objects.filter(alias=key).first()
+            if alias is None:
+                name = " ".join(value.split())
+                canonical = Canonical.objects.filter(name__iexact=name).first()
+                if canonical is None:
+                    canonical = Canonical.objects.create(name=name)
+                alias = Alias.objects.create(alias=key, canonical=canonical)
+            resolved[(model_name, key)] = alias.canonical_id
+        return resolved[(model_name, key)]
+
+    # Walk the table by primary key in small chunks so no single statement
+    # holds locks on the whole profiles table.
+    last_id = 0
+    while True:
+        chunk = list(Profile.objects.filter(id__gt=last_id).order_by("id")[:CHUNK_SIZE])
+        if not chunk:
+            break
+        for profile in chunk:
+            for text_field, ref_field, model_name, alias_name in REFERENCE_FIELDS:
+                setattr(
+                    profile,
+                    f"{ref_field}_id",
+                    resolve(model_name, alias_name, getattr(profile, text_field)),
+                )
+        Profile.objects.bulk_update(chunk, [ref for _, ref, _, _ in REFERENCE_FIELDS])
+        last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("profiles", "0004_city_religion_references"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_references, migrations.RunPython.noop),
+    ]
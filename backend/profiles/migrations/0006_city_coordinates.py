@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def locate_cities(apps, schema_editor):
+    from profiles.gazetteer import lookup
+
+    City = apps.get_model("profiles", "City")
+    located = []
+    for city in City.objects.filter(latitude__isnull=True):
+        place = lookup(city.name)
+        if place is not None:
+            city.state = city.state or place.state
+            city.latitude, city.longitude = place.latitude, place.longitude
+            located.append(city)
+    City.objects.bulk_update(located, ["state", "latitude", "longitude"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_backfill_city_religion_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='state',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.RunPython(locate_cities, migrations.RunPython.noop),
+    ]
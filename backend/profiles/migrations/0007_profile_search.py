@@ -0,0 +1,76 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE profiles_profile ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(profession, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(education, '')), 'B')
+        || setweight(to_tsvector('english'::regconfig, coalesce(bio, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX profiles_profile_search_gin ON profiles_profile USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS profiles_profile_search_gin",
+    "ALTER TABLE profiles_profile DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE profiles_profile_search USING fts5(
+        profession, education, bio, tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO profiles_profile_search (rowid, profession, education, bio)
+    SELECT id, profession, education, bio FROM profiles_profile
+    """,
+    """
+    CREATE TRIGGER profiles_profile_search_insert AFTER INSERT ON profiles_profile BEGIN
+        INSERT INTO profiles_profile_search (rowid, profession, education, bio)
+        VALUES (new.id, new.profession, new.education, new.bio);
+    END
+    """,
+    """
+    CREATE TRIGGER profiles_profile_search_update
+    AFTER UPDATE OF profession, education, bio ON profiles_profile BEGIN
+        DELETE FROM profiles_profile_search WHERE rowid = old.id;
+        INSERT INTO profiles_profile_search (rowid, profession, education, bio)
+        VALUES (new.id, new.profession, new.education, new.bio);
+    END
+    """,
+    """
+    CREATE TRIGGER profiles_profile_search_delete AFTER DELETE ON profiles_profile BEGIN
+        DELETE FROM profiles_profile_search WHERE rowid = old.id;
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS profiles_profile_search_delete",
+    "DROP TRIGGER IF EXISTS profiles_profile_search_update",
+    "DROP TRIGGER IF EXISTS profiles_profile_search_insert",
+    "DROP TABLE IF EXISTS profiles_profile_search",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0006_city_coordinates"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_profile_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='primary_photo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='profiles.profilephoto'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='primary_photo_url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
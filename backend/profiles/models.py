@@ -1,8 +1,9 @@
 from __future__ import annotations
 from datetime import date
+from functools import partial
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.html import format_html  # for admin image preview
 from urllib.parse import urljoin
 
@@ -19,6 +20,145 @@ class Interest(models.Model):
         return self.name
 
 
+def normalize_name(value: str | None) -> str:
+    """Alias lookup key: surrounding/repeated whitespace collapsed, case folded."""
+    return " ".join((value or "").split()).casefold()
+
+
+class CanonicalName(models.Model):
+    """Canonical spelling of a free-text profile attribute (city, religion)."""
+
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        abstract = True
+        ordering = ["name"]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.name
+
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        # The canonical spelling is always an alias of itself.
+        self.alias_model().objects.get_or_create(
+            alias=normalize_name(self.name), defaults={"canonical": self}
+        )
+
+    @classmethod
+    def alias_model(cls):
+        return cls._meta.get_field("aliases").related_model
+
+    @classmethod
+    def canonical_spelling(cls, value: str) -> str:
+        """Name to register an unknown ``value`` under."""
+        return " ".join(value.split())
+
+    @classmethod
+    def resolve_id(cls, value: str | None, create: bool = False) -> int | None:
+        """Return the canonical id for ``value`` via its alias, optionally registering it."""
+        key = normalize_name(value)
+        if not key:
+            return None
+        cached = _canonical_ids.get((cls, key))
+        if cached is not None:
+            return cached
+        name = cls.canonical_spelling(value)
+        # Also try the canonical spelling, so a known variant resolves before
+        # anyone has registered it as an alias.
+        spellings = (key, normalize_name(name))
+        aliases = cls.alias_model().objects.filter(alias__in=spellings)
+
+        def lookup() -> int | None:
+            found = dict(aliases.values_list("alias", "canonical_id"))
+            return next((found[alias] for alias in spellings if alias in found), None)
+
+        canonical_id = lookup()
+        if canonical_id is None and create:
+            try:
+                with transaction.atomic():
+                    canonical = cls.objects.filter(name__iexact=name).first()
+                    if canonical is None:
+                        canonical = cls.objects.create(name=name)
+                    canonical_id = (
+                        cls.alias_model()
+                        .objects.get_or_create(alias=key, defaults={"canonical": canonical})[0]
+                        .canonical_id
+                    )
+            except IntegrityError:  # registered concurrently
+                canonical_id = lookup()
+        if canonical_id is not None:
+            # Only remember ids once committed, so a rolled-back registration
+            # never leaves a dangling id behind.
+            transaction.on_commit(partial(_canonical_ids.__setitem__, (cls, key), canonical_id))
+        return canonical_id
+
+
+# (model, alias) -> canonical id, per process; cleared when aliases change.
+_canonical_ids: dict[tuple[type, str], int] = {}
+
+
+def forget_canonical_ids() -> None:
+    _canonical_ids.clear()
+
+
+class City(CanonicalName):
+    state = models.CharField(max_length=100, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    class Meta(CanonicalName.Meta):
+        verbose_name_plural = "cities"
+
+    @classmethod
+    def canonical_spelling(cls, value: str) -> str:
+        from .gazetteer import lookup
+
+        place = lookup(value)
+        return place.name if place else super().canonical_spelling(value)
+
+    def save(self, *args, **kwargs) -> None:
+        if self.latitude is None or self.longitude is None:
+            from .gazetteer import lookup
+
+            place = lookup(self.name)
+            if place is not None:
+                self.state = self.state or place.state
+                self.latitude, self.longitude = place.latitude, place.longitude
+        super().save(*args, **kwargs)
+
+    @property
+    def coordinates(self) -> tuple[float, float] | None:
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
+
+
+class Religion(CanonicalName):
+    pass
+
+
+class CityAlias(models.Model):
+    alias = models.CharField(max_length=100, unique=True)
+    canonical = models.ForeignKey(City, on_delete=models.CASCADE, related_name="aliases")
+
+    class Meta:
+        verbose_name_plural = "city aliases"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.alias} -> {self.canonical_id}"
+
+
+class ReligionAlias(models.Model):
+    alias = models.CharField(max_length=100, unique=True)
+    canonical = models.ForeignKey(Religion, on_delete=models.CASCADE, related_name="aliases")
+
+    class Meta:
+        verbose_name_plural = "religion aliases"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.alias} -> {self.canonical_id}"
+
+
 class Profile(models.Model):
     GENDER_CHOICES = (
         ("male", "Male"),
@@ -50,6 +190,28 @@ class Profile(models.Model):
     preferred_city = models.CharField(max_length=100, blank=True)
     preferred_religion = models.CharField(max_length=100, blank=True)
 
+    # Canonical ids for the free-text fields above, kept in sync by ``save``
+    # so filtering compares indexed integers instead of ``UPPER(...)``.
+    city_ref = models.ForeignKey(
+        City, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    religion_ref = models.ForeignKey(
+        Religion, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    preferred_city_ref = models.ForeignKey(
+        City, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    preferred_religion_ref = models.ForeignKey(
+        Religion, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+
+    # Newest photo and its storage URL, maintained by ``refresh_primary_photo``
+    # so cards never touch the photos table or the storage backend.
+    primary_photo = models.ForeignKey(
+        "ProfilePhoto", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    primary_photo_url = models.CharField(max_length=500, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -64,6 +226,46 @@ class Profile(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return f"Profile({self.user.username})"
 
+    REFERENCE_FIELDS = (
+        ("city", "city_ref", City),
+        ("religion", "religion_ref", Religion),
+        ("preferred_city", "preferred_city_ref", City),
+        ("preferred_religion", "preferred_religion_ref", Religion),
+    )
+
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get("update_fields")
+        synced = []
+        for text_field, ref_field, model in self.REFERENCE_FIELDS:
+            if update_fields is not None and text_field not in update_fields:
+                continue
+            setattr(
+                self, f"{ref_field}_id", model.resolve_id(getattr(self, text_field), create=True)
+            )
+            synced.append(ref_field)
+        if update_fields is not None and synced:
+            kwargs["update_fields"] = {*update_fields, *synced}
+        super().save(*args, **kwargs)
+
+    def refresh_primary_photo(self) -> None:
+        """Point ``primary_photo`` at the newest photo without touching ``updated_at``."""
+        photo = ProfilePhoto.objects.filter(profile_id=self.pk).first()
+        self.primary_photo = photo
+        self.primary_photo_url = photo.image.url if photo is not None and photo.image else ""
+        Profile.objects.filter(pk=self.pk).update(
+            primary_photo=photo, primary_photo_url=self.primary_photo_url
+        )
+
+    def get_primary_photo_url(self, request=None) -> str:
+        return absolute_media_url(self.primary_photo_url, request)
+
+    @property
+    def coordinates(self) -> tuple[float, float] | None:
+        """``(latitude, longitude)`` of the profile's city, when it is geocoded."""
+        from .geo import get_city_grid
+
+        return get_city_grid().location(self.city_ref_id)
+
     @property
     def age(self) -> int | None:
         if not self.dob:
@@ -74,6 +276,28 @@ class Profile(models.Model):
         )
 
 
+def absolute_media_url(url: str, request=None) -> str:
+    """Make a storage URL absolute, handling CDN/base overrides."""
+    if not url:
+        return ""
+
+    if url.startswith("http://") or url.startswith("https://"):
+        return url
+
+    media_base = getattr(settings, "MEDIA_CDN_URL", "") or ""
+    if media_base:
+        return urljoin(media_base.rstrip("/") + "/", url.lstrip("/"))
+
+    if request is not None:
+        return request.build_absolute_uri(url)
+
+    site_base = getattr(settings, "SITE_BASE_URL", "") or ""
+    if site_base:
+        return urljoin(site_base.rstrip("/") + "/", url.lstrip("/"))
+
+    return url
+
+
 # ✅ new model for multiple photo uploads
 class ProfilePhoto(models.Model):
     profile = models.ForeignKey(
@@ -92,23 +316,7 @@ class ProfilePhoto(models.Model):
         """Return an absolute URL for this photo, handling CDN/base overrides."""
         if not self.image:
             return ""
-
-        url = self.image.url
-        if url.startswith("http://") or url.startswith("https://"):
-            return url
-
-        media_base = getattr(settings, "MEDIA_CDN_URL", "") or ""
-        if media_base:
-            return urljoin(media_base.rstrip("/") + "/", url.lstrip("/"))
-
-        if request is not None:
-            return request.build_absolute_uri(url)
-
-        site_base = getattr(settings, "SITE_BASE_URL", "") or ""
-        if site_base:
-            return urljoin(site_base.rstrip("/") + "/", url.lstrip("/"))
-
-        return url
+        return absolute_media_url(self.image.url, request)
 
     def image_tag(self):
         """Show thumbnail preview in Django admin"""
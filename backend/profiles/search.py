@@ -0,0 +1,116 @@
+"""Full-text search over profile bio, profession and education.
+
+The index is maintained by the database itself (see migration
+``0007_profile_search``), so every save and ``QuerySet.update`` keeps it in
+sync:
+
+* PostgreSQL: a generated, weighted ``tsvector`` column with a GIN index,
+  queried with ``websearch_to_tsquery`` and ranked by ``ts_rank_cd``.
+* SQLite: an FTS5 table keyed by profile id and fed by triggers, ranked by
+  ``bm25``.  Django rebuilds SQLite tables for many schema changes, which
+  drops their triggers, so ``ensure_sqlite_triggers`` recreates them after
+  every ``migrate``.
+
+Other backends fall back to ``icontains`` matching without ranking.
+"""
+from __future__ import annotations
+
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ("profession", "education", "bio")
+SEARCH_CONFIG = "english"
+FTS_TABLE = "profiles_profile_search"
+# Column weights for bm25(), in SEARCH_FIELDS order, mirroring the tsvector weights A/B/C.
+FTS_WEIGHTS = (4.0, 2.0, 1.0)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON profiles_profile BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, profession, education, bio)
+        VALUES (new.id, new.profession, new.education, new.bio);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF profession, education, bio ON profiles_profile BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, profession, education, bio)
+        VALUES (new.id, new.profession, new.education, new.bio);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON profiles_profile BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+)
+
+
+def ensure_sqlite_triggers(using: str = "default") -> None:
+    """Recreate the FTS5 sync triggers if a table rebuild dropped them."""
+    db = connections[using]
+    if db.vendor != "sqlite" or FTS_TABLE not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def fts5_query(text: str) -> str:
+    """Quote each word of ``text`` as a prefix term; FTS5 ANDs them together.
+
+    Quoting keeps user input from being parsed as FTS5 query syntax.
+    """
+    return " ".join(f'"{word}"*' for word in _WORD.findall(text))
+
+
+def search_profiles(queryset: QuerySet, text: str | None) -> QuerySet:
+    """Restrict ``queryset`` to profiles matching ``text``, best match first.
+
+    Matches are annotated with ``search_rank`` (higher is better), so the
+    result still composes with further filters.
+    """
+    if not text or not _WORD.search(text):
+        return queryset
+    table = queryset.model._meta.db_table
+    if connection.vendor == "postgresql":
+        condition = RawSQL(
+            f'"{table}"."search_vector" @@ websearch_to_tsquery(%s::regconfig, %s)',
+            (SEARCH_CONFIG, text),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f'ts_rank_cd("{table}"."search_vector", websearch_to_tsquery(%s::regconfig, %s))',
+            (SEARCH_CONFIG, text),
+            output_field=FloatField(),
+        )
+        queryset = queryset.filter(condition).annotate(search_rank=rank)
+    elif connection.vendor == "sqlite":
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        # bm25() is only available inside the full-text query itself, so
+        # rank in a correlated subquery restricted to the matching rowid.
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "{table}"."id"',
+            (fts5_query(text),),
+            output_field=FloatField(),
+        )
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (fts5_query(text),)
+        )
+        queryset = queryset.filter(pk__in=matches).annotate(search_rank=rank)
+    else:
+        condition = Q()
+        for word in _WORD.findall(text):
+            condition &= Q(
+                *(Q(**{f"{field}__icontains": word}) for field in SEARCH_FIELDS),
+                _connector=Q.OR,
+            )
+        queryset = queryset.filter(condition).annotate(search_rank=Value(0.0))
+    return queryset.order_by("-search_rank", "-updated_at")
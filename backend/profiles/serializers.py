@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from matches.generations import bump_user
 
 from .models import Interest, Profile, ProfilePhoto
 
@@ -33,13 +36,35 @@ class ProfilePhotoSerializer(serializers.ModelSerializer):
         return obj.image.url
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+def requested_fields(request) -> set[str] | None:
+    """Field names from a ``?fields=a,b`` sparse fieldset on read requests, else ``None``."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get("fields", "")
+    return {name.strip() for name in raw.split(",") if name.strip()} or None
+
+
+class SparseFieldsetMixin:
+    """Drop every field not named in ``fields=`` (keyword argument or query param)."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = requested_fields(self.context.get("request"))
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     interests = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Interest.objects.all(), required=False
     )
     age = serializers.SerializerMethodField()
     photos = ProfilePhotoSerializer(many=True, read_only=True)
+    primary_photo = serializers.SerializerMethodField()
     new_photos = serializers.ListField(
         child=serializers.ImageField(), write_only=True, required=False
     )
@@ -63,6 +88,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             "interests",
             "bio",
             "photos",
+            "primary_photo",
             "is_email_verified",
             "preferred_gender",
             "preferred_age_min",
@@ -81,6 +107,9 @@ class ProfileSerializer(serializers.ModelSerializer):
     def get_age(self, obj: Profile) -> int | None:
         return obj.age
 
+    def get_primary_photo(self, obj: Profile) -> str:
+        return obj.get_primary_photo_url(request=self.context.get("request"))
+
     def update(self, instance: Profile, validated_data: dict) -> Profile:
         interests = validated_data.pop("interests", None)
         new_photos = validated_data.pop("new_photos", [])
@@ -98,4 +127,75 @@ class ProfileSerializer(serializers.ModelSerializer):
         for image in new_photos:
             ProfilePhoto.objects.create(profile=instance, image=image)
         instance.refresh_from_db()
+        bump_user(instance.user_id)
         return instance
+
+
+class ProfileCardSerializer(SparseFieldsetMixin, serializers.Serializer):
+    """Read-only summary of a profile for suggestion, match and chat lists.
+
+    Expects ``interests`` to be prefetched; the photo comes from the
+    denormalized ``Profile.primary_photo_url``.  The viewer's
+    interest ids are read from ``context["viewer_interest_ids"]`` when given,
+    else looked up once per serialization.
+    """
+
+    id = serializers.IntegerField(read_only=True)
+    user = serializers.IntegerField(source="user_id", read_only=True)
+    name = serializers.CharField(read_only=True)
+    age = serializers.IntegerField(read_only=True, allow_null=True)
+    city = serializers.CharField(read_only=True)
+    primary_photo = serializers.SerializerMethodField()
+    shared_interests = serializers.SerializerMethodField()
+
+    def get_primary_photo(self, obj: Profile) -> str:
+        return obj.get_primary_photo_url(request=self.context.get("request"))
+
+    def get_shared_interests(self, obj: Profile) -> list[int]:
+        viewer_ids = self._viewer_interest_ids()
+        return sorted(interest.id for interest in obj.interests.all() if interest.id in viewer_ids)
+
+    def _viewer_interest_ids(self) -> frozenset[int]:
+        ids = self.context.get("viewer_interest_ids")
+        if ids is None:
+            user = getattr(self.context.get("request"), "user", None)
+            ids = frozenset()
+            if user is not None and user.is_authenticated:
+                ids = frozenset(
+                    Profile.interests.through.objects.filter(profile__user=user).values_list(
+                        "interest_id", flat=True
+                    )
+                )
+            self.context["viewer_interest_ids"] = ids
+        return ids
+
+
+CARD_FIELDS = frozenset(ProfileCardSerializer._declared_fields)
+
+
+def profile_serializer_class(request):
+    """The card serializer when ``?fields=`` only asks for card fields, else the full one."""
+    fields = requested_fields(request)
+    if fields and fields <= CARD_FIELDS:
+        return ProfileCardSerializer
+    return ProfileSerializer
+
+
+def profile_prefetches(request) -> list[str]:
+    """Relations the serializer picked for ``request`` reads; photos only when listed in full."""
+    fields = requested_fields(request)
+    lookups = []
+    if fields is None or fields & {"interests", "shared_interests"}:
+        lookups.append("interests")
+    if profile_serializer_class(request) is ProfileSerializer and (
+        fields is None or "photos" in fields
+    ):
+        lookups.append("photos")
+    return lookups
+
+
+def profiles_by_user(user_ids, lookups=()) -> dict[int, Profile]:
+    """Profiles of ``user_ids`` keyed by user id: one query, plus one per prefetch lookup."""
+    if not user_ids:
+        return {}
+    return Profile.objects.prefetch_related(*lookups).in_bulk(user_ids, field_name="user_id")
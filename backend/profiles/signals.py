@@ -2,10 +2,21 @@
 from __future__ import annotations
 
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Profile
+from . import candidate_pools, geo, interest_index, search
+from .models import (
+    City,
+    CityAlias,
+    Interest,
+    Profile,
+    ProfilePhoto,
+    ReligionAlias,
+    forget_canonical_ids,
+)
 
 User = get_user_model()
 
@@ -14,3 +25,78 @@ User = get_user_model()
 def create_profile(sender, instance: User, created: bool, **kwargs) -> None:
     if created:
         Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def sync_candidate_pools(sender, instance: Profile, **kwargs) -> None:
+    profile_id = instance.pk
+    transaction.on_commit(lambda: candidate_pools.record_change(profile_id))
+
+
+@receiver(post_save, sender=ProfilePhoto)
+@receiver(post_delete, sender=ProfilePhoto)
+def sync_photo_count(sender, instance: ProfilePhoto, **kwargs) -> None:
+    # Pools carry the photo count used by suggestion scoring.
+    profile_id = instance.profile_id
+    transaction.on_commit(lambda: candidate_pools.record_change(profile_id))
+
+
+@receiver(post_save, sender=ProfilePhoto)
+@receiver(post_delete, sender=ProfilePhoto)
+def sync_primary_photo(sender, instance: ProfilePhoto, **kwargs) -> None:
+    Profile(pk=instance.profile_id).refresh_primary_photo()
+
+
+@receiver(m2m_changed, sender=Profile.interests.through)
+def sync_interest_index(sender, instance, action: str, reverse: bool, pk_set, **kwargs) -> None:
+    if reverse and action == "pre_clear":
+        # The cleared profiles are unknown afterwards; stamp them now.
+        touch_profiles(instance.profiles.values_list("pk", flat=True))
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    if reverse:
+        # Bulk edits from the Interest side touch many profiles; rebuild lazily.
+        if pk_set:
+            touch_profiles(pk_set)
+        interest_index.invalidate_interest_index()
+        return
+    touch_profiles([instance.pk])
+    interest_index.update_profile_interests(
+        instance.pk, instance.interests.values_list("id", flat=True)
+    )
+
+
+def touch_profiles(profile_ids) -> None:
+    """Bump ``updated_at`` so other processes' interest indexes re-read these profiles."""
+    Profile.objects.filter(pk__in=list(profile_ids)).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Profile)
+def drop_from_interest_index(sender, instance: Profile, **kwargs) -> None:
+    interest_index.discard_profile(instance.pk)
+
+
+@receiver(post_delete, sender=Interest)
+def invalidate_interest_index(sender, instance: Interest, **kwargs) -> None:
+    interest_index.invalidate_interest_index()
+
+
+@receiver(post_save, sender=CityAlias)
+@receiver(post_delete, sender=CityAlias)
+@receiver(post_save, sender=ReligionAlias)
+@receiver(post_delete, sender=ReligionAlias)
+def reset_canonical_ids(sender, **kwargs) -> None:
+    forget_canonical_ids()
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_city_grid(sender, **kwargs) -> None:
+    geo.invalidate_city_grid()
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using: str = "default", **kwargs) -> None:
+    if sender.name == "profiles":
+        search.ensure_sqlite_triggers(using)
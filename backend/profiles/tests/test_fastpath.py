@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from chat.models import ChatRoom, Message, RoomState
+from chat.serializers import ChatRoomSerializer, MessageSerializer
+from matches.models import MutualMatch
+from matches.serializers import MutualMatchSerializer
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from profiles.models import Interest, Profile, ProfilePhoto
+from profiles.serializers import ProfileCardSerializer, ProfilePhotoSerializer, ProfileSerializer
+from vivahvows.fastpath import compile_serializer
+
+GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00"
+    b"\x00\x00\x00\xff\xff\xff\x21\xf9\x04\x01\x00\x00\x00\x00"
+    b"\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x4c\x01\x00\x3b"
+)
+
+
+class FastPathParityTests(TestCase):
+    """The compiled serializers must render exactly the bytes DRF renders."""
+
+    def setUp(self) -> None:
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        User = get_user_model()
+        self.viewer = User.objects.create_user(username="viewer", password="pass-12345")
+        self.partner = User.objects.create_user(username="partner", password="pass-12345")
+        User.objects.create_user(username="blank", password="pass-12345")
+        music, travel = (Interest.objects.create(name=name) for name in ("Music", "Travel"))
+        self.viewer.profile.interests.set([music])
+
+        profile = self.partner.profile
+        profile.name, profile.dob, profile.gender = "Partner", date(1994, 2, 3), "female"
+        profile.city, profile.bio = "Pune", 'Quotes " and unicode ✓'
+        profile.save()
+        profile.interests.set([music, travel])
+        for name in ("one.gif", "two.gif"):
+            ProfilePhoto.objects.create(
+                profile=profile, image=SimpleUploadedFile(name, GIF, content_type="image/gif")
+            )
+
+        room, _ = ChatRoom.get_or_create_room(self.viewer, self.partner)
+        MutualMatch.get_or_create_mutual(self.viewer, self.partner)
+        Message.objects.create(room=room, sender=self.viewer, content="Hi")
+        Message.objects.create(room=room, sender=self.partner, content="", is_read=True)
+        Notification.objects.create(user=self.viewer, event="match", payload={"user_id": 2})
+        Notification.objects.create(user=self.viewer, event="like")
+
+    def _context(self, **params) -> dict:
+        request = Request(APIRequestFactory().get("/", params))
+        request.user = self.viewer
+        return {"request": request}
+
+    def assertParity(self, serializer_class, queryset, context=None, values=False) -> None:
+        context = context if context is not None else self._context()
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+        compiled = compile_serializer(serializer_class, context=context)
+        self.assertEqual(JSONRenderer().render(compiled.many(queryset)), expected)
+        if values:
+            rows = queryset.values(*compiled.values_fields)
+            self.assertEqual(JSONRenderer().render(compiled.many(rows)), expected)
+
+    def test_profile_serializers(self) -> None:
+        profiles = Profile.objects.select_related("user").prefetch_related("interests", "photos")
+        self.assertParity(ProfileSerializer, profiles)
+        self.assertParity(ProfileSerializer, profiles, self._context(fields="id,name,photos"))
+        self.assertParity(ProfileCardSerializer, profiles)
+        self.assertParity(ProfilePhotoSerializer, ProfilePhoto.objects.all())
+
+    def test_match_and_chat_serializers(self) -> None:
+        self.assertParity(MutualMatchSerializer, MutualMatch.objects.all())
+        self.assertParity(ChatRoomSerializer, ChatRoom.objects.all())
+        states = {state.room_id: state for state in RoomState.objects.all()}
+        context = {**self._context(), "room_states": states}
+        self.assertParity(MessageSerializer, Message.objects.all(), context)
+
+    def test_notification_serializer_from_values_rows(self) -> None:
+        compiled = compile_serializer(NotificationSerializer)
+        self.assertEqual(compiled.values_fields, ["id", "event", "payload", "count", "is_read", "created_at", "updated_at"])
+        self.assertParity(NotificationSerializer, Notification.objects.all(), values=True)
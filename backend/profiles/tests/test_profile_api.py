@@ -2,16 +2,21 @@ from __future__ import annotations
 
 import shutil
 import tempfile
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from profiles.models import Interest, ProfilePhoto
+from profiles.candidate_pools import invalidate_candidate_pools
+from profiles.models import City, CityAlias, Interest, Profile, ProfilePhoto
 
 
 def _build_image_file(name: str = "avatar.gif") -> SimpleUploadedFile:
@@ -120,6 +125,110 @@ class ProfileAPITests(TestCase):
         self.assertEqual(response.data["photos"][0]["id"], photo.id)
         self.assertTrue(response.data["photos"][0]["image"].startswith(cdn_base))
 
+    def test_primary_photo_follows_uploads_and_removals(self) -> None:
+        older = ProfilePhoto.objects.create(profile=self.profile, image=_build_image_file("a.gif"))
+        newer = ProfilePhoto.objects.create(profile=self.profile, image=_build_image_file("b.gif"))
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.primary_photo_id, newer.id)
+        self.assertEqual(self.profile.primary_photo_url, newer.image.url)
+
+        newer.delete()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.primary_photo_id, older.id)
+
+        other = get_user_model().objects.create_user(username="other", password="pass-12345")
+        ProfilePhoto.objects.create(profile=other.profile, image=_build_image_file("c.gif"))
+        with self.assertNumQueries(3):  # auth user, count, profiles -- no photos prefetch
+            response = self.client.get(
+                reverse("profile-list"), {"fields": "id,name,primary_photo"}
+            )
+        self.assertTrue(response.data["results"][0]["primary_photo"].endswith("c.gif"))
+
+        Profile.objects.update(primary_photo=None, primary_photo_url="")
+        call_command("backfill_primary_photos", stdout=StringIO())
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.primary_photo_id, older.id)
+        self.assertEqual(self.profile.primary_photo_url, older.image.url)
+
+    def test_list_filters_city_through_canonical_aliases(self) -> None:
+        mumbai = City.objects.create(name="Mumbai")
+        CityAlias.objects.create(alias="bombay", canonical=mumbai)
+        other = get_user_model().objects.create_user(username="other", password="pass-12345")
+        other.profile.city = "  BOMBAY "
+        other.profile.save()
+        invalidate_candidate_pools()
+        self.addCleanup(invalidate_candidate_pools)
+
+        response = self.client.get(reverse("profile-list"), {"city": "mumbai"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data["results"]], [other.profile.id])
+        self.assertEqual(response.data["results"][0]["city"], "  BOMBAY ")
+        self.assertEqual(other.profile.city_ref_id, mumbai.id)
+
+    def test_broad_list_filters_use_indexed_predicates(self) -> None:
+        other = get_user_model().objects.create_user(username="other", password="pass-12345")
+        other.profile.gender = "female"
+        other.profile.save()
+        invalidate_candidate_pools()
+        self.addCleanup(invalidate_candidate_pools)
+
+        for limit in (0, 500):
+            with self.subTest(limit=limit), override_settings(
+                CACHE_SHARED=True, PROFILE_FILTER_MAX_POOL_IDS=limit
+            ):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse("profile-list"), {"gender": "female"})
+                self.assertEqual(
+                    [item["id"] for item in response.data["results"]], [other.profile.id]
+                )
+                filtered = [q["sql"] for q in queries if '"gender" =' in q["sql"]]
+                self.assertTrue(filtered)
+                self.assertEqual(any('"id" IN' in sql for sql in filtered), limit > 0)
+
+    def test_new_profile_is_listed_by_filters_straight_away(self) -> None:
+        invalidate_candidate_pools()
+        self.addCleanup(invalidate_candidate_pools)
+        User = get_user_model()
+        for shared in (False, True):
+            with self.subTest(shared=shared), override_settings(CACHE_SHARED=shared):
+                # Build the pools before the new profile exists.
+                self.client.get(reverse("profile-list"), {"gender": "female"})
+                with self.captureOnCommitCallbacks(execute=True):
+                    user = User.objects.create_user(username=f"new-{shared}", password="x")
+                    user.profile.gender = "female"
+                    user.profile.save()
+
+                response = self.client.get(reverse("profile-list"), {"gender": "female"})
+                self.assertIn(user.profile.id, [item["id"] for item in response.data["results"]])
+
+    def test_list_search_ranks_matches_and_combines_with_filters(self) -> None:
+        invalidate_candidate_pools()
+        self.addCleanup(invalidate_candidate_pools)
+        profiles = {}
+        for username, city, profession, bio in (
+            ("bio_match", "Pune", "Teacher", "Married to engineering problems"),
+            ("title_match", "Pune", "Software Engineer", "Loves trekking"),
+            ("elsewhere", "Delhi", "Civil Engineer", ""),
+            ("unrelated", "Pune", "Doctor", "Plays chess"),
+        ):
+            user = get_user_model().objects.create_user(username=username, password="pass-12345")
+            profile = user.profile
+            profile.city, profile.profession, profile.bio = city, profession, bio
+            profile.save()
+            profiles[username] = profile.id
+
+        response = self.client.get(reverse("profile-list"), {"q": "engineers", "city": "pune"})
+        odd_input = self.client.get(reverse("profile-list"), {"q": '"engineer*('})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [profiles["title_match"], profiles["bio_match"]],
+        )
+        self.assertEqual(odd_input.status_code, status.HTTP_200_OK)
+        self.assertEqual(odd_input.data["count"], 3)
+
     def test_delete_profile_removes_user_account(self) -> None:
         response = self.client.delete(reverse("profile-me"))
 
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
-from datetime import date
-
+from django.conf import settings
 from rest_framework import permissions, status, viewsets
 from rest_framework.permissions import SAFE_METHODS
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 
-from .models import Interest, Profile
-from .serializers import InterestSerializer, ProfileSerializer
+from vivahvows.fastpath import FastListMixin
+
+from .candidate_pools import birthdate_bounds, get_candidate_pools, reference_filter
+from .geo import nearby_city_ids, parse_radius
+from .models import City, Interest, Profile, Religion
+from .search import search_profiles
+from .serializers import (
+    InterestSerializer,
+    ProfileSerializer,
+    profile_prefetches,
+    profile_serializer_class,
+)
 
 
 class InterestViewSet(viewsets.ModelViewSet):
@@ -22,7 +31,7 @@ class InterestViewSet(viewsets.ModelViewSet):
         return [permissions.IsAdminUser()]
 
 
-class ProfileViewSet(viewsets.ModelViewSet):
+class ProfileViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = (
@@ -31,9 +40,12 @@ class ProfileViewSet(viewsets.ModelViewSet):
     http_method_names = ["get", "put", "patch", "delete", "head", "options"]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
+    def get_serializer_class(self):
+        return profile_serializer_class(self.request)
+
     def get_queryset(self):
-        queryset = (
-            Profile.objects.select_related("user").prefetch_related("interests", "photos")
+        queryset = Profile.objects.select_related("user").prefetch_related(
+            *profile_prefetches(self.request)
         )
         if self.action == "list":
             queryset = queryset.exclude(user=self.request.user)
@@ -43,31 +55,47 @@ class ProfileViewSet(viewsets.ModelViewSet):
             religion = params.get("religion")
             age_min = params.get("age_min")
             age_max = params.get("age_max")
+            radius_km = parse_radius(params.get("radius_km"))
             interest_ids = params.getlist("interests")
 
-            if gender:
-                queryset = queryset.filter(gender=gender)
-            if city:
-                queryset = queryset.filter(city__iexact=city)
-            if religion:
-                queryset = queryset.filter(religion__iexact=religion)
-            if age_min or age_max:
-                today = date.today()
-
-                def _subtract_years(years: int) -> date:
-                    try:
-                        return today.replace(year=today.year - years)
-                    except ValueError:
-                        return today.replace(month=2, day=28, year=today.year - years)
-
-                if age_min:
-                    max_birthdate = _subtract_years(int(age_min))
-                    queryset = queryset.filter(dob__lte=max_birthdate)
-                if age_max:
-                    min_birthdate = _subtract_years(int(age_max))
-                    queryset = queryset.filter(dob__gte=min_birthdate)
+            if gender or city or religion or age_min or age_max or radius_km:
+                min_dob, max_dob = birthdate_bounds(age_min, age_max)
+                city_filter = reference_filter(City, city)
+                if radius_km is not None:
+                    # Around the requested city, or the viewer's own when none is given.
+                    center = city_filter or self.request.user.profile.city_ref_id
+                    city_filter = nearby_city_ids(center, radius_km) if center else None
+                religion_filter = reference_filter(Religion, religion)
+                # Indexed equality and range predicates keep broad filters cheap.
+                if gender:
+                    queryset = queryset.filter(gender=gender)
+                if isinstance(city_filter, frozenset):
+                    queryset = queryset.filter(city_ref_id__in=city_filter)
+                elif city_filter is not None:
+                    queryset = queryset.filter(city_ref_id=city_filter)
+                if religion_filter is not None:
+                    queryset = queryset.filter(religion_ref_id=religion_filter)
+                if min_dob:
+                    queryset = queryset.filter(dob__gte=min_dob)
+                if max_dob:
+                    queryset = queryset.filter(dob__lte=max_dob)
+                # A narrow match is resolved from the in-memory pools, so the
+                # page and its count become primary key lookups.  Pools only
+                # follow every worker's commits through a shared cache; on a
+                # per-process one they lag, so the predicates above decide alone.
+                if settings.CACHE_SHARED:
+                    candidates = get_candidate_pools().select(
+                        gender=gender,
+                        city=city_filter,
+                        religion=religion_filter,
+                        min_dob=min_dob,
+                        max_dob=max_dob,
+                    )
+                    if len(candidates) <= settings.PROFILE_FILTER_MAX_POOL_IDS:
+                        queryset = queryset.filter(pk__in=[c.profile_id for c in candidates])
             if interest_ids:
                 queryset = queryset.filter(interests__id__in=interest_ids).distinct()
+            queryset = search_profiles(queryset, params.get("q"))
         return queryset
 
     def get_object(self):
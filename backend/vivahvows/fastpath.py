@@ -0,0 +1,246 @@
+"""Compiled fast path for read-only list serialization.
+
+``Serializer.to_representation`` walks every field of every row through
+``get_attribute``/``to_representation`` dispatch, ``SkipField`` handling and
+``OrderedDict`` bookkeeping.  ``compile_serializer`` does that walk once: it
+inspects a bound serializer's readable fields and generates a flat function
+that builds each row's dict with direct attribute access, pre-bound converters
+and pre-bound ``SerializerMethodField`` methods.  Nested serializers are
+compiled recursively.
+
+The output is identical to ``serializer.data`` (``profiles/tests/test_fastpath.py``
+compares the rendered JSON byte for byte).  Rows may be model
+instances or, when every field maps straight onto a column (see
+``CompiledSerializer.values_fields``), the dicts from ``QuerySet.values()``.
+
+Fields the compiler has no fast form for fall back to DRF's own per-field
+logic, so any serializer compiles.
+"""
+from __future__ import annotations
+
+import inspect
+import keyword
+import types
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import ManyRelatedField, PKOnlyObject, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+# Generated source -> code object, so per-request compilation only binds names.
+_code_cache: dict[str, types.CodeType] = {}
+
+# ``to_representation`` implementations that are exactly a builtin call.
+_BUILTIN_CONVERTERS = {
+    serializers.CharField.to_representation: "str",
+    serializers.IntegerField.to_representation: "int",
+    serializers.FloatField.to_representation: "float",
+}
+
+
+def _fast_converter(field: serializers.Field) -> Callable[[Any], Any]:
+    """An exact shortcut for ``field.to_representation`` on the common value types.
+
+    Anything unusual (naive or string datetimes, enums, non-bool booleans)
+    goes through the field itself.
+    """
+    slow = field.to_representation
+    method = type(field).to_representation
+
+    if method is serializers.DateTimeField.to_representation:
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if output_format is None or output_format.lower() != ISO_8601 or zone is None:
+            return slow
+
+        def datetime_iso(value):
+            if value.__class__ is not datetime or value.utcoffset() is None:
+                return slow(value)
+            text = value.astimezone(zone).isoformat()
+            return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+        return datetime_iso
+
+    if method is serializers.ChoiceField.to_representation:
+        choices = field.choice_strings_to_values
+
+        def choice(value):
+            if value.__class__ is not str:
+                return slow(value)
+            return choices.get(value, value) if value else value
+
+        return choice
+
+    if method is serializers.BooleanField.to_representation:
+        return lambda value: value if value.__class__ is bool else slow(value)
+
+    if method is serializers.BigIntegerField.to_representation:
+        if getattr(field, "coerce_to_string", api_settings.COERCE_BIGINT_TO_STRING):
+            return slow
+        return int
+
+    if method is serializers.JSONField.to_representation and not field.binary:
+        return lambda value: value
+
+    return slow
+
+
+def _render_field(field: serializers.Field, instance) -> Any:
+    """DRF's per-field step from ``Serializer.to_representation``."""
+    attribute = field.get_attribute(instance)
+    check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+    return None if check_for_none is None else field.to_representation(attribute)
+
+
+def _identifier(name: str) -> bool:
+    return name.isidentifier() and not keyword.iskeyword(name)
+
+
+class CompiledSerializer:
+    def __init__(self, serializer: serializers.BaseSerializer) -> None:
+        self.serializer = serializer
+        self.model = getattr(getattr(serializer, "Meta", None), "model", None)
+        self.namespace: dict[str, Any] = {"_render_field": _render_field}
+        self.columns: list[str] | None = []
+        entries: list[tuple[str, str, str | None]] = []
+        for position, field in enumerate(serializer._readable_fields):
+            entries.append((field.field_name, *self._compile_field(position, field)))
+
+        instance_expr = ", ".join(f"{name!r}: {expr}" for name, expr, _ in entries)
+        source = f"def from_instance(obj):\n    return {{{instance_expr}}}\n"
+        if self.columns is not None:
+            row_expr = ", ".join(f"{name!r}: {expr}" for name, _, expr in entries)
+            source += f"def from_row(row):\n    return {{{row_expr}}}\n"
+        code = _code_cache.get(source)
+        if code is None:
+            code = _code_cache[source] = compile(source, "<fastpath>", "exec")
+        exec(code, self.namespace)
+        self.from_instance: Callable[[Any], dict] = self.namespace["from_instance"]
+        self.from_row: Callable[[dict], dict] | None = self.namespace.get("from_row")
+
+    @property
+    def values_fields(self) -> list[str] | None:
+        """Columns to pass to ``.values()`` for row input, or ``None`` if instances are needed."""
+        return self.columns
+
+    def __call__(self, obj) -> dict:
+        if isinstance(obj, dict) and self.from_row is not None:
+            return self.from_row(obj)
+        return self.from_instance(obj)
+
+    def many(self, rows: Iterable) -> list[dict]:
+        rows = rows.all() if hasattr(rows, "all") else rows
+        return [self(row) for row in rows]
+
+    def _bind(self, prefix: str, position: int, value) -> str:
+        name = f"{prefix}{position}"
+        self.namespace[name] = value
+        return name
+
+    def _model_field(self, source: str):
+        if self.model is None or not _identifier(source):
+            return None
+        try:
+            return self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+
+    def _compile_field(self, position: int, field) -> tuple[str, str | None]:
+        """Return ``(instance expression, row expression or None)`` for one field."""
+        source = field.source
+
+        if isinstance(field, serializers.SerializerMethodField):
+            method = self._bind("method", position, getattr(field.parent, field.method_name))
+            return self._instance_only(f"{method}(obj)")
+
+        if isinstance(field, serializers.ListSerializer) and _identifier(source):
+            child = self._bind("child", position, CompiledSerializer(field.child))
+            return self._instance_only(
+                f"(None if (v := obj.{source}) is None else "
+                f"[{child}(item) for item in (v.all() if hasattr(v, 'all') else v)])"
+            )
+
+        if isinstance(field, serializers.BaseSerializer) and _identifier(source):
+            child = self._bind("child", position, CompiledSerializer(field))
+            return self._instance_only(f"(None if (v := obj.{source}) is None else {child}(v))")
+
+        if (
+            isinstance(field, ManyRelatedField)
+            and isinstance(field.child_relation, PrimaryKeyRelatedField)
+            and field.child_relation.pk_field is None
+            and _identifier(source)
+        ):
+            return self._instance_only(
+                f"([item.pk for item in obj.{source}.all()] if obj.pk is not None else [])"
+            )
+
+        model_field = self._model_field(source)
+        if isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+            if model_field is not None and (model_field.many_to_one or model_field.one_to_one):
+                # Same as DRF's PKOnlyObject optimisation: the raw foreign key column.
+                return f"obj.{model_field.attname}", self._column(source, f"row[{source!r}]")
+            return self._fallback(position, field)
+
+        if model_field is None or model_field.is_relation or not model_field.concrete:
+            if self.model is not None and _identifier(source):
+                if isinstance(inspect.getattr_static(self.model, source, None), property):
+                    convert = self._converter(position, field)
+                    return self._instance_only(
+                        f"(None if (v := obj.{source}) is None else {convert}(v))"
+                    )
+            return self._fallback(position, field)
+
+        convert = self._converter(position, field)
+        return (
+            f"(None if (v := obj.{source}) is None else {convert}(v))",
+            self._column(source, f"(None if (v := row[{source!r}]) is None else {convert}(v))"),
+        )
+
+    def _converter(self, position: int, field) -> str:
+        method = type(field).to_representation
+        if method is serializers.ReadOnlyField.to_representation:
+            return ""
+        if method in _BUILTIN_CONVERTERS:
+            return _BUILTIN_CONVERTERS[method]
+        return self._bind("convert", position, _fast_converter(field))
+
+    def _column(self, source: str, expr: str) -> str | None:
+        if self.columns is not None:
+            self.columns.append(source)
+        return expr
+
+    def _instance_only(self, expr: str) -> tuple[str, None]:
+        self.columns = None
+        return expr, None
+
+    def _fallback(self, position: int, field) -> tuple[str, None]:
+        bound = self._bind("field", position, field)
+        return self._instance_only(f"_render_field({bound}, obj)")
+
+
+def compile_serializer(serializer_class, **kwargs) -> CompiledSerializer:
+    """Compile ``serializer_class(**kwargs)``; pass ``context=`` as you would to the serializer."""
+    return CompiledSerializer(serializer_class(**kwargs))
+
+
+class FastListMixin:
+    """Serve ``list`` through the compiled serializer, from ``.values()`` rows when possible."""
+
+    def get_compiled_serializer(self) -> CompiledSerializer:
+        return compile_serializer(
+            self.get_serializer_class(), context=self.get_serializer_context()
+        )
+
+    def list(self, request, *args, **kwargs):
+        from rest_framework.response import Response
+
+        compiled = self.get_compiled_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        if compiled.values_fields is not None:
+            queryset = queryset.values(*compiled.values_fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.many(page))
+        return Response(compiled.many(queryset))
@@ -0,0 +1,188 @@
+"""Keyset pagination over ``(timestamp, id)`` orderings.
+
+Each page continues strictly past the edge row of the previous one, named by
+an opaque cursor (``KeysetPagination``) or a row id (``AnchorPagination``),
+so the cost of a page does not grow with its depth and no ``COUNT(*)`` is
+run.  Rows sharing a timestamp are split by ``id``, which
+makes the ordering total.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q, Subquery
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Newest first on ``(time_field, id_field)``; override either per view."""
+
+    time_field = "created_at"
+    id_field = "id"
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor."
+
+    def order(self, queryset):
+        return queryset.order_by(f"-{self.time_field}", f"-{self.id_field}")
+
+    def encode_cursor(self, row) -> str:
+        if isinstance(row, dict):
+            value, row_id = row[self.time_field], row[self.id_field]
+        else:
+            value, row_id = getattr(row, self.time_field), getattr(row, self.id_field)
+        raw = f"{value.isoformat()}|{row_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple[datetime, int]:
+        try:
+            value, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(value), int(row_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def after(self, queryset, value: datetime, row_id: int):
+        """Rows that sort after ``(value, row_id)`` in newest-first order."""
+        tie = {self.time_field: value, f"{self.id_field}__lt": row_id}
+        return queryset.filter(Q(**{f"{self.time_field}__lt": value}) | Q(**tie))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        queryset = self.order(queryset)
+        if cursor:
+            queryset = self.after(queryset, *self.decode_cursor(cursor))
+        page_size = self.get_page_size(request)
+        rows = list(queryset[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class AnchorPagination(BasePagination):
+    """Newest-first history paged around a row id: ``?before=<id>``, ``?after=<id>``, ``?limit=``.
+
+    Rows are ordered by ``(time_field, id)`` so the scan runs along an index
+    on ``(<filter column>, time_field)``.  The anchor's timestamp is resolved
+    by a scalar subquery, so clients only ever pass ids, and nothing is
+    counted.  ``next`` links to older rows and ``previous`` to newer ones.
+    """
+
+    time_field = "created_at"
+    default_limit = 50
+    max_limit = 200
+    invalid_anchor_message = "Anchors must be positive integers."
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params["limit"])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_anchor(self, request, name: str) -> int | None:
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        if not value.isdigit() or int(value) < 1:
+            raise NotFound(self.invalid_anchor_message)
+        return int(value)
+
+    def around(self, queryset, anchor: int, older: bool):
+        anchor_time = Subquery(
+            queryset.order_by().filter(pk=anchor).values(self.time_field)[:1]
+        )
+        op = "lt" if older else "gt"
+        return queryset.filter(
+            Q(**{f"{self.time_field}__{op}": anchor_time})
+            | Q(**{self.time_field: anchor_time, f"id__{op}": anchor})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        before = self.get_anchor(request, "before")
+        after = self.get_anchor(request, "after")
+        newest_first = (f"-{self.time_field}", "-id")
+        if after is not None and before is None:
+            # The rows just above the anchor, read upwards, then flipped.
+            queryset = self.around(queryset, after, older=False)
+            rows = list(queryset.order_by(self.time_field, "id")[: self.limit + 1])
+            self.has_newer, self.has_older = len(rows) > self.limit, True
+            self.page = rows[: self.limit][::-1]
+            return self.page
+        if after is not None:
+            queryset = self.around(queryset, after, older=False)
+        if before is not None:
+            queryset = self.around(queryset, before, older=True)
+        rows = list(queryset.order_by(*newest_first)[: self.limit + 1])
+        self.has_older, self.has_newer = len(rows) > self.limit, before is not None
+        self.page = rows[: self.limit]
+        return self.page
+
+    def _row_id(self, row) -> int:
+        return row["id"] if isinstance(row, dict) else row.id
+
+    def _link(self, name: str, row) -> str:
+        url = remove_query_param(self.request.build_absolute_uri(), "before")
+        url = remove_query_param(url, "after")
+        return replace_query_param(url, name, self._row_id(row))
+
+    def get_next_link(self) -> str | None:
+        if not self.page or not self.has_older:
+            return None
+        return self._link("before", self.page[-1])
+
+    def get_previous_link(self) -> str | None:
+        if not self.page or not self.has_newer:
+            return None
+        return self._link("after", self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data}
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
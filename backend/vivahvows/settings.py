@@ -7,6 +7,7 @@ from pathlib import Path
 
 import dj_database_url
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -168,6 +169,8 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Record logins so `precompute_suggestions --active-days` can tell who is active.
+    "UPDATE_LAST_LOGIN": True,
 }
 
 # Cloudinary configuration
@@ -194,19 +197,191 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
-# Channels configuration
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+# Channels configuration. "memory" only reaches consumers in the same process,
+# so it limits the site to a single ASGI worker. "redis" (channels_redis'
+# sharded layer with per-channel capacity) and "redis-pubsub" (Redis Pub/Sub,
+# lower latency, no backpressure) deliver across processes and hosts.
+# CHANNEL_REDIS_URLS lists one URL per shard. Each worker keeps a pool per
+# event loop of up to CHANNEL_REDIS_MAX_CONNECTIONS connections per shard.
+CHANNEL_LAYER_BACKEND = env("CHANNEL_LAYER_BACKEND", default="memory")
+CHANNEL_REDIS_URLS = env.list("CHANNEL_REDIS_URLS", default=["redis://127.0.0.1:6379/0"])
+CHANNEL_REDIS_MAX_CONNECTIONS = env.int("CHANNEL_REDIS_MAX_CONNECTIONS", default=50)
+CHANNEL_LAYER_PREFIX = env("CHANNEL_LAYER_PREFIX", default="vivahvows")
+CHANNEL_LAYER_CAPACITY = env.int("CHANNEL_LAYER_CAPACITY", default=100)
+CHANNEL_LAYER_EXPIRY = env.int("CHANNEL_LAYER_EXPIRY", default=60)
+
+_channel_hosts = [
+    {"address": url, "max_connections": CHANNEL_REDIS_MAX_CONNECTIONS}
+    for url in CHANNEL_REDIS_URLS
+]
+if CHANNEL_LAYER_BACKEND == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": _channel_hosts,
+                "prefix": CHANNEL_LAYER_PREFIX,
+                "capacity": CHANNEL_LAYER_CAPACITY,
+                "expiry": CHANNEL_LAYER_EXPIRY,
+            },
+        }
     }
-}
-
-# Caching for frequently accessed data (match suggestions etc.)
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "vivahvows-cache",
+elif CHANNEL_LAYER_BACKEND == "redis-pubsub":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {"hosts": _channel_hosts, "prefix": CHANNEL_LAYER_PREFIX},
+        }
     }
-}
+elif CHANNEL_LAYER_BACKEND == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "CONFIG": {"capacity": CHANNEL_LAYER_CAPACITY, "expiry": CHANNEL_LAYER_EXPIRY},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown CHANNEL_LAYER_BACKEND {CHANNEL_LAYER_BACKEND!r}.")
+
+# Caching for frequently accessed data (match suggestions etc.). "locmem" is
+# private to each process: with more than one worker, the counters and
+# invalidations kept in it are only seen by the worker that wrote them, so
+# the cache lifetimes below default to a minute. "redis" (CACHE_REDIS_URLS,
+# the first URL takes writes) and "database" (run `createcachetable` once)
+# are shared by every worker and allow long lifetimes.
+CACHE_BACKEND = env("CACHE_BACKEND", default="locmem")
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": env.list("CACHE_REDIS_URLS", default=["redis://127.0.0.1:6379/1"]),
+            "KEY_PREFIX": env("CACHE_KEY_PREFIX", default="vivahvows"),
+        }
+    }
+elif CACHE_BACKEND == "database":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "vivahvows_cache",
+        }
+    }
+elif CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "vivahvows-cache",
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}.")
+CACHE_SHARED = CACHE_BACKEND != "locmem"
 
 LOGIN_REDIRECT_URL = "/"
+
+# Interest bitset index used to rank match suggestions (profiles.interest_index).
+# Point INTEREST_INDEX_DIR at a directory written by `build_interest_index` to
+# share one memory-mapped copy between workers.
+INTEREST_INDEX_DIR = env("INTEREST_INDEX_DIR", default="")
+INTEREST_INDEX_REFRESH_SECONDS = env.int("INTEREST_INDEX_REFRESH_SECONDS", default=300)
+
+# Segmented candidate pools (profiles.candidate_pools). Processes replay up to
+# CANDIDATE_POOL_CHANGE_LOG_SIZE profile changes from the cache before falling
+# back to a full rebuild.
+CANDIDATE_POOL_CHANGE_LOG_SIZE = env.int("CANDIDATE_POOL_CHANGE_LOG_SIZE", default=1000)
+CANDIDATE_POOL_CHANGE_TTL = env.int("CANDIDATE_POOL_CHANGE_TTL", default=3600)
+# Pools are rebuilt from the database once this old; the change log only
+# reaches other workers through a shared CACHE_BACKEND.
+CANDIDATE_POOL_REFRESH_SECONDS = env.int(
+    "CANDIDATE_POOL_REFRESH_SECONDS", default=3600 if CACHE_SHARED else 60
+)
+# With a shared cache, profile list filters add the pooled ids as a primary key
+# list only when they match at most this many profiles; broader filters, and
+# every filter on a per-process cache, use the indexes alone.
+PROFILE_FILTER_MAX_POOL_IDS = env.int("PROFILE_FILTER_MAX_POOL_IDS", default=500)
+
+# Per-user suggestion decks (matches.deck): ranked snapshot size, the number of
+# unserved candidates below which a deck is re-ranked, and its cache lifetime.
+SUGGESTION_DECK_SIZE = env.int("SUGGESTION_DECK_SIZE", default=500)
+SUGGESTION_DECK_REFILL_AT = env.int("SUGGESTION_DECK_REFILL_AT", default=40)
+SUGGESTION_DECK_TTL = env.int("SUGGESTION_DECK_TTL", default=3600)
+# Once profiles change, a deck older than this many seconds is re-ranked.
+SUGGESTION_DECK_MAX_STALENESS = env.int("SUGGESTION_DECK_MAX_STALENESS", default=60)
+
+# Suggestion pages are versioned by generation counters (matches.generations),
+# so they can be cached for long periods, but only when every worker sees the
+# same counters (a shared CACHE_BACKEND).
+SUGGESTION_CACHE_TTL = env.int("SUGGESTION_CACHE_TTL", default=3600 if CACHE_SHARED else 60)
+
+# Cached per-user exclusion arrays (matches.exclusions), invalidated on every
+# MatchAction write; long-lived only with a shared CACHE_BACKEND.
+EXCLUSION_CACHE_TTL = env.int("EXCLUSION_CACHE_TTL", default=86400 if CACHE_SHARED else 60)
+
+# Nightly precomputed suggestions (precompute_suggestions) older than this are ignored.
+SUGGESTION_BATCH_MAX_AGE = env.int("SUGGESTION_BATCH_MAX_AGE", default=36 * 3600)
+
+# Two-sided matching: also require each candidate's own preferences to admit the
+# viewer. Clients can override per request with ?reciprocal=true/false.
+SUGGESTION_RECIPROCAL_DEFAULT = env.bool("SUGGESTION_RECIPROCAL_DEFAULT", default=False)
+
+# City grid behind the radius_km filters (profiles.geo); coordinates come from
+# the bundled gazetteer (`load_gazetteer`). Other workers pick up City edits
+# after this many seconds.
+GEO_GRID_REFRESH_SECONDS = env.int("GEO_GRID_REFRESH_SECONDS", default=3600)
+
+# Weighted suggestion scoring (matches.scoring). Each signal yields 0..1 per
+# candidate; set a weight to 0 to switch the signal off.
+SUGGESTION_SCORE_WEIGHTS = {
+    "shared_interests": env.float("SUGGESTION_WEIGHT_SHARED_INTERESTS", default=1.0),
+    "age_fit": env.float("SUGGESTION_WEIGHT_AGE_FIT", default=0.3),
+    "education": env.float("SUGGESTION_WEIGHT_EDUCATION", default=0.2),
+    "profession": env.float("SUGGESTION_WEIGHT_PROFESSION", default=0.1),
+    "recency": env.float("SUGGESTION_WEIGHT_RECENCY", default=0.2),
+    "photos": env.float("SUGGESTION_WEIGHT_PHOTOS", default=0.1),
+}
+SUGGESTION_RECENCY_HALF_LIFE_DAYS = env.int("SUGGESTION_RECENCY_HALF_LIFE_DAYS", default=30)
+
+# Write-behind chat persistence (chat.writebehind): WebSocket messages are
+# broadcast first and saved in batches of up to CHAT_WRITE_BEHIND_BATCH, at
+# most CHAT_WRITE_BEHIND_DELAY_MS after they arrive. Their ids are reserved
+# CHAT_WRITE_BEHIND_ID_BLOCK at a time per process.
+CHAT_WRITE_BEHIND = env.bool("CHAT_WRITE_BEHIND", default=False)
+CHAT_WRITE_BEHIND_BATCH = env.int("CHAT_WRITE_BEHIND_BATCH", default=100)
+CHAT_WRITE_BEHIND_DELAY_MS = env.int("CHAT_WRITE_BEHIND_DELAY_MS", default=10)
+CHAT_WRITE_BEHIND_ID_BLOCK = env.int("CHAT_WRITE_BEHIND_ID_BLOCK", default=500)
+
+# Cached chat room membership (chat.access); matches and room changes evict it.
+# A per-process cache cannot see other workers' evictions, so there grants are
+# kept for CHAT_ACCESS_LOCAL_TTL only, and open sockets re-check once it passes.
+CHAT_ACCESS_CACHE_TTL = env.int("CHAT_ACCESS_CACHE_TTL", default=300)
+CHAT_ACCESS_LOCAL_TTL = env.int("CHAT_ACCESS_LOCAL_TTL", default=5)
+
+# Notification outbox (notifications.outbox). Entries are delivered in batches
+# by a background thread after each commit and by `deliver_notifications`;
+# an entry whose push did not complete is retried after the lease expires.
+NOTIFICATION_OUTBOX_BATCH = env.int("NOTIFICATION_OUTBOX_BATCH", default=200)
+NOTIFICATION_OUTBOX_LEASE_SECONDS = env.int("NOTIFICATION_OUTBOX_LEASE_SECONDS", default=60)
+NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT = env.bool("NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT", default=True)
+
+# Notification coalescing (notifications.outbox.group_key): events of these
+# types for the same room (or sender) fold into one unread notification for
+# this long, and its WebSocket push is sent at most once per debounce period.
+# Deferred pushes are sent by a timer on the drain-on-commit thread; with
+# NOTIFICATION_OUTBOX_DRAIN_ON_COMMIT off, run `deliver_notifications`.
+NOTIFICATION_COALESCE_EVENTS = env.list("NOTIFICATION_COALESCE_EVENTS", default=["message"])
+NOTIFICATION_COALESCE_WINDOW_SECONDS = env.int("NOTIFICATION_COALESCE_WINDOW_SECONDS", default=900)
+NOTIFICATION_PUSH_DEBOUNCE_SECONDS = env.int("NOTIFICATION_PUSH_DEBOUNCE_SECONDS", default=10)
+
+# Cached unread notification counters (notifications.counters). Counters are
+# adjusted with cache.incr by whichever process commits (web workers and
+# `deliver_notifications`), so they last long only on Redis, whose incr is
+# shared and atomic; otherwise they are recounted every minute.
+NOTIFICATION_UNREAD_CACHE_TTL = env.int(
+    "NOTIFICATION_UNREAD_CACHE_TTL", default=86400 if CACHE_BACKEND == "redis" else 60
+)
+
+# Notification retention (`prune_notifications`): read notifications older
+# than NOTIFICATION_RETENTION_DAYS are moved to the archive table ("archive")
+# or dropped ("delete"), NOTIFICATION_RETENTION_BATCH rows per transaction.
+NOTIFICATION_RETENTION_DAYS = env.int("NOTIFICATION_RETENTION_DAYS", default=90)
+NOTIFICATION_RETENTION_MODE = env("NOTIFICATION_RETENTION_MODE", default="archive")
+NOTIFICATION_RETENTION_BATCH = env.int("NOTIFICATION_RETENTION_BATCH", default=1000)
@@ -61,7 +61,7 @@ function NotificationsPage() {
               <div>
                 <strong>{eventLabels[notification.event] || notification.event}</strong>
                 <p className="helper-text">{JSON.stringify(notification.payload)}</p>
-                <small>{new Date(notification.created_at).toLocaleString()}</small>
+                <small>{new Date(notification.updated_at).toLocaleString()}</small>
               </div>
               {!notification.is_read ? (
                 <button className="btn secondary" type="button" onClick={() => markAsRead(notification.id)}>